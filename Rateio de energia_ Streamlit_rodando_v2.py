@@ -1,22 +1,59 @@
 # ===================== IMPORTAÇÕES =====================
+# plotly, openpyxl e xlsxwriter não são importados aqui: o pacote rateio os carrega
+# no primeiro gráfico, backup ou download, o que deixa a primeira página mais rápida
+from time import perf_counter       # Mede o custo das importações (diagnóstico de inicialização)
+_inicio_importacoes = perf_counter()
 import streamlit as st              # Framework para apps web simples em Python
 import pandas as pd                 # Manipulação de dados tabulares
-import plotly.express as px         # Gráficos interativos
-import io                           # Buffer de memória para criar arquivos em tempo real
+import numpy as np                  # Arrays para o cálculo vetorizado
+import io                           # Tipo do arquivo devolvido ao botão de download
+import tempfile                     # ZIP dos demonstrativos em disco, não em memória
 from datetime import datetime       # Data e hora
+from functools import partial, wraps  # Congela argumentos do download gerado sob demanda
+from uuid import uuid4              # Identificador da sessão nos logs de diagnóstico
 from zoneinfo import ZoneInfo       # Fuso horário (para horário local de Blumenau)
-from openpyxl.utils import get_column_letter  # Ajuste automático de largura das colunas no Excel
+from rateio import BANDEIRAS, FONTES_CONSUMO, METODOS_RATEIO, Tarifas  # Motor de cálculo
+from rateio.cache import hash_dataframes
+from rateio.calibracao import calibrar_tarifas, ler_faturas
+from rateio.cenarios import comparar_cenarios
+from rateio.demonstrativos import DIVISOES_AREAS_COMUNS, MIME_ZIP, gerar_zip_demonstrativos
+from rateio.exportacao import MIME_XLSX, montar_aba_rateio, montar_resumo, relatorio_excel_em_cache
+from rateio.grafico import MODOS_GRAFICO, ORDENACOES, figura_em_cache
+from rateio.historico import HistoricoSQLite
+from rateio.leituras import (
+    COLUNA_ANTERIOR, COLUNA_ATUAL, COLUNA_NOME, LeiturasUnidades, ler_tabela, nomes_da_tabela, preencher_anteriores,
+    tabela_inicial,
+)
+from rateio.importacao import importar_backup_em_cache
+from rateio.incremental import RateioIncremental
+from rateio.instrumentacao import Instrumentacao, modulos_carregados
+from rateio.medidores import (
+    agregar_intervalos, energia_postos_do_mes, leituras_do_mes, medidores_disponiveis, meses_disponiveis,
+)
+from rateio.memoria import ArmazemSessao
+from rateio.serie_mensal import JANELA as JANELA_SERIE, SerieMensal, mes_do_texto
+from rateio.tarifa_branca import TarifaBranca, calcular_rateio_branca
+# Só é alto na primeira execução do processo; nas seguintes os módulos já estão carregados
+_tempo_importacoes = perf_counter() - _inicio_importacoes
 
 # ===================== CONFIGURAÇÃO DA PÁGINA =====================
 st.set_page_config(page_title="Rateio de Energia", page_icon="💡", layout="wide")
 st.title("💡 Rateio de pagamentos de energia ")
 
+MODOS_ENTRADA = ["Por unidade (até 10)", "Tabela (sem limite)"]
+MODALIDADES = ["Convencional (faixas de consumo)", "Branca (horária)"]
+CAMPOS_TARIFA = [
+    "te_ate_150", "te_acima_150", "tusd_ate_150", "tusd_acima_150", "bandeira_ate_150", "bandeira_acima_150", "cosip",
+]
+
 # ===================== ESTADO (SESSION_STATE) =====================
-# Guardamos histórico, último resultado e resumo para persistirem após cliques
-if "historico" not in st.session_state:
-    st.session_state.historico = pd.DataFrame()
-if "df_resultado" not in st.session_state:
-    st.session_state.df_resultado = None
+# Guardamos último resultado e resumo para persistirem após cliques
+# (o histórico fica em disco, veja abrir_historico)
+# Resultado, leituras e resumo ficam no armazém da sessão: compactados (centavos/Wh
+# inteiros, textos repetidos como categoria) e, acima do orçamento de memória, em disco
+if "armazem" not in st.session_state:
+    st.session_state.armazem = ArmazemSessao()
+armazem = st.session_state.armazem
 if "resumo_resultado" not in st.session_state:
     st.session_state.resumo_resultado = None
 if "alertas_resultado" not in st.session_state:
@@ -24,8 +61,37 @@ if "alertas_resultado" not in st.session_state:
 # Estados para importação do mês anterior
 if "prev_map" not in st.session_state:
     st.session_state.prev_map = {}
-if "import_resumo" not in st.session_state:
-    st.session_state.import_resumo = None
+if "import_itens" not in st.session_state:
+    st.session_state.import_itens = {}
+# Último cálculo por unidade: ao corrigir uma leitura, só essa unidade é recalculada
+if "rateio_incremental" not in st.session_state:
+    st.session_state.rateio_incremental = RateioIncremental()
+
+# ===================== DIAGNÓSTICO (OPCIONAL) =====================
+# Mede tempo, linhas e memória de cada seção. Ligado por RATEIO_DIAGNOSTICO=1
+# (com memória, para o servidor todo) ou abrindo a página com ?diagnostico=1
+# (só tempo e linhas, só nesta sessão); o painel só aparece quando ligado.
+if "diagnostico" not in st.session_state:
+    st.session_state.diagnostico = Instrumentacao(sessao=uuid4().hex[:8])
+diag = st.session_state.diagnostico
+if st.query_params.get("diagnostico") == "1" and not diag.ativo:
+    diag.ativar()
+diag.nova_execucao()
+diag.registrar("importacoes", _tempo_importacoes)
+
+def medir_fase(nome: str):
+    """
+    Decorador para as seções: mede cada chamada (inclusive os reruns de fragmento)
+    como uma fase do diagnóstico. O retorno da seção é o número de linhas exibidas.
+    """
+    def decorador(secao):
+        @wraps(secao)
+        def secao_medida(*args, **kwargs):
+            with st.session_state.diagnostico.fase(nome) as fase:
+                fase.linhas = secao(*args, **kwargs)
+            return fase.linhas
+        return secao_medida
+    return decorador
 
 # ===================== IMPORTAÇÃO DO MÊS ANTERIOR =====================
 st.header("📅 Mês anterior (importar backup)")
@@ -33,35 +99,21 @@ arquivo = st.file_uploader("Carregue a planilha Excel do mês anterior", type=["
 
 if arquivo is not None:
     try:
-        xls = pd.ExcelFile(arquivo)
-
-        # Lê aba Resumo
-        resumo_imp = pd.read_excel(xls, sheet_name="Resumo")
-
-        # Lê aba Rateio (ou primeira aba se não existir)
-        try:
-            rateio_imp = pd.read_excel(xls, sheet_name="Rateio")
-        except Exception:
-            abas = xls.sheet_names
-            rateio_imp = pd.read_excel(xls, sheet_name=abas[0]) if abas else pd.DataFrame()
+        # Lê abas Resumo e Rateio uma única vez por arquivo (cache pelo hash do conteúdo)
+        with diag.fase("importacao") as fase:
+            backup = importar_backup_em_cache(arquivo.getvalue())
+            fase.linhas = len(backup.rateio)
+        resumo_imp, rateio_imp = backup.resumo, backup.rateio
 
-        # 🔧 Força cabeçalhos consistentes se não existirem
-        if "Unidade" not in rateio_imp.columns:
-            rateio_imp.columns = ["Unidade", "Consumo (kWh)", "Valor (R$)"]
+        # Leituras anteriores das quitinetes (mesmo critério do rateio em lote)
+        st.session_state.prev_map = backup.prev_map
 
-        # Monta o mapeamento de leituras anteriores
-        st.session_state.prev_map = dict(zip(rateio_imp["Unidade"], rateio_imp["Consumo (kWh)"]))
-
-        # Guarda o resumo importado
-        st.session_state.import_resumo = resumo_imp
+        # Guarda só os itens já indexados do resumo (as abas ficam no cache de backups)
+        st.session_state.import_itens = backup.itens
 
         # Função para extrair valores do resumo
         def get_item(item):
-            try:
-                ser = resumo_imp.loc[resumo_imp["Item"] == item, "Valor"]
-                return ser.values[0] if len(ser.values) else None
-            except Exception:
-                return None
+            return backup.itens.get(item)
 
         # Aplica valores do backup com segurança
         def aplicar_valor_seguro(chave_session, valor, opcoes_validas):
@@ -84,106 +136,116 @@ if arquivo is not None:
         st.write(e)
 
 # ===================== SIDEBAR: CONFIGURAÇÕES DE TARIFA =====================
-st.sidebar.header("⚙️ Tarifas Celesc (R$/kWh com tributos)")
-# TE: Tarifa de Energia | TUSD: Tarifa de Uso do Sistema de Distribuição
-# Usamos duas faixas: até 150 kWh e acima de 150 kWh (modelo comum de residenciais)
-tarifas = {
-    "te_ate_150": st.sidebar.number_input("TE até 150 kWh", value=0.392200, format="%.6f"),
-    "te_acima_150": st.sidebar.number_input("TE acima 150 kWh", value=0.415851, format="%.6f"),
-    "tusd_ate_150": st.sidebar.number_input("TUSD até 150 kWh", value=0.455333, format="%.6f"),
-    "tusd_acima_150": st.sidebar.number_input("TUSD acima 150 kWh", value=0.482660, format="%.6f"),
-}
-
-# COSIP: Contribuição para custeio de iluminação pública (valor fixo na fatura)
-cosip = st.sidebar.number_input("COSIP (R$)", value=61.00, format="%.2f")
-# ===================== BANDEIRA TARIFÁRIA =====================
-st.sidebar.header("🚩 Bandeira tarifária")
-bandeira_sel = st.sidebar.radio(
-    "Selecione a bandeira",
-    ["Verde", "Amarela", "Vermelha 1", "Vermelha 2"],
-    index=2,  # seleciona "Vermelha 1" como inicial
-    key="bandeira_tarifaria"
-)
-usar_bandeira_por_faixa = st.sidebar.checkbox("Usar bandeira por faixa (como na fatura)", value=True)
-
-# Valor único por bandeira (aplicado quando NÃO usamos faixa)
-bandeira_valor_unico = {
-    "Verde": 0.000000,
-    "Amarela": 0.018660,
-    "Vermelha 1": 0.044630,
-    "Vermelha 2": 0.075660,
-}[bandeira_sel]
-
-# Valores por faixa (aplicados quando usamos faixa)
-bandeira_por_faixa = {
-    "ate_150": st.sidebar.number_input("Bandeira até 150 kWh", value=0.054400, format="%.6f"),
-    "acima_150": st.sidebar.number_input("Bandeira acima 150 kWh", value=0.057660, format="%.6f"),
-}
-
-# ===================== MÉTODO DE RATEIO E FONTE DO CONSUMO =====================
-st.sidebar.header("📊 Método de rateio")
-# - Faixas individuais: calcula cada unidade como se fosse uma fatura separada
-# - Proporcional: distribui o total da fatura proporcional ao consumo de cada unidade
-metodo_rateio = st.sidebar.radio("Escolha o método:", ["Proporcional ao total da fatura", "Faixas individuais"])
-
-st.sidebar.header("📏 Fonte do consumo total")
-# - Leituras do prédio: usa o medidor principal para consumo total
-# - Soma das quitinetes: soma os consumos informados de cada unidade
-fonte_consumo = st.sidebar.radio("Definir consumo total por:", ["Leituras do prédio", "Soma das quitinetes"])
-
-# ===================== FUNÇÕES DE CÁLCULO =====================
-def calcular_valor_base(consumo_kwh: float) -> float:
-    """
-    Calcula o custo base (TE + TUSD + Bandeira) para um dado consumo em kWh.
-    Não inclui COSIP.
-    Usa o modelo de duas faixas: até 150 kWh e acima de 150 kWh.
-    """
-    c1 = min(consumo_kwh, 150.0)        # parte até 150 kWh
-    c2 = max(consumo_kwh - 150.0, 0.0)  # excedente acima de 150 kWh
+# Os valores ficam no session_state (chave "tarifa_<campo>", iniciada com os padrões
+# de Tarifas) para que a calibração por faturas possa substituí-los
+for campo in CAMPOS_TARIFA:
+    if f"tarifa_{campo}" not in st.session_state:
+        st.session_state[f"tarifa_{campo}"] = getattr(Tarifas, campo)
+# Tarifas, bandeira e método ficam em um formulário: mudar um campo não recalcula
+# a página; tudo é aplicado de uma vez em "Aplicar configurações"
+with st.sidebar.form("form_tarifas"):
+    st.header("⚙️ Tarifas Celesc (R$/kWh com tributos)")
+    # TE: Tarifa de Energia | TUSD: Tarifa de Uso do Sistema de Distribuição
+    # Usamos duas faixas: até 150 kWh e acima de 150 kWh (modelo comum de residenciais)
+    tarifas = {
+        "te_ate_150": st.number_input("TE até 150 kWh", format="%.6f", key="tarifa_te_ate_150"),
+        "te_acima_150": st.number_input("TE acima 150 kWh", format="%.6f", key="tarifa_te_acima_150"),
+        "tusd_ate_150": st.number_input("TUSD até 150 kWh", format="%.6f", key="tarifa_tusd_ate_150"),
+        "tusd_acima_150": st.number_input("TUSD acima 150 kWh", format="%.6f", key="tarifa_tusd_acima_150"),
+    }
 
-    # Calcula TE e TUSD por faixa
-    te = c1 * tarifas["te_ate_150"] + c2 * tarifas["te_acima_150"]
-    tusd = c1 * tarifas["tusd_ate_150"] + c2 * tarifas["tusd_acima_150"]
+    # COSIP: Contribuição para custeio de iluminação pública (valor fixo na fatura)
+    cosip = st.number_input("COSIP (R$)", format="%.2f", key="tarifa_cosip")
+    # ===================== BANDEIRA TARIFÁRIA =====================
+    st.header("🚩 Bandeira tarifária")
+    bandeira_sel = st.radio(
+        "Selecione a bandeira",
+        BANDEIRAS,
+        index=2,  # seleciona "Vermelha 1" como inicial
+        key="bandeira_tarifaria"
+    )
+    usar_bandeira_por_faixa = st.checkbox("Usar bandeira por faixa (como na fatura)", value=True)
 
-    # Aplica bandeira por faixa ou valor único
-    if usar_bandeira_por_faixa:
-        bandeira = c1 * bandeira_por_faixa["ate_150"] + c2 * bandeira_por_faixa["acima_150"]
-    else:
-        bandeira = consumo_kwh * bandeira_valor_unico
+    # Valores por faixa (aplicados quando usamos faixa)
+    bandeira_por_faixa = {
+        "ate_150": st.number_input("Bandeira até 150 kWh", format="%.6f", key="tarifa_bandeira_ate_150"),
+        "acima_150": st.number_input("Bandeira acima 150 kWh", format="%.6f", key="tarifa_bandeira_acima_150"),
+    }
 
-    return round(te + tusd + bandeira, 2)
-def calcular_fatura_total(consumo_total_kwh: float) -> tuple[float, float]:
-    """
-    Retorna (total_fatura, valor_base_sem_cosip).
-    - valor_base: TE + TUSD + Bandeira
-    - total_fatura: valor_base + COSIP
-    """
-    valor_base = calcular_valor_base(consumo_total_kwh)
-    total = round(valor_base + cosip, 2)
-    return total, valor_base
+    # ===================== MÉTODO DE RATEIO E FONTE DO CONSUMO =====================
+    st.header("📊 Método de rateio")
+    # - Faixas individuais: calcula cada unidade como se fosse uma fatura separada
+    # - Proporcional: distribui o total da fatura proporcional ao consumo de cada unidade
+    metodo_rateio = st.radio("Escolha o método:", METODOS_RATEIO)
+
+    st.header("📏 Fonte do consumo total")
+    # - Leituras do prédio: usa o medidor principal para consumo total
+    # - Soma das quitinetes: soma os consumos informados de cada unidade
+    fonte_consumo = st.radio("Definir consumo total por:", FONTES_CONSUMO)
+
+    st.header("⏱️ Modalidade tarifária")
+    # - Convencional: preço pelas faixas de consumo do mês (até/acima de 150 kWh)
+    # - Branca: preço pelo horário do consumo; exige a exportação de medidores com energia por intervalo
+    modalidade = st.radio("Modalidade:", MODALIDADES, key="modalidade")
+    with st.expander("Tarifa branca (R$/kWh com tributos)"):
+        tarifa_branca_valores = {
+            "te_fora_ponta": st.number_input("TE fora ponta", value=TarifaBranca.te_fora_ponta, format="%.6f"),
+            "te_intermediario": st.number_input("TE intermediário", value=TarifaBranca.te_intermediario, format="%.6f"),
+            "te_ponta": st.number_input("TE ponta", value=TarifaBranca.te_ponta, format="%.6f"),
+            "tusd_fora_ponta": st.number_input("TUSD fora ponta", value=TarifaBranca.tusd_fora_ponta, format="%.6f"),
+            "tusd_intermediario": st.number_input("TUSD intermediário", value=TarifaBranca.tusd_intermediario, format="%.6f"),
+            "tusd_ponta": st.number_input("TUSD ponta", value=TarifaBranca.tusd_ponta, format="%.6f"),
+        }
+        inicio_ponta = st.time_input(
+            "Início da ponta (3 h; intermediário 1 h antes e depois)",
+            value=datetime.strptime(TarifaBranca.inicio_ponta, "%H:%M").time(),
+        )
+
+    st.form_submit_button("✅ Aplicar configurações")
+
+# Conjunto imutável de tarifas usado pelo motor de cálculo (pacote rateio)
+tarifas_atuais = Tarifas(
+    te_ate_150=tarifas["te_ate_150"],
+    te_acima_150=tarifas["te_acima_150"],
+    tusd_ate_150=tarifas["tusd_ate_150"],
+    tusd_acima_150=tarifas["tusd_acima_150"],
+    bandeira_ate_150=bandeira_por_faixa["ate_150"],
+    bandeira_acima_150=bandeira_por_faixa["acima_150"],
+    bandeira=bandeira_sel,
+    usar_bandeira_por_faixa=usar_bandeira_por_faixa,
+    cosip=cosip,
+)
+tarifa_branca_atual = TarifaBranca(
+    **tarifa_branca_valores, bandeira=bandeira_sel, cosip=cosip, inicio_ponta=inicio_ponta.strftime("%H:%M"),
+)
 
-def adicionar_historico(nome_simulacao: str, df: pd.DataFrame, valor_total: float, consumo_total: float) -> None:
+# ===================== FUNÇÕES DE HISTÓRICO =====================
+@st.cache_resource
+def abrir_historico() -> HistoricoSQLite:
+    """Histórico em SQLite, compartilhado por todas as sessões do servidor."""
+    return HistoricoSQLite()
+
+def adicionar_historico(predio: str, nome_simulacao: str, df: pd.DataFrame, valor_total: float, consumo_total: float) -> None:
     """
-    Adiciona a simulação atual ao histórico. Cada linha do df vira uma linha no histórico,
-    com colunas extras: Identificação, Consumo Total, Valor Total.
+    Adiciona a simulação atual ao histórico do prédio, no mês corrente. Cada linha do df
+    vira uma linha no histórico, com colunas extras: Identificação, Consumo Total, Valor Total.
     """
-    linha = df.copy()
-    linha["Identificação"] = nome_simulacao
-    linha["Consumo Total"] = consumo_total
-    linha["Valor Total"] = valor_total
-    st.session_state.historico = pd.concat([st.session_state.historico, linha.reset_index()], ignore_index=True)
+    mes = datetime.now(ZoneInfo("America/Sao_Paulo")).strftime("%Y-%m")
+    abrir_historico().adicionar(predio, mes, nome_simulacao, df, valor_total, consumo_total)
+    # O cálculo também vira o mês corrente da série mensal (substitui o anterior do mesmo mês)
+    abrir_serie().adicionar_mes(predio, mes, df)
+
+@st.cache_resource
+def abrir_serie() -> SerieMensal:
+    """Série mensal por unidade, no mesmo banco do histórico."""
+    return SerieMensal()
     
 # ===================== APLICAR BACKUP =====================
 st.header("📂 Aplicar Backup")
 
 # --- Função auxiliar para buscar itens na aba Resumo ---
 def get_item_resumo(item):
-    try:
-        resumo_imp = st.session_state.import_resumo
-        ser = resumo_imp.loc[resumo_imp["Item"] == item, "Valor"]
-        return ser.values[0] if len(ser.values) else None
-    except Exception:
-        return None
+    return st.session_state.import_itens.get(item)
 
 # --- Sugere número de quitinetes com base no backup (ignora Áreas Comuns) ---
 n_sugerido = sum(1 for unidade in st.session_state.prev_map.keys() if "Áreas Comuns" not in unidade) \
@@ -199,14 +261,11 @@ if leitura_predio_ant_backup is not None:
         st.session_state["leitura_predio_ant"] = int(leitura_predio_ant_backup)
 
 # --- Leituras das quitinetes (não inclui Áreas Comuns) ---
-if st.session_state.prev_map:
+# No modo tabela as leituras do backup já vêm preenchidas na própria tabela
+if st.session_state.prev_map and st.session_state.get("modo_entrada") != "Tabela (sem limite)":
     st.markdown("🏠 Leituras e nomes sugeridos para as quitinetes:")
+    st.caption("ℹ️ Áreas Comuns não tem medidor próprio: é calculada como diferença.")
     for i, unidade in enumerate(st.session_state.prev_map.keys()):
-        if "Áreas Comuns" in unidade:
-            leitura = st.session_state.prev_map[unidade]
-            st.info(f"ℹ️ Áreas Comuns (backup): {leitura} kWh — calculada como diferença, sem medidor próprio.")
-            continue
-
         leitura = st.session_state.prev_map[unidade]
         nome_sugerido = unidade.split("-")[-1].strip() if "-" in unidade else unidade.strip()
         st.write(f"- {unidade}: {leitura} kWh (nome sugerido: {nome_sugerido})")
@@ -236,56 +295,216 @@ fonte_backup = get_item_resumo("Fonte do consumo total")
 if fonte_backup is not None:
     st.info(f"📉 Fonte do consumo sugerida: {fonte_backup}")
         
+# ===================== EXPORTAÇÃO DE MEDIDORES INTELIGENTES =====================
+# CSV de intervalos (ex.: 15 min) lido em blocos e somado por medidor e mês;
+# só os totais por medidor ficam na sessão, nunca o arquivo inteiro em DataFrame
+with st.expander("📈 Importar exportação de medidores (CSV de intervalos)", expanded=False):
+    st.caption("Colunas: medidor, data/hora e energia (kWh) e/ou leitura do registrador. "
+               "Para arquivos acima do limite de upload, use `python -m rateio.medidores`. "
+               "Na tarifa branca a energia também é somada por posto: leia de novo se mudar o horário de ponta.")
+    arquivo_medidores = st.file_uploader("Exportação dos medidores", type=["csv"], key="arquivo_medidores")
+    if arquivo_medidores is not None and st.button("Ler exportação", key="ler_medidores"):
+        try:
+            with diag.fase("medidores") as fase:
+                st.session_state.totais_medidores = agregar_intervalos(
+                    arquivo_medidores, tarifa_branca=tarifa_branca_atual if modalidade == MODALIDADES[1] else None,
+                )
+                fase.linhas = len(st.session_state.totais_medidores)
+        except ValueError as e:
+            st.error(f"Erro ao ler a exportação: {e}")
+
+    totais_medidores = st.session_state.get("totais_medidores")
+    if totais_medidores is not None and len(totais_medidores):
+        meses_medidores = meses_disponiveis(totais_medidores)
+        col_mes, col_medidor = st.columns(2)
+        mes_medidores = col_mes.selectbox("Mês", meses_medidores, index=len(meses_medidores) - 1, key="mes_medidores")
+        medidor_predio = col_medidor.selectbox(
+            "Medidor do prédio", ["(nenhum)"] + medidores_disponiveis(totais_medidores), key="medidor_predio"
+        )
+        if st.button("Aplicar leituras na tabela", key="aplicar_medidores"):
+            leituras_medidores = leituras_do_mes(
+                totais_medidores, mes_medidores,
+                None if medidor_predio == "(nenhum)" else medidor_predio,
+                st.session_state.prev_map,
+            )
+            # A tabela passa a ser a dos medidores (e não é recriada enquanto o backup não mudar)
+            st.session_state.tabela_base = leituras_medidores.tabela
+            st.session_state.tabela_origem = hash(tuple(st.session_state.prev_map.items()))
+            st.session_state.pop("tabela_leituras", None)
+            st.session_state.pop("nomes_preenchidos", None)
+            st.session_state.modo_entrada = "Tabela (sem limite)"
+            if leituras_medidores.predio_atual is not None:
+                st.session_state.leitura_predio_ant = int(round(leituras_medidores.predio_anterior))
+                st.session_state.leitura_predio_at = int(round(leituras_medidores.predio_atual))
+            # Energia por posto, usada no cálculo da tarifa branca
+            if "kwh_ponta" in totais_medidores.columns:
+                st.session_state.energia_postos, st.session_state.energia_postos_predio = energia_postos_do_mes(
+                    totais_medidores, mes_medidores, None if medidor_predio == "(nenhum)" else medidor_predio,
+                )
+            else:
+                st.session_state.pop("energia_postos", None)
+                st.session_state.pop("energia_postos_predio", None)
+            st.success(f"Leituras de {len(leituras_medidores.tabela)} medidores de {mes_medidores} aplicadas na tabela.")
+
+# ===================== CALIBRAÇÃO DAS TARIFAS POR FATURAS =====================
+# Ajusta TE+TUSD, bandeira e COSIP a faturas reais por mínimos quadrados; os resíduos
+# mostram quais faturas o modelo de duas faixas não explica
+def aplicar_calibracao(tarifas_calibradas: Tarifas) -> None:
+    """Callback: roda antes do próximo rerun, quando ainda é permitido mudar os campos da barra lateral."""
+    for campo in CAMPOS_TARIFA:
+        st.session_state[f"tarifa_{campo}"] = float(getattr(tarifas_calibradas, campo))
+
+with st.expander("🧾 Calibrar tarifas com faturas anteriores", expanded=False):
+    st.caption("Tabela .csv/.xlsx com uma fatura por linha: Consumo (kWh), Bandeira e Total (R$) "
+               "(opcional: COSIP (R$)). A divisão TE/TUSD segue a proporção das tarifas atuais.")
+    arquivo_faturas = st.file_uploader("Faturas", type=["csv", "xlsx"], key="arquivo_faturas")
+    if arquivo_faturas is not None and st.button("Calibrar", key="calibrar"):
+        try:
+            with diag.fase("calibracao") as fase:
+                st.session_state.calibracao = calibrar_tarifas(ler_faturas(arquivo_faturas), tarifas_atuais)
+                fase.linhas = len(st.session_state.calibracao.residuos)
+        except ValueError as e:
+            st.error(f"Erro ao ler as faturas: {e}")
+
+    calibracao = st.session_state.get("calibracao")
+    if calibracao is not None:
+        residuos = calibracao.residuos
+        fora = residuos[residuos["Fora da tolerância"]]
+        st.write(f"RMSE: R$ {calibracao.rmse:.4f} — {len(fora)} de {len(residuos)} faturas fora da tolerância.")
+        for msg in calibracao.alertas:
+            st.warning(msg)
+        col_parametros, col_bandeiras = st.columns(2)
+        col_parametros.dataframe(calibracao.parametros.style.format("{:.6f}"))
+        col_bandeiras.dataframe(calibracao.bandeiras.style.format("{:.6f}"))
+        so_fora = st.checkbox("Mostrar só as faturas fora da tolerância", value=True, key="so_fora_tolerancia")
+        st.dataframe(fora if so_fora else residuos, hide_index=True)
+        st.button(
+            f"Aplicar tarifas calibradas (bandeira {calibracao.tarifas.bandeira})", key="aplicar_calibracao",
+            on_click=aplicar_calibracao, args=(calibracao.tarifas,),
+        )
+
 # ===================== INTERFACE PRINCIPAL =====================
-# Leituras do prédio (medidor principal)
-st.header("🔢 Leituras do prédio")
-col1, col2 = st.columns(2)
-with col1:
-    leitura_predio_ant = st.number_input(
-    "Leitura anterior do prédio (kWh)",
-    min_value=0,
-    step=1,
-    value=st.session_state.get("leitura_predio_ant", 0)
-)
-with col2:
-    leitura_predio_at = st.number_input("Leitura atual do prédio (kWh)", min_value=0, step=1)
-
-# Identificação da simulação com data/hora local de Blumenau
-hora_local = datetime.now(ZoneInfo("America/Sao_Paulo"))
-nome_simulacao = st.text_input("Identificação da simulação", value=hora_local.strftime("%d/%m/%Y %H:%M"))
-
-# Leituras das quitinetes (cada unidade)
-st.header("🏠 Leituras das quitinetes")
-n = st.slider("Número de quitinetes", 1, 10, value=st.session_state.get("n_sugerido", 1))
-consumos_individuais = []
-nomes_inquilinos = []
-
-for i in range(n):
-    with st.expander(f"Quitinete {i+1}", expanded=True):
-        nome = st.text_input(f"Nome do inquilino Q{i+1}", key=f"nome_{i}")
-        nome_final = nome.strip() if nome.strip() else f"Q{i+1}"
-        nomes_inquilinos.append(nome_final)
-
-        c1col, c2col = st.columns(2)
-        with c1col:
-            # Preenchimento automático a partir do backup importado
-            leitura_ant_default = 0
-            try:
-                if st.session_state.prev_map and nome_final in st.session_state.prev_map:
-                    leitura_ant_default = int(float(st.session_state.prev_map[nome_final]))
-            except (ValueError, TypeError, KeyError):
+# Modo de entrada e número de quitinetes mudam o layout, então ficam fora do formulário
+# - Por unidade: um bloco com nome e leituras para cada quitinete (até 10)
+# - Tabela: uma única tabela editável, sem limite de unidades, que aceita colar dados de planilhas
+modo_entrada = st.radio("Modo de entrada das leituras", MODOS_ENTRADA, horizontal=True, key="modo_entrada")
+if modo_entrada == "Tabela (sem limite)":
+    n = 0
+    # Recria a tabela base só quando o backup importado muda, para não perder edições
+    # (guarda só o hash, não uma segunda cópia do prev_map)
+    origem_tabela = hash(tuple(st.session_state.prev_map.items()))
+    if st.session_state.get("tabela_origem") != origem_tabela:
+        st.session_state.tabela_base = tabela_inicial(st.session_state.prev_map, st.session_state.get("n_sugerido", 1))
+        st.session_state.tabela_origem = origem_tabela
+        st.session_state.pop("nomes_preenchidos", None)
+else:
+    n = st.slider("Número de quitinetes", 1, 10, value=min(st.session_state.get("n_sugerido", 1), 10))
+
+# Todas as leituras ficam em um formulário: digitar não recalcula a página;
+# os valores são enviados juntos ao clicar em "Calcular" ou "Comparar cenários"
+with st.form("form_leituras"):
+    # Leituras do prédio (medidor principal)
+    st.header("🔢 Leituras do prédio")
+    col1, col2 = st.columns(2)
+    with col1:
+        leitura_predio_ant = st.number_input(
+        "Leitura anterior do prédio (kWh)",
+        min_value=0,
+        step=1,
+        value=st.session_state.get("leitura_predio_ant", 0)
+    )
+    with col2:
+        leitura_predio_at = st.number_input(
+            "Leitura atual do prédio (kWh)", min_value=0, step=1, value=st.session_state.get("leitura_predio_at", 0)
+        )
+
+    # Identificação da simulação com data/hora local de Blumenau
+    hora_local = datetime.now(ZoneInfo("America/Sao_Paulo"))
+    nome_simulacao = st.text_input("Identificação da simulação", value=hora_local.strftime("%d/%m/%Y %H:%M"))
+    # Nome do prédio: separa o histórico de cada prédio no banco
+    predio = st.text_input("Prédio", value="Prédio", key="predio").strip() or "Prédio"
+
+    # Leituras das quitinetes (cada unidade)
+    st.header("🏠 Leituras das quitinetes")
+    tabela_editada = None
+    if modo_entrada == "Tabela (sem limite)":
+        st.caption("Cole leituras de uma planilha (Ctrl+V) ou edite várias células de uma vez. "
+                   "Leituras anteriores vazias são preenchidas pelo backup, pelo nome do inquilino.")
+        tabela_editada = st.data_editor(
+            st.session_state.tabela_base,
+            num_rows="dynamic",
+            hide_index=True,
+            key="tabela_leituras",
+            column_config={
+                COLUNA_NOME: st.column_config.TextColumn("Nome do inquilino"),
+                COLUNA_ANTERIOR: st.column_config.NumberColumn(min_value=0, step=1),
+                COLUNA_ATUAL: st.column_config.NumberColumn(min_value=0, step=1),
+            },
+        )
+
+    consumos_individuais = []
+    nomes_inquilinos = []
+    leituras_atuais = []
+
+    for i in range(n):
+        with st.expander(f"Quitinete {i+1}", expanded=True):
+            nome = st.text_input(f"Nome do inquilino Q{i+1}", key=f"nome_{i}")
+            nome_final = nome.strip() if nome.strip() else f"Q{i+1}"
+            nomes_inquilinos.append(nome_final)
+
+            c1col, c2col = st.columns(2)
+            with c1col:
+                # Preenchimento automático a partir do backup importado
                 leitura_ant_default = 0
+                try:
+                    if st.session_state.prev_map and nome_final in st.session_state.prev_map:
+                        leitura_ant_default = int(float(st.session_state.prev_map[nome_final]))
+                except (ValueError, TypeError, KeyError):
+                    leitura_ant_default = 0
+
+                ant = st.number_input("Leitura anterior (kWh)", min_value=0, step=1, value=leitura_ant_default, key=f"ant_{i}")
+
+            with c2col:
+                at = st.number_input("Leitura atual (kWh)", min_value=0, step=1, value=0, key=f"at_{i}")
+
+            consumo = max(at - ant, 0)  # nunca deixa negativo
+            consumos_individuais.append(float(consumo))
+            leituras_atuais.append(at)
+
+    col_calcular, col_comparar = st.columns(2)
+    with col_calcular:
+        calcular = st.form_submit_button("Calcular")
+    with col_comparar:
+        comparar = st.form_submit_button("🔀 Comparar cenários")
+
+# Leituras das quitinetes prontas para o cálculo (mesma estrutura nos dois modos)
+if tabela_editada is not None:
+    # Completa pelo backup só as linhas com nome novo desde que a tabela base foi criada;
+    # uma leitura anterior apagada de propósito não é preenchida de novo a cada execução
+    nomes_preenchidos = st.session_state.get("nomes_preenchidos", frozenset())
+    tabela_editada = preencher_anteriores(tabela_editada, st.session_state.prev_map, nomes_preenchidos)
+    st.session_state.nomes_preenchidos = nomes_preenchidos | frozenset(nomes_da_tabela(tabela_editada))
+    leituras = ler_tabela(tabela_editada)
+else:
+    leituras = LeiturasUnidades(
+        [f"Quitinete {i+1} - {nomes_inquilinos[i]}" for i in range(n)],
+        nomes_inquilinos,
+        np.array(consumos_individuais),
+        np.array(leituras_atuais),
+    )
 
-            ant = st.number_input("Leitura anterior (kWh)", min_value=0, step=1, value=leitura_ant_default, key=f"ant_{i}")
-
-        with c2col:
-            at = st.number_input("Leitura atual (kWh)", min_value=0, step=1, value=0, key=f"at_{i}")
-
-        consumo = max(at - ant, 0)  # nunca deixa negativo
-        consumos_individuais.append(float(consumo))
+# Na tarifa branca cada quitinete precisa da energia por posto (exportação de medidores)
+energia_postos = st.session_state.get("energia_postos")
+if calcular and modalidade == MODALIDADES[1]:
+    if energia_postos is None:
+        st.error("A tarifa branca precisa da exportação de medidores lida nessa modalidade e aplicada na tabela.")
+        calcular = False
+    elif sem_medicao := [nome for nome in leituras.nomes if nome not in energia_postos.index]:
+        st.error(f"Sem energia por posto para: {', '.join(sem_medicao[:10])}" + (" ..." if len(sem_medicao) > 10 else ""))
+        calcular = False
 
 # ===================== CÁLCULO (AO CLICAR) =====================
-if st.button("Calcular"):
+if calcular:
     # 🔧 Salva leituras do prédio no session_state
     st.session_state["leitura_predio_ant"] = leitura_predio_ant
     st.session_state["leitura_predio_at"] = leitura_predio_at
@@ -294,52 +513,34 @@ if st.button("Calcular"):
     if fonte_consumo == "Leituras do prédio":
         consumo_total = float(max(leitura_predio_at - leitura_predio_ant, 0))
     else:
-        consumo_total = float(sum(consumos_individuais))
-
-    # Valor total da fatura e base (sem COSIP)
-    valor_total, valor_base = calcular_fatura_total(consumo_total)
-
-    # Calcula valores por unidade conforme método
-    if metodo_rateio == "Faixas individuais":
-        # Cada unidade calcula como se fosse uma fatura própria
-        valores_individuais = [calcular_valor_base(c) for c in consumos_individuais]
-    else:
-        # Proporcional ao total da fatura (protege contra divisão por zero)
-        valores_individuais = [
-            round((c / consumo_total) * valor_total, 2) if consumo_total > 0 else 0.0
-            for c in consumos_individuais
-        ]
-
-    # Monta DataFrame principal com resultados por unidade
-    df = pd.DataFrame(
-        {"Consumo (kWh)": consumos_individuais, "Valor (R$)": valores_individuais},
-        index=[f"Quitinete {i+1} - {nomes_inquilinos[i]}" for i in range(n)]
-    )
-
-    # Calcula Áreas Comuns (diferença entre total e soma das unidades)
-    soma_consumo_individual = float(sum(consumos_individuais))
-    soma_valores_individuais = float(sum(valores_individuais))
-    consumo_areas_comuns = round(consumo_total - soma_consumo_individual, 2)
-    valor_areas_comuns = round(valor_total - soma_valores_individuais, 2)
-
-    # Normaliza ruídos de arredondamento muito pequenos
-    if abs(consumo_areas_comuns) < 0.01:
-        consumo_areas_comuns = 0.0
-    if abs(valor_areas_comuns) < 0.01:
-        valor_areas_comuns = 0.0
-
-    # Lista de alertas (avisos) para inconsistências
-    alertas = []
-    if consumo_areas_comuns < 0:
-        alertas.append("Consumo das quitinetes excede o consumo total do prédio. Ajustei Áreas Comuns para 0 kWh.")
-        consumo_areas_comuns = 0.0
-    if valor_areas_comuns < 0:
-        alertas.append("Soma dos valores individuais excede o total da fatura. Ajustei Áreas Comuns para R$ 0,00.")
-        valor_areas_comuns = 0.0
-
-    # Adiciona linha de Áreas Comuns se houver valor/consumo relevante
-    if (consumo_areas_comuns != 0.0) or (valor_areas_comuns != 0.0):
-        df.loc["Áreas Comuns"] = [consumo_areas_comuns, valor_areas_comuns]
+        consumo_total = None  # soma das quitinetes
+
+    # Calcula fatura, valores por unidade e Áreas Comuns no motor vetorizado
+    with diag.fase("calcular", linhas=len(leituras.consumos)) as fase:
+        if modalidade == MODALIDADES[1]:
+            # Consumos vêm da energia por posto de cada medidor (não das leituras da tabela)
+            resultado = calcular_rateio_branca(
+                leituras.unidades,
+                energia_postos.loc[leituras.nomes].to_numpy(),
+                tarifa_branca_atual,
+                metodo_rateio,
+                st.session_state.get("energia_postos_predio") if fonte_consumo == "Leituras do prédio" else None,
+            )
+        else:
+            incremental = st.session_state.rateio_incremental
+            resultado = incremental.calcular(
+                leituras.unidades,
+                leituras.consumos,
+                tarifas_atuais,
+                metodo_rateio,
+                consumo_total,
+            )
+            fase.linhas = incremental.recalculadas
+    df = resultado.df
+    consumo_total = resultado.consumo_total
+    valor_base = resultado.valor_base
+    valor_total = resultado.valor_total
+    alertas = resultado.alertas
 
     # Mensagens de status
     st.success(f"Consumo total do prédio: {consumo_total} kWh")
@@ -349,166 +550,269 @@ if st.button("Calcular"):
         st.warning(msg)
 
     # -----------------------------
-    # 🔧 Salva resultados no session_state
+    # 🔧 Salva resultados no armazém da sessão
     # -----------------------------
-    st.session_state.df_resultado = df
+    armazem.guardar("df_resultado", df)
+    armazem.guardar("leituras_resultado", leituras.leituras_atuais)
     st.session_state.alertas_resultado = alertas
 
-    # Converte resumo_resultado (dict) em DataFrame para exportação
-    resumo_dict = {
-        "Identificação": nome_simulacao,
-        "Consumo total (kWh)": consumo_total,
-        "Valor base (R$)": valor_base,
-        "COSIP (R$)": cosip,
-        "Total fatura (R$)": valor_total,
-        "Bandeira por faixa": "Sim" if usar_bandeira_por_faixa else "Não",
-        "Método de rateio": metodo_rateio,
-        "Fonte do consumo total": fonte_consumo,
-        "Leitura do prédio (kWh)": st.session_state["leitura_predio_at"]
-    }
-    df_resumo = pd.DataFrame(list(resumo_dict.items()), columns=["Item", "Valor"])
-    st.session_state.df_resumo = df_resumo
-
-    # Adiciona ao histórico (cada unidade + possíveis Áreas Comuns)
-    adicionar_historico(nome_simulacao, df, valor_total, consumo_total)
-
-    # Converte histórico acumulado em DataFrame para exportação
-    st.session_state.df_historico = st.session_state.historico.copy()
-# ===================== EXIBIÇÃO PERSISTENTE DE RESULTADOS =====================
-# Mostra tabela, gráfico e botão de exportar mesmo após outras interações
-if st.session_state.df_resultado is not None:
-    st.subheader("📊 Rateio detalhado")
-    st.dataframe(st.session_state.df_resultado.style.format({"Valor (R$)": "R${:,.2f}"}))
-
-    st.subheader("📈 Consumo por unidade")
-    df_plot = st.session_state.df_resultado.reset_index().rename(columns={"index": "Unidade"})
-    fig = px.bar(
-        df_plot, x="Unidade", y="Consumo (kWh)",
-        text="Consumo (kWh)", color="Unidade",
-        labels={"Unidade": "Unidade", "Consumo (kWh)": "Consumo (kWh)"}
+    # Monta a aba Resumo para exportação
+    df_resumo = montar_resumo(
+        nome_simulacao, resultado, tarifas_atuais, metodo_rateio, fonte_consumo,
+        st.session_state["leitura_predio_at"],
     )
-    fig.update_traces(textposition="outside")
-    st.plotly_chart(fig, use_container_width=True)
-
-    for msg in st.session_state.alertas_resultado:
-        st.warning(msg)
-import io
-import pandas as pd
-from openpyxl.utils import get_column_letter
-
-# Cria buffer de memória para gerar o arquivo Excel em tempo real
-buffer = io.BytesIO()
-wrote_any_sheet = False  # Flag para saber se alguma aba foi escrita
-
-# Cria o writer para o Excel
-from datetime import datetime
-from zoneinfo import ZoneInfo
-from openpyxl.utils import get_column_letter
-
-with pd.ExcelWriter(buffer, engine="openpyxl") as writer:
-    try:
-        wrote_any_sheet = False
-
-        # --- Aba Rateio ---
-        df_export = st.session_state.df_resultado.copy()
-        df_export.index.name = "Unidade"
-
-        # Adiciona coluna de leitura atual (apenas para quitinetes)
-        df_export["Leitura atual (kWh)"] = 0
-        for i, unidade in enumerate(df_export.index):
-            if isinstance(unidade, str) and unidade.startswith("Quitinete"):
-                leitura_atual = st.session_state.get(f"at_{i}", 0)
-                df_export.loc[unidade, "Leitura atual (kWh)"] = leitura_atual
-
-        df_export.to_excel(writer, sheet_name="Rateio", index=True)
-        wrote_any_sheet = True
-
-        # Ajusta largura das colunas da aba Rateio
-        ws = writer.sheets["Rateio"]
-        for col_cells in ws.iter_cols(min_row=1, max_row=ws.max_row,
-                                      min_col=1, max_col=ws.max_column):
-            max_length = 0
-            col_letter = get_column_letter(col_cells[0].column)
-            for cell in col_cells:
-                if cell.value is not None:
-                    max_length = max(max_length, len(str(cell.value)))
-            ws.column_dimensions[col_letter].width = max_length + 2
-
-        # --- Aba Resumo ---
-        if hasattr(st.session_state, "df_resumo"):
-            df_resumo = st.session_state.df_resumo.copy()
-            df_resumo.to_excel(writer, sheet_name="Resumo", index=False)
-            wrote_any_sheet = True
-
-            ws = writer.sheets["Resumo"]
-            for col_cells in ws.iter_cols(min_row=1, max_row=ws.max_row,
-                                          min_col=1, max_col=ws.max_column):
-                max_length = 0
-                col_letter = get_column_letter(col_cells[0].column)
-                for cell in col_cells:
-                    if cell.value is not None:
-                        max_length = max(max_length, len(str(cell.value)))
-                ws.column_dimensions[col_letter].width = max_length + 2
-
-        # --- Aba Histórico ---
-        if hasattr(st.session_state, "df_historico"):
-            df_historico = st.session_state.df_historico.copy()
-            df_historico.to_excel(writer, sheet_name="Histórico", index=False)
-            wrote_any_sheet = True
-
-            ws = writer.sheets["Histórico"]
-            for col_cells in ws.iter_cols(min_row=1, max_row=ws.max_row,
-                                          min_col=1, max_col=ws.max_column):
-                max_length = 0
-                col_letter = get_column_letter(col_cells[0].column)
-                for cell in col_cells:
-                    if cell.value is not None:
-                        max_length = max(max_length, len(str(cell.value)))
-                ws.column_dimensions[col_letter].width = max_length + 2
-
-        # Se nenhuma aba foi escrita, cria uma aba padrão
-        if not wrote_any_sheet:
-            pd.DataFrame({'Mensagem': ['Nenhum dado disponível']}).to_excel(writer, sheet_name='Vazio')
-
-    except Exception as e:
-        pd.DataFrame({'Erro': [str(e)]}).to_excel(writer, sheet_name='Erro')
-
-# Finaliza e prepara buffer para download
-buffer.seek(0)
-
-# Obtém hora local segura
-hora_local = datetime.now(ZoneInfo("America/Sao_Paulo"))
+    armazem.guardar("df_resumo", df_resumo)
+    # Tarifas usadas, para a composição dos demonstrativos (a tarifa branca não tem faixas)
+    st.session_state.tarifas_resultado = tarifas_atuais if modalidade == MODALIDADES[0] else None
+
+    # Adiciona ao histórico (cada unidade + possíveis Áreas Comuns); clicar de novo
+    # sem mudar nada não grava outra cópia da mesma simulação
+    gravacao = (predio, nome_simulacao, hash_dataframes(df), valor_total, consumo_total)
+    if st.session_state.get("ultima_gravacao") != gravacao:
+        with diag.fase("historico_gravar", linhas=len(df)):
+            adicionar_historico(predio, nome_simulacao, df, valor_total, consumo_total)
+        st.session_state.ultima_gravacao = gravacao
+
+# ===================== COMPARAÇÃO DE CENÁRIOS (AO CLICAR) =====================
+# Todas as combinações de bandeira, bandeira por faixa, método e fonte em um único cálculo
+if comparar:
+    comparacao = comparar_cenarios(
+        leituras.unidades,
+        leituras.consumos,
+        tarifas_atuais,
+        float(max(leitura_predio_at - leitura_predio_ant, 0)),
+        (bandeira_sel, usar_bandeira_por_faixa, metodo_rateio, fonte_consumo),
+    )
+    st.subheader("🔀 Valores por cenário (R$)")
+    st.dataframe(comparacao.valores.style.format("{:,.2f}"))
+    st.subheader("Δ em relação à configuração atual (R$)")
+    st.dataframe(comparacao.deltas.style.format("{:+,.2f}"))
 
-# Tenta obter identificação do resumo
-resumo = st.session_state.get("resumo_resultado", {})
-identificacao = resumo.get("Identificação") if isinstance(resumo, dict) else None
+# ===================== EXPORTAÇÃO PARA EXCEL =====================
+def gerar_download(df_resultado, leituras_atuais, df_resumo, predio, diag) -> bytes:
+    """
+    Gera (ou reaproveita do cache) o Excel com as abas Rateio, Resumo e Histórico.
+    Só roda quando o usuário clica em baixar, numa thread separada do script;
+    o histórico do prédio é lido do banco nesse momento.
+    """
+    with diag.fase("exportacao") as fase:
+        df_historico = abrir_historico().ler(predio)
+        fase.linhas = len(df_resultado) + len(df_historico)
+        return relatorio_excel_em_cache(montar_aba_rateio(df_resultado, leituras_atuais), df_resumo, df_historico)
 
-# Se não for string válida, usa data/hora como fallback
-if not isinstance(identificacao, str) or not identificacao.strip():
-    identificacao = hora_local.strftime("%d-%m-%Y_%H-%M-%S")
+def gerar_demonstrativos(df_resultado, df_resumo, tarifas, divisao, predio, diag) -> io.RawIOBase:
+    """
+    ZIP com o demonstrativo de cada inquilino, renderizados em paralelo só no clique.
+    O ZIP é gravado num arquivo temporário (sem buffer: o Streamlit aceita io.RawIOBase)
+    e lido uma única vez pelo Streamlit; assim só a cópia servida no download fica em memória.
+    O arquivo some quando o Streamlit o descarta.
+    """
+    with diag.fase("demonstrativos", linhas=len(df_resultado)):
+        arquivo = tempfile.TemporaryFile(buffering=0)
+        try:
+            gerar_zip_demonstrativos(df_resultado, df_resumo, arquivo, tarifas, divisao, predio=predio)
+        except BaseException:
+            arquivo.close()
+            raise
+        return arquivo
 
-# Sanitiza nome para evitar caracteres inválidos
-nome_arquivo = f"rateio_{identificacao.replace('/', '-').replace(':', '-')}.xlsx"
+# ===================== EXIBIÇÃO PERSISTENTE DE RESULTADOS =====================
+# Mostra tabela, gráfico e botão de exportar mesmo após outras interações.
+# É um fragmento: interagir aqui (ex.: baixar) reexecuta só esta seção, não a página toda
+@st.fragment
+@medir_fase("resultados")
+def secao_resultados(predio: str) -> int | None:
+    armazem = st.session_state.armazem
+    df_resultado = armazem.obter("df_resultado")
+    if df_resultado is not None:
+        st.subheader("📊 Rateio detalhado")
+        st.dataframe(df_resultado.style.format({"Valor (R$)": "R${:,.2f}"}))
+
+        st.subheader("📈 Consumo por unidade")
+        # Um único trace; com muitas unidades, mostra as N maiores e soma o resto
+        n_unidades = len(df_resultado)
+        col_top, col_ordem, col_modo = st.columns(3)
+        with col_top:
+            top_n = st.number_input(
+                "Mostrar as N maiores (0 = todas)", min_value=0, max_value=n_unidades,
+                value=0 if n_unidades <= 30 else 30, step=1,
+            )
+        with col_ordem:
+            ordenacao = st.selectbox("Ordenar por", ORDENACOES)
+        with col_modo:
+            modo_grafico = st.selectbox("Tipo de gráfico", MODOS_GRAFICO)
+        fig = figura_em_cache(df_resultado, top_n, ordenacao, modo_grafico)
+        st.plotly_chart(fig, width="stretch")
+
+        for msg in st.session_state.alertas_resultado:
+            st.warning(msg)
+
+        # O relatório só existe depois de um cálculo
+        # Obtém hora local segura
+        hora_local = datetime.now(ZoneInfo("America/Sao_Paulo"))
+
+        # Tenta obter identificação do resumo
+        resumo = st.session_state.get("resumo_resultado", {})
+        identificacao = resumo.get("Identificação") if isinstance(resumo, dict) else None
+
+        # Se não for string válida, usa data/hora como fallback
+        if not isinstance(identificacao, str) or not identificacao.strip():
+            identificacao = hora_local.strftime("%d-%m-%Y_%H-%M-%S")
+
+        # Sanitiza nome para evitar caracteres inválidos
+        nome_arquivo = f"rateio_{identificacao.replace('/', '-').replace(':', '-')}.xlsx"
+
+        # Captura os dados agora: o callable roda fora do script e não deve ler o session_state
+        dados_download = partial(
+            gerar_download,
+            df_resultado,
+            armazem.obter("leituras_resultado", []),
+            armazem.obter("df_resumo"),
+            predio,
+            st.session_state.diagnostico,
+        )
+
+        # Botão de download (o Excel é gerado apenas no clique)
+        st.download_button(
+            label="📥 Baixar relatório em Excel",
+            data=dados_download,
+            file_name=nome_arquivo,
+            mime=MIME_XLSX,
+            on_click="ignore",
+        )
+
+        # Demonstrativos individuais: um .xlsx por inquilino, com a parte de Áreas Comuns
+        col_divisao, col_zip = st.columns(2)
+        with col_divisao:
+            divisao = st.selectbox("Divisão de Áreas Comuns nos demonstrativos", DIVISOES_AREAS_COMUNS)
+        with col_zip:
+            st.download_button(
+                label="📄 Baixar demonstrativos por inquilino (ZIP)",
+                data=partial(
+                    gerar_demonstrativos,
+                    df_resultado,
+                    armazem.obter("df_resumo"),
+                    st.session_state.get("tarifas_resultado"),
+                    divisao,
+                    predio,
+                    st.session_state.diagnostico,
+                ),
+                file_name=nome_arquivo.replace("rateio_", "demonstrativos_").replace(".xlsx", ".zip"),
+                mime=MIME_ZIP,
+                on_click="ignore",
+            )
+        return len(df_resultado)
+
+secao_resultados(predio)
 
-# Botão de download
-st.download_button(
-    label="📥 Baixar relatório em Excel",
-    data=buffer,
-    file_name=nome_arquivo,
-    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-)
 # ===================== ABA HISTÓRICO (SIMPLIFICADA) =====================
-st.header("📅 Histórico de Rateios")
-if not st.session_state.historico.empty:
-    st.dataframe(st.session_state.historico)
-
-    st.divider()
-    # Botão para zerar todo o histórico e começar do zero
-    if st.button("🧹 Iniciar novo histórico"):
-        st.session_state.historico = pd.DataFrame()
-        st.success("Histórico apagado com sucesso. Pronto para uma nova simulação.")
-else:
+# Fragmento: trocar de página lê só a nova janela do banco, sem reexecutar o app
+@st.fragment
+@medir_fase("historico")
+def secao_historico(predio: str) -> int | None:
+    st.header("📅 Histórico de Rateios")
+    historico = abrir_historico()
+    total_linhas = historico.contar(predio)
+    if total_linhas:
+        # Mostra o histórico em páginas, lidas do banco sob demanda
+        col_pag, col_tam = st.columns(2)
+        with col_tam:
+            tamanho_pagina = st.selectbox("Linhas por página", [25, 50, 100, 500], index=1)
+        n_paginas = max((total_linhas + tamanho_pagina - 1) // tamanho_pagina, 1)
+        with col_pag:
+            pagina = st.number_input(f"Página (de {n_paginas})", min_value=1, max_value=n_paginas, value=n_paginas, step=1)
+        st.caption(f"{total_linhas} registros de {predio}")
+        pagina_historico = historico.pagina(predio, pagina, tamanho_pagina)
+        st.dataframe(pagina_historico)
+
+        st.divider()
+        # Botão para zerar todo o histórico do prédio e começar do zero. O banco é
+        # compartilhado pelo servidor: apagar vale para todos que usam o mesmo prédio
+        confirmar = st.checkbox(f"Apagar o histórico de {predio} para todos os usuários deste servidor")
+        if st.button("🧹 Iniciar novo histórico", disabled=not confirmar):
+            historico.limpar(predio)
+            st.session_state.pop("ultima_gravacao", None)  # o próximo cálculo volta a ser gravado
+            st.success("Histórico apagado com sucesso. Pronto para uma nova simulação.")
+        return len(pagina_historico)
     st.info("Nenhum registro no histórico ainda. Faça um cálculo para começar.")
+    return 0
+
+secao_historico(predio)
+
+# ===================== SÉRIE MENSAL (VÁRIOS MESES) =====================
+# Fragmento: carregar backups e trocar de unidade não reexecutam o app
+@st.fragment
+@medir_fase("serie_mensal")
+def secao_serie_mensal(predio: str) -> int | None:
+    st.header("📈 Série mensal por unidade")
+    serie = abrir_serie()
+
+    with st.expander("Carregar backups de vários meses", expanded=False):
+        arquivos = st.file_uploader(
+            "Planilhas de backup (uma por mês)", type=["xlsx"], accept_multiple_files=True, key="backups_serie"
+        )
+        if arquivos:
+            # Mês deduzido do nome do arquivo ou da Identificação do Resumo; pode ser corrigido na tabela
+            backups = [importar_backup_em_cache(arq.getvalue()) for arq in arquivos]
+            meses_arquivos = pd.DataFrame({
+                "Arquivo": [arq.name for arq in arquivos],
+                "Mês (AAAA-MM)": [mes_do_texto(arq.name, b.itens.get("Identificação")) for arq, b in zip(arquivos, backups)],
+            })
+            meses_arquivos = st.data_editor(meses_arquivos, disabled=["Arquivo"], hide_index=True, key="meses_serie")
+            if st.button("Carregar na série"):
+                validos = meses_arquivos["Mês (AAAA-MM)"].fillna("").astype(str).str.fullmatch(r"\d{4}-\d{2}")
+                # Em ordem de mês, cada carga só recalcula o próprio mês
+                for i, mes in meses_arquivos.loc[validos, "Mês (AAAA-MM)"].sort_values().items():
+                    serie.adicionar_mes(predio, mes, backups[i].rateio.set_index("Unidade"))
+                if not validos.all():
+                    st.warning("Arquivos sem mês no formato AAAA-MM foram ignorados.")
+                st.success(f"{int(validos.sum())} mês(es) carregado(s) na série de {predio}.")
+
+    meses = serie.meses(predio)
+    if not meses:
+        st.info("Nenhum mês na série ainda. Carregue backups acima ou faça um cálculo.")
+        return 0
+
+    st.caption(f"{len(meses)} mês(es) de {predio}: {meses[0]} a {meses[-1]}")
+    alertas = serie.ler(predio, mes_inicio=meses[-1], so_anomalias=True)
+    if alertas.empty:
+        st.success(f"Nenhuma anomalia em {meses[-1]}.")
+    else:
+        st.warning(f"{len(alertas)} unidade(s) com consumo fora do padrão em {meses[-1]}.")
+        st.dataframe(alertas, hide_index=True)
+
+    consumo = serie.tabela_consumo(predio)
+    unidade = st.selectbox("Unidade", consumo.index.tolist(), key="unidade_serie")
+    linhas_unidade = serie.ler(predio, unidade=unidade).set_index("Mês")
+    st.line_chart(linhas_unidade[["Consumo (kWh)", f"Média {JANELA_SERIE} meses (kWh)"]])
+    st.dataframe(linhas_unidade)
+
+    with st.expander("Consumo de todas as unidades por mês (kWh)", expanded=False):
+        st.dataframe(consumo)
+    return consumo.size
+
+secao_serie_mensal(predio)
+
+# ===================== PAINEL DE DIAGNÓSTICO (OCULTO) =====================
+if diag.ativo:
+    with st.expander("🩺 Diagnóstico (tempo e memória por seção)", expanded=False):
+        memoria = (
+            "Pico de memória medido com tracemalloc (inclui alocações de outras sessões no mesmo intervalo)."
+            if diag.medir_memoria else "Pico de memória só com RATEIO_DIAGNOSTICO=1 no servidor."
+        )
+        st.caption(f"Sessão {diag.sessao}, execução {diag.execucao}. {memoria} A exportação aparece após o download.")
+        carregados = modulos_carregados()
+        st.caption(
+            f"Importações do script nesta execução: {_tempo_importacoes * 1e3:.1f} ms. "
+            "Bibliotecas sob demanda já carregadas: "
+            + ", ".join(f"{modulo} {'✅' if ok else '—'}" for modulo, ok in carregados.items())
+        )
+        st.caption(
+            f"Armazém da sessão: {armazem.uso_bytes / 2**20:.2f} MB em memória "
+            f"(orçamento {armazem.orcamento_bytes / 2**20:.0f} MB); em disco: {', '.join(armazem.chaves_em_disco) or 'nada'}."
+        )
+        st.dataframe(diag.resumo_por_fase())
+        st.dataframe(diag.tabela(), hide_index=True)
 
 # -------------------------------
 # EXPLICAÇÕES DISCRETAS (FIM DA PÁGINA)
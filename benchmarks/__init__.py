@@ -0,0 +1,16 @@
+"""
+Benchmarks dos caminhos mais pesados do rateio: cálculo, importação do backup,
+histórico, exportação para Excel, montagem do gráfico e inicialização de um
+processo novo (importações do app, com e sem as bibliotecas carregadas sob demanda).
+
+Uso (na raiz do repositório):
+    python -m benchmarks                      # todos os tamanhos
+    python -m benchmarks --rapido             # só até 10 mil unidades
+    python -m benchmarks --comparar           # compara com a última execução salva
+    python -m benchmarks --filtro exportacao  # só os casos cujo nome contém "exportacao"
+
+Cada execução é acrescentada (uma linha JSON por caso) em benchmarks/resultados.jsonl
+(fora do git; outro arquivo com --saida ou RATEIO_BENCHMARKS_SAIDA), com data, commit
+do git e máquina, para comparar execuções ao longo do tempo. Os bancos temporários
+dos casos de histórico são apagados depois de cada medição.
+"""
@@ -0,0 +1,143 @@
+"""Executa os benchmarks: `python -m benchmarks --help`."""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+from .casos import CASOS, limpar_temporarios
+
+# Fora do controle de versão (.gitignore); use --saida ou RATEIO_BENCHMARKS_SAIDA para outro arquivo
+SAIDA_PADRAO = Path(os.environ.get("RATEIO_BENCHMARKS_SAIDA", Path(__file__).with_name("resultados.jsonl")))
+TAMANHO_MAX_RAPIDO = 10_000
+AMOSTRA_MIN_S = 0.05      # cada amostra repete a chamada até somar pelo menos isso
+
+
+def _commit_atual() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=Path(__file__).parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def medir(executar, estado, repeticoes: int) -> tuple[float, float, int]:
+    """
+    Mede executar(estado) ao estilo do timeit: a primeira chamada aquece e define
+    quantas chamadas formam uma amostra. Retorna (mínimo, mediana, chamadas por amostra), em s/chamada.
+    """
+    inicio = time.perf_counter()
+    executar(estado)
+    primeira = time.perf_counter() - inicio
+    chamadas = max(1, int(AMOSTRA_MIN_S / primeira)) if primeira > 0 else 1000
+    amostras = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        for _ in range(chamadas):
+            executar(estado)
+        amostras.append((time.perf_counter() - inicio) / chamadas)
+    return min(amostras), statistics.median(amostras), chamadas
+
+
+def executar_casos(filtro: str | None, rapido: bool, repeticoes: int, limite_s: float) -> list[dict]:
+    execucao = {
+        "execucao": datetime.now().isoformat(timespec="seconds"),
+        "commit": _commit_atual(),
+        "python": platform.python_version(),
+        "maquina": f"{platform.system()} {platform.machine()}",
+        "cpus": os.cpu_count(),
+    }
+    resultados = []
+    for nome, (caso, tamanhos, unidade) in CASOS.items():
+        if filtro and filtro not in nome:
+            continue
+        for tamanho in tamanhos:
+            if rapido and tamanho > TAMANHO_MAX_RAPIDO:
+                continue
+            estado, executar = caso(tamanho)
+            try:
+                minimo, mediana, chamadas = medir(executar, estado, repeticoes)
+            finally:
+                del estado, executar
+                limpar_temporarios()
+            resultado = {**execucao, "caso": nome, "tamanho": tamanho, "unidade": unidade,
+                         "min_s": minimo, "mediana_s": mediana, "chamadas": chamadas, "repeticoes": repeticoes}
+            resultados.append(resultado)
+            print(f"{nome:<40} {tamanho:>8} {unidade:<8} {minimo * 1e3:>12.3f} ms", flush=True)
+            # Evita esperar minutos pelos tamanhos seguintes de um caso já lento
+            if minimo > limite_s:
+                print(f"{'':<40} (tamanhos maiores pulados: acima de {limite_s:g} s)")
+                break
+    return resultados
+
+
+def ler_resultados(caminho: Path) -> list[dict]:
+    if not caminho.exists():
+        return []
+    with open(caminho, encoding="utf-8") as arq:
+        return [json.loads(linha) for linha in arq if linha.strip()]
+
+
+def comparar(atuais: list[dict], anteriores: list[dict], limite_regressao: float) -> int:
+    """Compara com a última execução anterior salva. Retorna o número de regressões."""
+    execucoes = sorted({r["execucao"] for r in anteriores})
+    if not execucoes:
+        print("\nNenhuma execução anterior para comparar.")
+        return 0
+    referencia = execucoes[-1]
+    base = {(r["caso"], r["tamanho"]): r for r in anteriores if r["execucao"] == referencia}
+    print(f"\nComparação com {referencia} (commit {base and next(iter(base.values())).get('commit')}):")
+    regressoes = 0
+    for r in atuais:
+        anterior = base.get((r["caso"], r["tamanho"]))
+        if anterior is None:
+            continue
+        razao = r["min_s"] / anterior["min_s"] if anterior["min_s"] else float("inf")
+        marca = ""
+        if razao > 1 + limite_regressao:
+            marca = "  <-- REGRESSÃO"
+            regressoes += 1
+        print(f"{r['caso']:<40} {r['tamanho']:>8} {razao:>8.2f}x{marca}")
+    return regressoes
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Benchmarks do rateio de energia.")
+    parser.add_argument("--filtro", help="só casos cujo nome contém este texto (ex.: exportacao)")
+    parser.add_argument("--rapido", action="store_true", help=f"só tamanhos até {TAMANHO_MAX_RAPIDO}")
+    parser.add_argument("--repeticoes", type=int, default=5, help="amostras por medição (padrão: 5)")
+    parser.add_argument("--limite", type=float, default=30.0,
+                        help="se um tamanho passar deste tempo (s), os maiores do mesmo caso são pulados")
+    parser.add_argument("--saida", type=Path, default=SAIDA_PADRAO,
+                        help=f"arquivo JSONL onde os resultados são acrescentados (padrão: {SAIDA_PADRAO})")
+    parser.add_argument("--comparar", action="store_true", help="compara com a última execução salva em --saida")
+    parser.add_argument("--limite-regressao", type=float, default=0.2,
+                        help="fração de piora considerada regressão em --comparar (padrão: 0.2 = 20%%)")
+    parser.add_argument("--nao-salvar", action="store_true", help="não grava os resultados")
+    args = parser.parse_args(argv)
+
+    anteriores = ler_resultados(args.saida) if args.comparar else []
+    print(f"{'caso':<40} {'tamanho':>8} {'':<8} {'mínimo':>15}")
+    resultados = executar_casos(args.filtro, args.rapido, args.repeticoes, args.limite)
+
+    if not args.nao_salvar:
+        args.saida.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.saida, "a", encoding="utf-8") as arq:
+            for resultado in resultados:
+                arq.write(json.dumps(resultado, ensure_ascii=False) + "\n")
+        print(f"\n{len(resultados)} resultados acrescentados em {args.saida}")
+
+    if args.comparar and comparar(resultados, anteriores, args.limite_regressao):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
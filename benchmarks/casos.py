@@ -0,0 +1,227 @@
+"""
+Casos de benchmark. Cada caso é uma função que recebe o tamanho e devolve
+(estado, executar): o caso monta o estado uma vez, fora da medição, e
+executar(estado) é a parte medida.
+"""
+import io
+import itertools
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from rateio import calcular_fatura_total, calcular_rateio, calcular_valor_base
+from rateio.calibracao import calibrar_tarifas
+from rateio.demonstrativos import gerar_zip_demonstrativos
+from rateio.exportacao import gerar_relatorio_excel, montar_aba_rateio, montar_resumo
+from rateio.grafico import dados_grafico, figura_consumo
+from rateio.historico import HistoricoSQLite
+from rateio.importacao import ler_backup
+from rateio.incremental import RateioIncremental
+from rateio.medidores import agregar_intervalos
+from rateio.tarifa_branca import TarifaBranca, calcular_rateio_branca, energia_por_posto
+
+from .dados import (
+    FONTE, METODO, TARIFAS, backup_sintetico, consumos_sinteticos, faturas_sinteticas, historico_sintetico,
+    intervalos_matriz_sintetica, intervalos_sinteticos, predio_sintetico,
+)
+
+UNIDADES = [10, 100, 1_000, 10_000, 100_000]
+LINHAS_HISTORICO = [1, 100, 1_000, 10_000]
+MEDIDORES = [10, 100, 1_000]  # 1 mês a cada 15 min: 2.880 linhas por medidor
+FATURAS = [10, 100, 1_000, 10_000]
+UNIDADES_INTERVALOS = [10, 100, 1_000, 3_000]  # matriz unidades × 2.976 intervalos de 15 min
+
+RAIZ = Path(__file__).resolve().parent.parent
+# Módulos importados no topo do script do app (o que um processo novo paga antes da 1ª página)
+IMPORTS_APP = [
+    "streamlit", "pandas", "numpy", "rateio", "rateio.calibracao", "rateio.cenarios", "rateio.demonstrativos", "rateio.exportacao",
+    "rateio.grafico", "rateio.historico", "rateio.leituras", "rateio.importacao", "rateio.instrumentacao",
+    "rateio.medidores", "rateio.memoria", "rateio.serie_mensal", "rateio.tarifa_branca",
+]
+IMPORTS_SOB_DEMANDA = ["plotly.graph_objects", "openpyxl", "xlsxwriter"]
+
+
+# ===================== CÁLCULO =====================
+def valor_base_escalar(n):
+    consumos = consumos_sinteticos(n).tolist()
+    return consumos, lambda consumos: [calcular_valor_base(c, TARIFAS) for c in consumos]
+
+
+def valor_base_vetorizado(n):
+    return consumos_sinteticos(n), lambda consumos: calcular_valor_base(consumos, TARIFAS)
+
+
+def fatura_total(n):
+    _, _, consumo_predio = predio_sintetico(n)
+    return consumo_predio, lambda consumo: calcular_fatura_total(consumo, TARIFAS)
+
+
+def rateio_proporcional(n):
+    return predio_sintetico(n), lambda p: calcular_rateio(p[0], p[1], TARIFAS, "Proporcional ao total da fatura", p[2])
+
+
+def rateio_faixas_individuais(n):
+    return predio_sintetico(n), lambda p: calcular_rateio(p[0], p[1], TARIFAS, "Faixas individuais", p[2])
+
+
+def rateio_incremental(n):
+    """Uma leitura corrigida por execução, com o cálculo anterior já guardado."""
+    nomes, consumos, consumo_predio = predio_sintetico(n)
+    incremental = RateioIncremental()
+    incremental.calcular(nomes, consumos, TARIFAS, METODO, consumo_predio)
+    consumos = consumos.copy()
+    unidades = itertools.cycle(range(n))
+
+    def corrigir_uma_leitura():
+        consumos[next(unidades)] += 1.0
+        return incremental.calcular(nomes, consumos, TARIFAS, METODO, consumo_predio)
+
+    return None, lambda _: corrigir_uma_leitura()
+
+
+def rateio_tarifa_branca(n):
+    consumos, horarios = intervalos_matriz_sintetica(n)
+    nomes = [f"Quitinete {i+1}" for i in range(n)]
+    return (nomes, consumos, horarios), lambda p: calcular_rateio_branca(
+        p[0], energia_por_posto(p[1], p[2]), TarifaBranca(), "Faixas individuais"
+    )
+
+
+def calibracao_faturas(n_faturas):
+    return faturas_sinteticas(n_faturas), lambda faturas: calibrar_tarifas(faturas, TARIFAS)
+
+
+# ===================== IMPORTAÇÃO / EXPORTAÇÃO =====================
+def importacao_backup(n):
+    return backup_sintetico(n), lambda conteudo: ler_backup(conteudo)
+
+
+def importacao_backup_com_historico(n_linhas):
+    return backup_sintetico(50, n_linhas), lambda conteudo: ler_backup(conteudo, ler_historico=True)
+
+
+def importacao_medidores(n_medidores):
+    return intervalos_sinteticos(n_medidores), lambda conteudo: agregar_intervalos(conteudo)
+
+
+def exportacao_excel(n):
+    nomes, consumos, consumo_predio = predio_sintetico(n)
+    resultado = calcular_rateio(nomes, consumos, TARIFAS, METODO, consumo_predio)
+    abas = (
+        montar_aba_rateio(resultado.df, consumos),
+        montar_resumo("Benchmark", resultado, TARIFAS, METODO, FONTE, consumo_predio),
+        historico_sintetico(50),
+    )
+    return abas, lambda abas: gerar_relatorio_excel(*abas)
+
+
+def exportacao_excel_historico(n_linhas):
+    nomes, consumos, consumo_predio = predio_sintetico(50)
+    resultado = calcular_rateio(nomes, consumos, TARIFAS, METODO, consumo_predio)
+    abas = (
+        montar_aba_rateio(resultado.df, consumos),
+        montar_resumo("Benchmark", resultado, TARIFAS, METODO, FONTE, consumo_predio),
+        historico_sintetico(n_linhas),
+    )
+    return abas, lambda abas: gerar_relatorio_excel(*abas)
+
+
+def exportacao_demonstrativos(n):
+    nomes, consumos, consumo_predio = predio_sintetico(n)
+    resultado = calcular_rateio(nomes, consumos, TARIFAS, METODO, consumo_predio)
+    df_resumo = montar_resumo("Benchmark", resultado, TARIFAS, METODO, FONTE, consumo_predio)
+    return (resultado.df, df_resumo), lambda p: gerar_zip_demonstrativos(p[0], p[1], io.BytesIO(), TARIFAS)
+
+
+# ===================== HISTÓRICO =====================
+_pastas_temporarias: list[tempfile.TemporaryDirectory] = []
+
+
+def banco_temporario() -> Path:
+    """Caminho de um banco SQLite numa pasta temporária, apagada por limpar_temporarios()."""
+    pasta = tempfile.TemporaryDirectory(prefix="benchmarks-rateio-")
+    _pastas_temporarias.append(pasta)
+    return Path(pasta.name) / "historico.sqlite3"
+
+
+def limpar_temporarios() -> None:
+    """Apaga as pastas temporárias criadas pelos casos já medidos."""
+    while _pastas_temporarias:
+        _pastas_temporarias.pop().cleanup()
+
+
+def historico_adicionar(n):
+    """
+    Grava um resultado de n unidades no histórico. O banco é o mesmo em todas as
+    chamadas: cada uma acrescenta n linhas, então as últimas amostras medem a
+    inserção numa tabela (e num índice) maior que as primeiras, como no app, em
+    que o histórico só cresce.
+    """
+    nomes, consumos, consumo_predio = predio_sintetico(n)
+    resultado = calcular_rateio(nomes, consumos, TARIFAS, METODO, consumo_predio)
+    banco = HistoricoSQLite(banco_temporario())
+    return (banco, resultado), lambda estado: estado[0].adicionar(
+        "Benchmark", "2024-06", "Benchmark", estado[1].df, estado[1].valor_total, estado[1].consumo_total
+    )
+
+
+def historico_pagina(n_linhas):
+    banco = HistoricoSQLite(banco_temporario())
+    historico = historico_sintetico(n_linhas).set_index("index")
+    banco.adicionar("Benchmark", "2024-06", "Benchmark", historico, 0.0, 0.0)
+    ultima = max(-(-n_linhas // 50), 1)
+    return banco, lambda banco: banco.pagina("Benchmark", ultima, 50)
+
+
+# ===================== GRÁFICO =====================
+def grafico_consumo(n):
+    nomes, consumos, consumo_predio = predio_sintetico(n)
+    df = calcular_rateio(nomes, consumos, TARIFAS, METODO, consumo_predio).df
+    return df, lambda df: figura_consumo(dados_grafico(df)).to_json()
+
+
+def grafico_consumo_top30(n):
+    nomes, consumos, consumo_predio = predio_sintetico(n)
+    df = calcular_rateio(nomes, consumos, TARIFAS, METODO, consumo_predio).df
+    return df, lambda df: figura_consumo(dados_grafico(df, top_n=30)).to_json()
+
+
+# ===================== INICIALIZAÇÃO =====================
+def _importar_em_processo_novo(modulos):
+    codigo = "import " + ", ".join(modulos)
+    return lambda _: subprocess.run([sys.executable, "-c", codigo], cwd=RAIZ, check=True)
+
+
+def inicializacao_app(_):
+    return None, _importar_em_processo_novo(IMPORTS_APP)
+
+
+def inicializacao_app_com_bibliotecas_sob_demanda(_):
+    """Referência: o custo se plotly/openpyxl/xlsxwriter ainda fossem importados no início."""
+    return None, _importar_em_processo_novo(IMPORTS_APP + IMPORTS_SOB_DEMANDA)
+
+
+# nome -> (função do caso, tamanhos, unidade do tamanho)
+CASOS = {
+    "inicializacao.app": (inicializacao_app, [1], "processo"),
+    "inicializacao.app_com_sob_demanda": (inicializacao_app_com_bibliotecas_sob_demanda, [1], "processo"),
+    "calculo.valor_base_escalar": (valor_base_escalar, UNIDADES, "unidades"),
+    "calculo.valor_base_vetorizado": (valor_base_vetorizado, UNIDADES, "unidades"),
+    "calculo.fatura_total": (fatura_total, UNIDADES, "unidades"),
+    "calculo.rateio_proporcional": (rateio_proporcional, UNIDADES, "unidades"),
+    "calculo.rateio_faixas_individuais": (rateio_faixas_individuais, UNIDADES, "unidades"),
+    "calculo.rateio_incremental": (rateio_incremental, UNIDADES, "unidades"),
+    "calculo.rateio_tarifa_branca": (rateio_tarifa_branca, UNIDADES_INTERVALOS, "unidades"),
+    "calculo.calibracao": (calibracao_faturas, FATURAS, "faturas"),
+    "importacao.backup": (importacao_backup, UNIDADES, "unidades"),
+    "importacao.backup_com_historico": (importacao_backup_com_historico, LINHAS_HISTORICO, "linhas"),
+    "importacao.medidores": (importacao_medidores, MEDIDORES, "medidores"),
+    "exportacao.excel": (exportacao_excel, UNIDADES, "unidades"),
+    "exportacao.demonstrativos": (exportacao_demonstrativos, UNIDADES[:4], "unidades"),
+    "exportacao.excel_historico": (exportacao_excel_historico, LINHAS_HISTORICO, "linhas"),
+    "historico.adicionar": (historico_adicionar, UNIDADES, "unidades"),
+    "historico.pagina": (historico_pagina, LINHAS_HISTORICO, "linhas"),
+    "grafico.consumo": (grafico_consumo, UNIDADES, "unidades"),
+    "grafico.consumo_top30": (grafico_consumo_top30, UNIDADES, "unidades"),
+}
@@ -0,0 +1,79 @@
+"""
+Dados sintéticos reprodutíveis (semente fixa) para os benchmarks.
+"""
+import numpy as np
+import pandas as pd
+
+from rateio import BANDEIRAS, Tarifas, calcular_rateio, calcular_valor_base
+from rateio.exportacao import gerar_relatorio_excel, linhas_historico, montar_aba_rateio, montar_resumo
+
+SEMENTE = 20240601
+TARIFAS = Tarifas()
+METODO = "Proporcional ao total da fatura"
+FONTE = "Leituras do prédio"
+
+
+def consumos_sinteticos(n_unidades: int, semente: int = SEMENTE) -> np.ndarray:
+    """Consumos mensais (kWh) com distribuição parecida com a de quitinetes reais."""
+    rng = np.random.default_rng(semente + n_unidades)
+    return np.round(rng.gamma(shape=4.0, scale=35.0, size=n_unidades), 1)
+
+
+def predio_sintetico(n_unidades: int) -> tuple[list, np.ndarray, float]:
+    """(nomes, consumos, consumo do medidor principal) de um prédio com n_unidades."""
+    consumos = consumos_sinteticos(n_unidades)
+    nomes = [f"Quitinete {i+1} - Inquilino {i+1}" for i in range(n_unidades)]
+    # Medidor principal ~8% acima da soma: a diferença fica para Áreas Comuns
+    return nomes, consumos, float(np.round(consumos.sum() * 1.08, 1))
+
+
+def historico_sintetico(n_linhas: int, unidades_por_mes: int = 50) -> pd.DataFrame:
+    """Aba Histórico com n_linhas, em blocos mensais de unidades_por_mes unidades."""
+    nomes, consumos, consumo_predio = predio_sintetico(unidades_por_mes)
+    resultado = calcular_rateio(nomes, consumos, TARIFAS, METODO, consumo_predio)
+    blocos = []
+    for mes in range(-(-n_linhas // len(resultado.df))):
+        blocos.append(linhas_historico(f"Simulação {mes+1}", resultado.df, resultado.valor_total, resultado.consumo_total))
+    return pd.concat(blocos, ignore_index=True).head(n_linhas)
+
+
+def backup_sintetico(n_unidades: int, n_historico: int = 0) -> bytes:
+    """Bytes de um backup (Rateio/Resumo/Histórico) igual ao gerado pelo botão de download."""
+    nomes, consumos, consumo_predio = predio_sintetico(n_unidades)
+    resultado = calcular_rateio(nomes, consumos, TARIFAS, METODO, consumo_predio)
+    df_resumo = montar_resumo("Benchmark", resultado, TARIFAS, METODO, FONTE, consumo_predio)
+    df_historico = historico_sintetico(n_historico) if n_historico else None
+    return gerar_relatorio_excel(montar_aba_rateio(resultado.df, consumos), df_resumo, df_historico)
+
+
+def intervalos_sinteticos(n_medidores: int, dias: int = 30) -> bytes:
+    """CSV (padrão brasileiro, ";" e ",") de um mês de leituras a cada 15 min de n_medidores medidores."""
+    horarios = pd.date_range("2024-06-01", periods=dias * 96, freq="15min").strftime("%d/%m/%Y %H:%M")
+    rng = np.random.default_rng(SEMENTE + n_medidores)
+    energia = np.round(rng.gamma(shape=2.0, scale=0.1, size=(n_medidores, len(horarios))), 3)
+    df = pd.DataFrame({
+        "Medidor": np.repeat([f"M{i+1:05d}" for i in range(n_medidores)], len(horarios)),
+        "Data/Hora": np.tile(horarios, n_medidores),
+        "Energia (kWh)": energia.ravel(),
+        "Leitura (kWh)": np.round(energia.cumsum(axis=1) + 1000, 3).ravel(),
+    })
+    return df.to_csv(sep=";", decimal=",", index=False).encode()
+
+
+def intervalos_matriz_sintetica(n_unidades: int, dias: int = 31) -> tuple[np.ndarray, pd.DatetimeIndex]:
+    """(kWh por unidade × intervalo de 15 min, início de cada intervalo) de um mês."""
+    horarios = pd.date_range("2024-10-01", periods=dias * 96, freq="15min")
+    rng = np.random.default_rng(SEMENTE + n_unidades)
+    return rng.gamma(shape=2.0, scale=0.05, size=(n_unidades, len(horarios))), horarios
+
+
+def faturas_sinteticas(n_faturas: int) -> pd.DataFrame:
+    """Faturas (Consumo, Bandeira, Total) geradas com TARIFAS, com bandeiras sorteadas."""
+    rng = np.random.default_rng(SEMENTE + n_faturas)
+    consumos = np.round(rng.uniform(30, 900, n_faturas), 1)
+    bandeiras = rng.choice(BANDEIRAS, n_faturas)
+    # Verde sem acréscimo; as outras com os valores por faixa de TARIFAS
+    base = calcular_valor_base(consumos, TARIFAS)
+    sem_bandeira = calcular_valor_base(consumos, Tarifas(bandeira_ate_150=0.0, bandeira_acima_150=0.0))
+    totais = np.where(bandeiras == BANDEIRAS[0], sem_bandeira, base) + TARIFAS.cosip
+    return pd.DataFrame({"Consumo (kWh)": consumos, "Bandeira": bandeiras, "Total (R$)": np.round(totais, 2)})
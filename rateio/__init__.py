@@ -0,0 +1,38 @@
+"""
+Pacote com a lógica do rateio de energia, separada da interface Streamlit.
+"""
+from .calculo import (
+    AREAS_COMUNS,
+    BANDEIRAS,
+    FONTES_CONSUMO,
+    METODOS_RATEIO,
+    Componentes,
+    ResultadoRateio,
+    Tarifas,
+    calcular_componentes,
+    calcular_fatura_total,
+    calcular_rateio,
+    calcular_valor_base,
+    compilar,
+    ratear,
+)
+from .tabela_tarifaria import Faixas, TabelaCompilada, TabelaTarifaria
+
+__all__ = [
+    "AREAS_COMUNS",
+    "BANDEIRAS",
+    "FONTES_CONSUMO",
+    "METODOS_RATEIO",
+    "Componentes",
+    "Faixas",
+    "ResultadoRateio",
+    "TabelaCompilada",
+    "TabelaTarifaria",
+    "Tarifas",
+    "calcular_componentes",
+    "calcular_fatura_total",
+    "calcular_rateio",
+    "calcular_valor_base",
+    "compilar",
+    "ratear",
+]
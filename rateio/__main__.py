@@ -0,0 +1,6 @@
+"""Permite executar o rateio em lote com `python -m rateio`."""
+import sys
+
+from .lote import main
+
+sys.exit(main())
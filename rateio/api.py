@@ -0,0 +1,384 @@
+"""
+API HTTP do rateio, para chamar o cálculo e o relatório Excel de outros sistemas.
+
+Só usa a biblioteca padrão: um servidor asyncio recebe as requisições e o
+trabalho de CPU (cálculo e geração do .xlsx) roda num pool de processos com
+tamanho fixo. Requisições além do limite de pendentes recebem 503.
+
+Rotas:
+    GET  /saude          -> {"status": "ok", ...}
+    POST /rateio         -> resultado em JSON
+    POST /rateio/xlsx    -> relatório .xlsx (abas Rateio e Resumo)
+    POST /rateio/lote    -> {"predios": [corpo, ...]} -> {"resultados": [...]} (um erro não derruba os outros)
+
+Corpo de /rateio e /rateio/xlsx:
+    {
+      "unidades": [{"nome": "Quitinete 1 - Ana", "consumo_kwh": 120.5},
+                   {"nome": "Quitinete 2 - Bia", "leitura_anterior": 1000, "leitura_atual": 1130}],
+      "tarifas": {"bandeira": "Verde", "cosip": 61.0, ...},     # campos de Tarifas; ausentes = padrão
+      "metodo": "Proporcional ao total da fatura",              # opcional (padrão: o primeiro)
+      "consumo_total_kwh": 300,                                 # opcional; sem ele, soma das quitinetes
+      "leitura_predio": {"anterior": 5000, "atual": 5300},     # alternativa ao consumo_total_kwh
+      "identificacao": "Outubro/2024"                            # opcional, vai para o Resumo
+    }
+
+O corpo é lido pelo Content-Length (obrigatório em POST); Transfer-Encoding
+(chunked) recebe 501, cabeçalhos malformados 400 e grandes demais 431.
+
+Uso:
+    python -m rateio.api --host 127.0.0.1 --porta 8080 -j 4
+"""
+import argparse
+import asyncio
+import json
+import math
+import multiprocessing
+import os
+import re
+import signal
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import fields
+from datetime import datetime
+from http import HTTPStatus
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+from .calculo import BANDEIRAS, FONTES_CONSUMO, METODOS_RATEIO, Tarifas, calcular_rateio
+from .exportacao import MIME_XLSX, gerar_relatorio_excel, montar_aba_rateio, montar_resumo
+
+TAMANHO_MAX_CORPO = 32 * 2**20  # 32 MiB
+TEMPO_OCIOSO_S = 30             # conexões keep-alive sem requisição são fechadas depois disso
+# Limites das entradas: as contas são em int64 e o rateio proporcional multiplica o consumo
+# (Wh) pelo total da fatura (centavos). Com 1e6 kWh a até R$ 2/kWh em TE, TUSD e bandeira,
+# mais a COSIP máxima, o produto fica perto de 1e18, abaixo do limite de 9,2e18.
+CONSUMO_MAX_KWH = 1e6
+TARIFA_MAX_KWH = 2.0
+COSIP_MAX = 1e6
+_CAMPOS_TARIFAS = {campo.name: campo for campo in fields(Tarifas)}
+
+
+class ErroRequisicao(ValueError):
+    """Corpo inválido: vira uma resposta 400 com a mensagem."""
+
+
+class ErroHTTP(Exception):
+    """Requisição HTTP malformada: responde com o status e fecha a conexão."""
+
+    def __init__(self, status: HTTPStatus, mensagem: str):
+        super().__init__(mensagem)
+        self.status = status
+
+
+# ===================== TRABALHO DE CPU (RODA NO POOL) =====================
+def _tarifas(dados: dict | None) -> Tarifas:
+    dados = dados or {}
+    desconhecidos = set(dados) - set(_CAMPOS_TARIFAS)
+    if desconhecidos:
+        raise ErroRequisicao(f"Campos de tarifa desconhecidos: {', '.join(sorted(desconhecidos))}")
+    valores = {}
+    for nome, valor in dados.items():
+        tipo = _CAMPOS_TARIFAS[nome].type
+        if tipo is float:
+            valores[nome] = float(valor)
+            limite = COSIP_MAX if nome == "cosip" else TARIFA_MAX_KWH
+            if not math.isfinite(valores[nome]) or abs(valores[nome]) > limite:
+                raise ErroRequisicao(f"Tarifa {nome} deve ser um número finito de até {limite:g}")
+        elif tipo is bool:
+            if not isinstance(valor, bool):
+                raise ErroRequisicao(f"Tarifa {nome} deve ser true/false")
+            valores[nome] = valor
+        else:
+            valores[nome] = valor
+    if valores.get("bandeira", Tarifas.bandeira) not in BANDEIRAS:
+        raise ErroRequisicao(f"Bandeira desconhecida: {valores['bandeira']} (use {', '.join(BANDEIRAS)})")
+    return Tarifas(**valores)
+
+
+def _preparar(corpo: dict) -> dict:
+    """Valida o corpo e converte em argumentos de calcular_rateio (+ dados do Resumo)."""
+    if not isinstance(corpo, dict):
+        raise ErroRequisicao("O corpo deve ser um objeto JSON")
+    unidades = corpo.get("unidades")
+    if not isinstance(unidades, list) or not unidades:
+        raise ErroRequisicao("Informe 'unidades' como uma lista não vazia")
+
+    nomes, consumos, leituras_atuais = [], [], []
+    for i, unidade in enumerate(unidades):
+        if not isinstance(unidade, dict):
+            raise ErroRequisicao(f"unidades[{i}] deve ser um objeto")
+        nomes.append(str(unidade.get("nome") or f"Quitinete {i+1}"))
+        if "consumo_kwh" in unidade:
+            consumos.append(float(unidade["consumo_kwh"]))
+            leituras_atuais.append(float(unidade.get("leitura_atual", 0.0)))
+        elif "leitura_atual" in unidade:
+            atual = float(unidade["leitura_atual"])
+            consumos.append(atual - float(unidade.get("leitura_anterior", 0.0)))
+            leituras_atuais.append(atual)
+        else:
+            raise ErroRequisicao(f"unidades[{i}]: informe 'consumo_kwh' ou 'leitura_atual'")
+    consumos = np.maximum(np.array(consumos, dtype=float), 0.0)  # nunca deixa negativo
+    if not np.isfinite(consumos).all():
+        raise ErroRequisicao("Consumos devem ser números finitos")
+    if consumos.sum() > CONSUMO_MAX_KWH:
+        raise ErroRequisicao(f"O consumo das unidades passa do limite de {CONSUMO_MAX_KWH:g} kWh")
+
+    metodo = corpo.get("metodo", METODOS_RATEIO[0])
+    if metodo not in METODOS_RATEIO:
+        raise ErroRequisicao(f"Método de rateio desconhecido: {metodo}")
+
+    consumo_total, leitura_predio_at = corpo.get("consumo_total_kwh"), None
+    leitura_predio = corpo.get("leitura_predio")
+    if consumo_total is None and isinstance(leitura_predio, dict):
+        leitura_predio_at = float(leitura_predio.get("atual", 0.0))
+        consumo_total = max(leitura_predio_at - float(leitura_predio.get("anterior", 0.0)), 0.0)
+    if consumo_total is not None:
+        consumo_total = float(consumo_total)
+        if not math.isfinite(consumo_total) or consumo_total > CONSUMO_MAX_KWH:
+            raise ErroRequisicao(f"consumo_total_kwh deve ser um número finito de até {CONSUMO_MAX_KWH:g}")
+
+    return {
+        "nomes": nomes,
+        "consumos": consumos,
+        "leituras_atuais": leituras_atuais,
+        "tarifas": _tarifas(corpo.get("tarifas")),
+        "metodo": metodo,
+        "consumo_total": consumo_total,
+        "fonte": FONTES_CONSUMO[0] if consumo_total is not None else FONTES_CONSUMO[1],
+        "leitura_predio_at": leitura_predio_at,
+        "identificacao": str(corpo.get("identificacao")
+                             or datetime.now(ZoneInfo("America/Sao_Paulo")).strftime("%d/%m/%Y %H:%M")),
+    }
+
+
+def _calcular(dados: dict):
+    return calcular_rateio(dados["nomes"], dados["consumos"], dados["tarifas"], dados["metodo"], dados["consumo_total"])
+
+
+def calcular_json(corpo: dict) -> dict:
+    """Rateio de um prédio como dict serializável em JSON."""
+    resultado = _calcular(_preparar(corpo))
+    return {
+        "unidades": [
+            {"unidade": unidade, "consumo_kwh": float(consumo), "valor": float(valor)}
+            for unidade, consumo, valor in zip(resultado.df.index, resultado.df["Consumo (kWh)"], resultado.df["Valor (R$)"])
+        ],
+        "consumo_total_kwh": resultado.consumo_total,
+        "valor_base": resultado.valor_base,
+        "valor_total": resultado.valor_total,
+        "alertas": resultado.alertas,
+    }
+
+
+def calcular_lote_json(corpo: dict) -> dict:
+    """Vários prédios numa chamada; cada item traz o resultado ou o erro."""
+    predios = corpo.get("predios") if isinstance(corpo, dict) else None
+    if not isinstance(predios, list):
+        raise ErroRequisicao("Informe 'predios' como uma lista de corpos de /rateio")
+    resultados = []
+    for predio in predios:
+        try:
+            resultados.append(calcular_json(predio))
+        except (ValueError, TypeError) as e:
+            resultados.append({"erro": str(e)})
+    return {"resultados": resultados}
+
+
+def gerar_xlsx(corpo: dict) -> bytes:
+    """Relatório .xlsx (abas Rateio e Resumo) de um prédio, igual ao download do app sem o histórico."""
+    dados = _preparar(corpo)
+    resultado = _calcular(dados)
+    df_resumo = montar_resumo(
+        dados["identificacao"], resultado, dados["tarifas"], dados["metodo"], dados["fonte"], dados["leitura_predio_at"]
+    )
+    return gerar_relatorio_excel(montar_aba_rateio(resultado.df, dados["leituras_atuais"]), df_resumo)
+
+
+def _executar_no_pool(funcao, corpo: bytes):
+    """Decodifica o JSON já no processo do pool, para não ocupar o loop de eventos com corpos grandes."""
+    try:
+        dados = json.loads(corpo or b"null")
+    except (json.JSONDecodeError, UnicodeDecodeError) as e:
+        raise ErroRequisicao(f"JSON inválido: {e}") from None
+    return funcao(dados)
+
+
+# ===================== SERVIDOR HTTP (ASYNCIO) =====================
+ROTAS = {
+    ("POST", "/rateio"): (calcular_json, "json"),
+    ("POST", "/rateio/lote"): (calcular_lote_json, "json"),
+    ("POST", "/rateio/xlsx"): (gerar_xlsx, "xlsx"),
+}
+_DIGITOS = re.compile(r"[0-9]+")
+
+
+class ServidorRateio:
+    """
+    Servidor HTTP/1.1 mínimo (com keep-alive). Cada requisição de cálculo vai para
+    o pool de processos; no máximo max_pendentes ficam em andamento ou na fila.
+    """
+
+    def __init__(self, processos: int | None = None, max_pendentes: int | None = None):
+        self.processos = processos or os.cpu_count() or 1
+        self.max_pendentes = max_pendentes or 4 * self.processos
+        self.pool = None
+        self._vagas = None
+        self.pendentes = 0
+
+    async def iniciar(self, host: str, porta: int) -> asyncio.AbstractServer:
+        # Os processos do pool nascem no primeiro envio; com fork herdariam os sockets
+        # abertos dos clientes e o "Connection: close" nunca chegaria ao outro lado
+        metodo = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        self.pool = ProcessPoolExecutor(max_workers=self.processos, mp_context=multiprocessing.get_context(metodo))
+        self._vagas = asyncio.Semaphore(self.max_pendentes)
+        return await asyncio.start_server(self._atender, host, porta)
+
+    def fechar(self) -> None:
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+
+    async def _atender(self, leitor: asyncio.StreamReader, escritor: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    try:
+                        cabecalho = await asyncio.wait_for(leitor.readuntil(b"\r\n\r\n"), TEMPO_OCIOSO_S)
+                    except asyncio.LimitOverrunError:
+                        raise ErroHTTP(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, "Cabeçalho grande demais") from None
+                    metodo, caminho, versao, cabecalhos = self._ler_cabecalho(cabecalho)
+                    tamanho = self._tamanho_corpo(metodo, cabecalhos)
+                except ErroHTTP as e:
+                    # Sem saber onde a requisição termina, a conexão não pode ser reaproveitada
+                    await self._responder(escritor, e.status, {"erro": str(e)}, False)
+                    break
+                manter = cabecalhos.get("connection", "").lower() != "close" and versao == "HTTP/1.1"
+                corpo = await leitor.readexactly(tamanho) if tamanho else b""
+
+                status, conteudo, tipo = await self._executar(metodo, caminho, corpo)
+                await self._responder(escritor, status, conteudo, manter, tipo)
+                if not manter:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.TimeoutError):
+            pass
+        finally:
+            escritor.close()
+
+    @staticmethod
+    def _ler_cabecalho(bruto: bytes) -> tuple[str, str, str, dict]:
+        """Linha de requisição e cabeçalhos (nomes em minúsculas; repetidos são unidos com ", ")."""
+        linhas = bruto.decode("latin-1").split("\r\n")
+        partes = linhas[0].split(" ")
+        if len(partes) != 3 or not partes[2].startswith("HTTP/1."):
+            raise ErroHTTP(HTTPStatus.BAD_REQUEST, "Linha de requisição inválida")
+        metodo, caminho, versao = partes
+        cabecalhos = {}
+        for linha in linhas[1:]:
+            if not linha:
+                continue
+            if ":" not in linha:
+                raise ErroHTTP(HTTPStatus.BAD_REQUEST, "Cabeçalho inválido")
+            nome, valor = linha.split(":", 1)
+            nome = nome.strip().lower()
+            cabecalhos[nome] = f"{cabecalhos[nome]}, {valor.strip()}" if nome in cabecalhos else valor.strip()
+        return metodo.upper(), caminho.split("?", 1)[0].rstrip("/") or "/", versao, cabecalhos
+
+    @staticmethod
+    def _tamanho_corpo(metodo: str, cabecalhos: dict) -> int:
+        """
+        Tamanho do corpo pelo Content-Length. Transfer-Encoding (chunked) não é aceito:
+        o corpo ficaria no fluxo e seria lido como a próxima requisição.
+        """
+        if "transfer-encoding" in cabecalhos:
+            raise ErroHTTP(HTTPStatus.NOT_IMPLEMENTED, "Transfer-Encoding não suportado; envie o corpo com Content-Length")
+        valor = cabecalhos.get("content-length")
+        if valor is None:
+            if metodo == "POST":
+                raise ErroHTTP(HTTPStatus.LENGTH_REQUIRED, "Informe o Content-Length")
+            return 0
+        if not _DIGITOS.fullmatch(valor):
+            raise ErroHTTP(HTTPStatus.BAD_REQUEST, f"Content-Length inválido: {valor[:40]}")
+        tamanho = int(valor)
+        if tamanho > TAMANHO_MAX_CORPO:
+            raise ErroHTTP(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Corpo grande demais")
+        return tamanho
+
+    async def _executar(self, metodo: str, caminho: str, corpo: bytes):
+        """Roteia a requisição. Retorna (status, conteúdo, tipo)."""
+        if (metodo, caminho) == ("GET", "/saude"):
+            return HTTPStatus.OK, {"status": "ok", "processos": self.processos, "pendentes": self.pendentes}, "json"
+        rota = ROTAS.get((metodo, caminho))
+        if rota is None:
+            if any(caminho == c for _, c in ROTAS):
+                return HTTPStatus.METHOD_NOT_ALLOWED, {"erro": f"Use POST em {caminho}"}, "json"
+            return HTTPStatus.NOT_FOUND, {"erro": f"Rota não encontrada: {caminho}"}, "json"
+        funcao, tipo = rota
+
+        # Fila limitada: sem vaga, recusa na hora em vez de acumular requisições
+        if self._vagas.locked():
+            return HTTPStatus.SERVICE_UNAVAILABLE, {"erro": "Servidor ocupado, tente novamente"}, "json"
+        async with self._vagas:
+            self.pendentes += 1
+            try:
+                conteudo = await asyncio.get_running_loop().run_in_executor(self.pool, _executar_no_pool, funcao, corpo)
+            except (ValueError, TypeError) as e:
+                return HTTPStatus.BAD_REQUEST, {"erro": str(e)}, "json"
+            except Exception as e:
+                return HTTPStatus.INTERNAL_SERVER_ERROR, {"erro": f"{type(e).__name__}: {e}"}, "json"
+            finally:
+                self.pendentes -= 1
+        return HTTPStatus.OK, conteudo, tipo
+
+    @staticmethod
+    async def _responder(escritor, status: HTTPStatus, conteudo, manter: bool, tipo: str = "json") -> None:
+        if tipo == "xlsx":
+            corpo, content_type = conteudo, MIME_XLSX
+        else:
+            corpo, content_type = json.dumps(conteudo, ensure_ascii=False).encode("utf-8"), "application/json; charset=utf-8"
+        cabecalhos = [
+            f"HTTP/1.1 {status.value} {status.phrase}",
+            f"Content-Type: {content_type}",
+            f"Content-Length: {len(corpo)}",
+            f"Connection: {'keep-alive' if manter else 'close'}",
+        ]
+        if status == HTTPStatus.SERVICE_UNAVAILABLE:
+            cabecalhos.append("Retry-After: 1")
+        escritor.write(("\r\n".join(cabecalhos) + "\r\n\r\n").encode("latin-1") + corpo)
+        await escritor.drain()
+
+
+async def servir(host: str, porta: int, processos: int | None = None, max_pendentes: int | None = None) -> None:
+    """Sobe o servidor e atende até receber SIGINT/SIGTERM."""
+    servidor = ServidorRateio(processos, max_pendentes)
+    tcp = await servidor.iniciar(host, porta)
+    parar = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sinal in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sinal, parar.set)
+        except (NotImplementedError, RuntimeError):  # Windows
+            pass
+    print(f"API do rateio em http://{host}:{porta} ({servidor.processos} processos, até {servidor.max_pendentes} pendentes)")
+    try:
+        async with tcp:
+            await parar.wait()
+    finally:
+        servidor.fechar()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m rateio.api", description="API HTTP do rateio de energia.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=8080)
+    parser.add_argument("-j", "--processos", type=int, default=None, help="Processos de cálculo (padrão: todos os núcleos)")
+    parser.add_argument("--max-pendentes", type=int, default=None,
+                        help="Requisições em andamento/fila antes de responder 503 (padrão: 4 × processos)")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(servir(args.host, args.porta, args.processos, args.max_pendentes))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,57 @@
+"""
+Cache em memória, limitado e seguro entre threads, para artefatos caros
+(relatórios, gráficos) indexados por um hash do conteúdo dos DataFrames.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+
+def hash_dataframes(*dfs) -> str:
+    """
+    Hash estável do conteúdo (valores, índice e nomes de colunas) de um ou mais
+    DataFrames. None também é aceito, para abas opcionais.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    for df in dfs:
+        if df is None:
+            h.update(b"<None>")
+            continue
+        h.update(repr(list(df.columns)).encode())
+        h.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+        h.update(b"|")
+    return h.hexdigest()
+
+
+class CacheLRU:
+    """
+    Dicionário com no máximo max_itens entradas; ao estourar, descarta a usada há mais tempo.
+    """
+
+    def __init__(self, max_itens: int = 32):
+        self.max_itens = max_itens
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obter(self, chave, gerar):
+        """Retorna o valor da chave, chamando gerar() e guardando o resultado se não existir."""
+        with self._lock:
+            if chave in self._itens:
+                self._itens.move_to_end(chave)
+                return self._itens[chave]
+        valor = gerar()  # fora do lock: geração pode ser lenta
+        with self._lock:
+            self._itens[chave] = valor
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.max_itens:
+                self._itens.popitem(last=False)
+        return valor
+
+    def limpar(self) -> None:
+        with self._lock:
+            self._itens.clear()
+
+    def __len__(self) -> int:
+        return len(self._itens)
@@ -0,0 +1,295 @@
+"""
+Motor de cálculo do rateio de energia, independente do Streamlit.
+
+Todas as funções aceitam um escalar ou um array NumPy de consumos (kWh) e
+calculam TE, TUSD, bandeira, valor base e total de uma vez só, sem laços
+Python por unidade.
+"""
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from .tabela_tarifaria import Faixas, TabelaCompilada, TabelaTarifaria
+
+# ===================== CONSTANTES =====================
+BANDEIRAS = ["Verde", "Amarela", "Vermelha 1", "Vermelha 2"]
+METODOS_RATEIO = ["Proporcional ao total da fatura", "Faixas individuais"]
+FONTES_CONSUMO = ["Leituras do prédio", "Soma das quitinetes"]
+
+# Valor único por bandeira (aplicado quando NÃO usamos faixa)
+BANDEIRA_VALOR_UNICO = {
+    "Verde": 0.000000,
+    "Amarela": 0.018660,
+    "Vermelha 1": 0.044630,
+    "Vermelha 2": 0.075660,
+}
+
+LIMITE_FAIXA_KWH = 150.0  # modelo de duas faixas: até 150 kWh e acima de 150 kWh
+AREAS_COMUNS = "Áreas Comuns"
+
+
+# ===================== TARIFAS =====================
+@dataclass(frozen=True)
+class Tarifas:
+    """
+    Conjunto imutável de tarifas (R$/kWh com tributos) usado em um cálculo.
+    Os valores padrão são os mesmos da barra lateral do app.
+    """
+    te_ate_150: float = 0.392200
+    te_acima_150: float = 0.415851
+    tusd_ate_150: float = 0.455333
+    tusd_acima_150: float = 0.482660
+    bandeira_ate_150: float = 0.054400
+    bandeira_acima_150: float = 0.057660
+    bandeira: str = "Vermelha 1"
+    usar_bandeira_por_faixa: bool = True
+    cosip: float = 61.00
+
+    @property
+    def bandeira_valor_unico(self) -> float:
+        """Valor da bandeira selecionada quando NÃO usamos faixa."""
+        return BANDEIRA_VALOR_UNICO[self.bandeira]
+
+    def tabela_tarifaria(self) -> TabelaTarifaria:
+        """Converte o modelo de duas faixas (até/acima de 150 kWh) em uma TabelaTarifaria."""
+        if self.usar_bandeira_por_faixa:
+            bandeiras = {self.bandeira: Faixas((LIMITE_FAIXA_KWH,), (self.bandeira_ate_150, self.bandeira_acima_150))}
+        else:
+            bandeiras = {nome: Faixas((), (valor,)) for nome, valor in BANDEIRA_VALOR_UNICO.items()}
+        return TabelaTarifaria(
+            te=Faixas((LIMITE_FAIXA_KWH,), (self.te_ate_150, self.te_acima_150)),
+            tusd=Faixas((LIMITE_FAIXA_KWH,), (self.tusd_ate_150, self.tusd_acima_150)),
+            bandeiras=bandeiras,
+            cosip=self.cosip,
+        )
+
+
+@lru_cache(maxsize=64)
+def _compilar_tarifas(tarifas: Tarifas) -> TabelaCompilada:
+    return tarifas.tabela_tarifaria().compilar(tarifas.bandeira)
+
+
+def compilar(tarifas: "Tarifas | TabelaCompilada") -> TabelaCompilada:
+    """
+    Tabela compilada para o cálculo. Aceita Tarifas (compiladas uma vez e guardadas)
+    ou uma TabelaCompilada de qualquer TabelaTarifaria, usada como está.
+    """
+    if isinstance(tarifas, TabelaCompilada):
+        return tarifas
+    return _compilar_tarifas(tarifas)
+
+
+class Componentes(NamedTuple):
+    """Parcelas da fatura para cada consumo informado (R$, arredondadas em centavos)."""
+    te: np.ndarray
+    tusd: np.ndarray
+    bandeira: np.ndarray
+    base: np.ndarray
+    total: np.ndarray
+
+
+class ResultadoRateio(NamedTuple):
+    """Resultado completo de um rateio: tabela por unidade e valores da fatura."""
+    df: pd.DataFrame
+    consumo_total: float
+    valor_base: float
+    valor_total: float
+    alertas: list
+
+
+# ===================== FUNÇÕES DE CÁLCULO =====================
+def calcular_componentes(consumos, tarifas: Tarifas | TabelaCompilada) -> Componentes:
+    """
+    Calcula TE, TUSD, bandeira, base (sem COSIP) e total (base + COSIP)
+    para um array de consumos em kWh, em uma única operação vetorizada.
+    """
+    tabela = compilar(tarifas)
+    consumos = np.asarray(consumos, dtype=float)
+    base = tabela.total.custo(consumos)
+    total = np.round(base + tabela.cosip, 2)
+    return Componentes(
+        tabela.te.custo(consumos),
+        tabela.tusd.custo(consumos),
+        tabela.bandeira.custo(consumos),
+        base,
+        total,
+    )
+
+
+def calcular_valor_base(consumo_kwh, tarifas: Tarifas | TabelaCompilada):
+    """
+    Calcula o custo base (TE + TUSD + Bandeira) para um consumo ou um array de consumos.
+    Não inclui COSIP. Retorna float para entrada escalar e ndarray para arrays.
+    """
+    tabela = compilar(tarifas)
+    if np.ndim(consumo_kwh) == 0:
+        return tabela.total.custo_escalar(float(consumo_kwh))
+    return tabela.total.custo(consumo_kwh)
+
+
+def calcular_fatura_total(consumo_total_kwh: float, tarifas: Tarifas | TabelaCompilada) -> tuple[float, float]:
+    """
+    Retorna (total_fatura, valor_base_sem_cosip).
+    - valor_base: TE + TUSD + Bandeira
+    - total_fatura: valor_base + COSIP
+    """
+    valor_base = calcular_valor_base(float(consumo_total_kwh), tarifas)
+    total = round(valor_base + compilar(tarifas).cosip, 2)
+    return total, valor_base
+
+
+def para_centavos(valores) -> np.ndarray:
+    """Converte valores em R$ para centavos inteiros (int64)."""
+    return np.rint(np.asarray(valores, dtype=float) * 100).astype(np.int64)
+
+
+def ratear_proporcional(consumos, consumo_total, valor_total) -> np.ndarray:
+    """
+    Distribui valor_total proporcional ao consumo de cada unidade, em centavos inteiros.
+
+    O consumo que sobra (consumo_total - soma das unidades, ou seja, Áreas Comuns)
+    entra como uma parcela a mais. Cada parcela recebe o piso da sua parte exata e
+    os centavos restantes vão para as maiores sobras (método dos maiores restos),
+    então unidades + Áreas Comuns somam exatamente o total da fatura.
+    Consumos são levados a Wh inteiros para que a divisão seja exata em int64.
+
+    Aceita lotes: consumo_total e valor_total podem ser arrays que fazem
+    broadcast com consumos ao longo do último eixo (um total por cenário), e
+    consumos pode ter uma linha de pesos por item do lote.
+    Totais com consumo zero resultam em valores zero. Retorna só as unidades, em R$.
+    """
+    consumos_wh = np.rint(np.asarray(consumos, dtype=float) * 1000).astype(np.int64)
+    total_wh = np.rint(np.asarray(consumo_total, dtype=float) * 1000).astype(np.int64)
+    centavos_total = para_centavos(valor_total)
+    lote = np.broadcast_shapes(total_wh.shape, centavos_total.shape)
+    total_wh = np.broadcast_to(total_wh, lote)[..., np.newaxis]
+    centavos_total = np.broadcast_to(centavos_total, lote)[..., np.newaxis]
+
+    # Parcelas: unidades + sobra de consumo (Áreas Comuns, pode ser negativa)
+    n = consumos_wh.shape[-1]
+    pesos = np.concatenate(
+        [np.broadcast_to(consumos_wh, lote + (n,)), total_wh - consumos_wh.sum(axis=-1, keepdims=True)],
+        axis=-1,
+    )
+
+    # Protege contra divisão por zero
+    divisor = np.where(total_wh > 0, total_wh, 1)
+    numerador = pesos * centavos_total
+    centavos, restos = np.divmod(numerador, divisor)
+    faltam = centavos_total - centavos.sum(axis=-1, keepdims=True)
+
+    # Um centavo a mais para as `faltam` parcelas com maior resto (empate: ordem das unidades)
+    ordem = np.argsort(-restos, axis=-1, kind="stable")
+    extra = np.empty_like(centavos)
+    np.put_along_axis(extra, ordem, (np.arange(n + 1) < faltam).astype(np.int64), axis=-1)
+    centavos = np.where(total_wh > 0, centavos + extra, 0)
+
+    return centavos[..., :n] / 100
+
+
+def ratear(consumos, consumo_total: float, valor_total: float, tarifas: Tarifas | TabelaCompilada, metodo: str) -> np.ndarray:
+    """
+    Calcula o valor de cada unidade conforme o método de rateio.
+    - Faixas individuais: cada unidade calcula como se fosse uma fatura própria
+    - Proporcional: distribui o total da fatura proporcional ao consumo
+    """
+    consumos = np.asarray(consumos, dtype=float)
+    if metodo == "Faixas individuais":
+        return calcular_valor_base(consumos, tarifas)
+    if metodo != "Proporcional ao total da fatura":
+        raise ValueError(f"Método de rateio desconhecido: {metodo}")
+    return ratear_proporcional(consumos, consumo_total, valor_total)
+
+
+def calcular_rateio(
+    nomes,
+    consumos,
+    tarifas: Tarifas | TabelaCompilada,
+    metodo: str,
+    consumo_total: float | None = None,
+) -> ResultadoRateio:
+    """
+    Executa o rateio completo de um prédio, como o botão "Calcular" do app.
+    Se consumo_total for None, usa a soma das quitinetes.
+    A diferença entre o total e a soma das unidades vai para "Áreas Comuns".
+    """
+    consumos = np.asarray(consumos, dtype=float)
+    soma_consumo_individual = float(consumos.sum())
+    if consumo_total is None:
+        consumo_total = soma_consumo_individual
+    consumo_total = float(consumo_total)
+
+    valor_total, valor_base = calcular_fatura_total(consumo_total, tarifas)
+    valores_individuais = ratear(consumos, consumo_total, valor_total, tarifas, metodo)
+    return montar_resultado(nomes, consumos, consumo_total, valor_base, valor_total, valores_individuais)
+
+
+class AreasComuns(NamedTuple):
+    """Linha de Áreas Comuns (diferença entre o prédio e a soma das unidades) e os alertas."""
+    consumo: float
+    valor: float
+    alertas: list
+
+
+def calcular_areas_comuns(
+    consumo_total: float,
+    soma_consumo_individual: float,
+    valor_total: float,
+    soma_centavos_individuais: int,
+) -> AreasComuns:
+    """
+    Consumo e valor de Áreas Comuns a partir das somas das unidades, sem percorrer
+    as unidades. O valor é calculado em centavos inteiros, sem resíduo de ponto flutuante.
+    """
+    consumo_areas_comuns = round(consumo_total - soma_consumo_individual, 2)
+    valor_areas_comuns = int(para_centavos(valor_total) - soma_centavos_individuais) / 100
+
+    # Normaliza ruídos de arredondamento muito pequenos
+    if abs(consumo_areas_comuns) < 0.01:
+        consumo_areas_comuns = 0.0
+
+    # Lista de alertas (avisos) para inconsistências
+    alertas = []
+    if consumo_areas_comuns < 0:
+        alertas.append("Consumo das quitinetes excede o consumo total do prédio. Ajustei Áreas Comuns para 0 kWh.")
+        consumo_areas_comuns = 0.0
+    if valor_areas_comuns < 0:
+        alertas.append("Soma dos valores individuais excede o total da fatura. Ajustei Áreas Comuns para R$ 0,00.")
+        valor_areas_comuns = 0.0
+    return AreasComuns(consumo_areas_comuns, valor_areas_comuns, alertas)
+
+
+def tabela_rateio(nomes, consumos: np.ndarray, valores_individuais: np.ndarray, areas_comuns: AreasComuns) -> pd.DataFrame:
+    """
+    Tabela por unidade, com a linha de Áreas Comuns no fim se houver valor/consumo relevante.
+    A linha entra já na construção do DataFrame (sem df.loc, que copiaria a tabela inteira).
+    nomes pode ser um pd.Index já montado, para não converter a lista de nomes a cada cálculo.
+    """
+    indice = nomes if isinstance(nomes, pd.Index) else pd.Index(list(nomes))
+    if (areas_comuns.consumo != 0.0) or (areas_comuns.valor != 0.0):
+        indice = indice.append(pd.Index([AREAS_COMUNS]))
+        consumos = np.append(consumos, areas_comuns.consumo)
+        valores_individuais = np.append(valores_individuais, areas_comuns.valor)
+    return pd.DataFrame({"Consumo (kWh)": consumos, "Valor (R$)": valores_individuais}, index=indice)
+
+
+def montar_resultado(
+    nomes,
+    consumos: np.ndarray,
+    consumo_total: float,
+    valor_base: float,
+    valor_total: float,
+    valores_individuais: np.ndarray,
+) -> ResultadoRateio:
+    """
+    Tabela por unidade com a linha de Áreas Comuns (diferença entre o total e a soma
+    das unidades) e os alertas. Usada por qualquer modalidade de tarifa.
+    """
+    areas_comuns = calcular_areas_comuns(
+        consumo_total, float(consumos.sum()), valor_total, int(para_centavos(valores_individuais).sum())
+    )
+    df = tabela_rateio(nomes, consumos, valores_individuais, areas_comuns)
+    return ResultadoRateio(df, consumo_total, valor_base, valor_total, areas_comuns.alertas)
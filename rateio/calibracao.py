@@ -0,0 +1,222 @@
+"""
+Calibração das tarifas a partir de faturas anteriores (consumo, bandeira e total).
+
+O total de cada fatura é linear nos parâmetros do modelo de duas faixas:
+    total = (TE+TUSD até 150) × kWh até 150 + (TE+TUSD acima 150) × kWh acima de 150
+          + bandeira até 150 × kWh até 150 + bandeira acima 150 × kWh acima de 150 + COSIP
+com os valores de bandeira próprios de cada bandeira (a verde não tem acréscimo).
+Todas as faturas entram em uma matriz (faturas × parâmetros) e os parâmetros saem
+de um único mínimos quadrados (np.linalg.lstsq), com o resíduo de cada fatura.
+Faturas muito discrepantes (ex.: com multa, juros ou erro de digitação) são
+retiradas e o ajuste é refeito, para não puxarem os preços das demais.
+
+As faturas só trazem TE + TUSD somadas: a divisão entre as duas segue a proporção
+das tarifas de partida.
+
+Uso pela linha de comando:
+    python -m rateio.calibracao FATURAS.csv
+"""
+import argparse
+import sys
+from dataclasses import fields, replace
+from pathlib import Path
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from .calculo import BANDEIRAS, LIMITE_FAIXA_KWH, Tarifas
+
+COLUNA_CONSUMO = "Consumo (kWh)"
+COLUNA_BANDEIRA = "Bandeira"
+COLUNA_TOTAL = "Total (R$)"
+COLUNA_COSIP = "COSIP (R$)"            # opcional: se existir, a COSIP não é ajustada
+ALIASES_TOTAL = ("Total fatura (R$)", "Total da fatura (R$)", "Valor total (R$)")
+TOLERANCIA_PADRAO = 0.05               # R$: resíduo aceito por fatura (arredondamentos da concessionária)
+PASSADAS_AJUSTE = 3                    # ajustes refeitos sem as faturas discrepantes
+
+
+class Calibracao(NamedTuple):
+    """Resultado da calibração."""
+    tarifas: Tarifas                    # tarifas de partida com os valores ajustados
+    parametros: pd.DataFrame            # parâmetro -> valor ajustado e valor de partida
+    bandeiras: pd.DataFrame             # bandeira -> valores até/acima de 150 kWh ajustados
+    residuos: pd.DataFrame              # faturas com Previsto (R$), Resíduo (R$), Fora da tolerância e Usada no ajuste
+    rmse: float                         # das faturas usadas no ajuste
+    alertas: list
+
+
+# ===================== LEITURA =====================
+def ler_faturas(arquivo) -> pd.DataFrame:
+    """Lê a tabela de faturas (.csv ou .xlsx; caminho ou upload) e valida as colunas."""
+    nome = str(getattr(arquivo, "name", arquivo))
+    if nome.lower().endswith(".csv"):
+        faturas = pd.read_csv(arquivo, dtype={COLUNA_BANDEIRA: str})
+    else:
+        faturas = pd.read_excel(arquivo, dtype={COLUNA_BANDEIRA: str})
+    return validar_faturas(faturas)
+
+
+def validar_faturas(faturas: pd.DataFrame) -> pd.DataFrame:
+    """Padroniza a coluna de total e confere colunas, bandeiras e valores numéricos."""
+    faturas = faturas.rename(columns={alias: COLUNA_TOTAL for alias in ALIASES_TOTAL if alias in faturas.columns})
+    faltando = {COLUNA_CONSUMO, COLUNA_BANDEIRA, COLUNA_TOTAL} - set(faturas.columns)
+    if faltando:
+        raise ValueError(f"Tabela de faturas sem as colunas: {', '.join(sorted(faltando))}")
+    faturas = faturas.dropna(subset=[COLUNA_CONSUMO, COLUNA_TOTAL]).reset_index(drop=True)
+    faturas[COLUNA_BANDEIRA] = faturas[COLUNA_BANDEIRA].astype(str).str.strip()
+    desconhecidas = set(faturas[COLUNA_BANDEIRA]) - set(BANDEIRAS)
+    if desconhecidas:
+        raise ValueError(f"Bandeiras desconhecidas: {', '.join(sorted(desconhecidas))}")
+    for coluna in [COLUNA_CONSUMO, COLUNA_TOTAL] + ([COLUNA_COSIP] if COLUNA_COSIP in faturas.columns else []):
+        faturas[coluna] = pd.to_numeric(faturas[coluna], errors="raise")
+    return faturas
+
+
+# ===================== AJUSTE =====================
+def matriz_modelo(faturas: pd.DataFrame, ajustar_cosip: bool = True) -> pd.DataFrame:
+    """Matriz (faturas × parâmetros): kWh de cada fatura que multiplicam cada preço."""
+    consumos = faturas[COLUNA_CONSUMO].to_numpy(dtype=float)
+    ate = np.minimum(consumos, LIMITE_FAIXA_KWH)
+    acima = np.maximum(consumos - LIMITE_FAIXA_KWH, 0.0)
+    colunas = {"TE+TUSD até 150": ate, "TE+TUSD acima 150": acima}
+    bandeiras = faturas[COLUNA_BANDEIRA].to_numpy()
+    for bandeira in BANDEIRAS[1:]:  # verde: sem acréscimo
+        if (bandeiras == bandeira).any():
+            colunas[f"{bandeira} até 150"] = np.where(bandeiras == bandeira, ate, 0.0)
+            colunas[f"{bandeira} acima 150"] = np.where(bandeiras == bandeira, acima, 0.0)
+    if ajustar_cosip:
+        colunas["COSIP"] = np.ones(len(faturas))
+    return pd.DataFrame(colunas, index=faturas.index)
+
+
+def calibrar_tarifas(
+    faturas: pd.DataFrame,
+    tarifas: Tarifas = Tarifas(),
+    tolerancia: float = TOLERANCIA_PADRAO,
+) -> Calibracao:
+    """
+    Ajusta os preços às faturas por mínimos quadrados. A COSIP é ajustada junto, a
+    menos que a tabela tenha a coluna "COSIP (R$)" (aí ela é descontada do total).
+    tarifas dá a proporção TE/TUSD, a bandeira do resultado e os valores que as
+    faturas não permitem ajustar.
+    """
+    faturas = validar_faturas(faturas)
+    ajustar_cosip = COLUNA_COSIP not in faturas.columns
+    matriz = matriz_modelo(faturas, ajustar_cosip)
+    alvo = faturas[COLUNA_TOTAL].to_numpy(dtype=float)
+    if not ajustar_cosip:
+        alvo = alvo - faturas[COLUNA_COSIP].to_numpy(dtype=float)
+
+    alertas = []
+    if len(faturas) < matriz.shape[1]:
+        alertas.append(f"Só {len(faturas)} faturas para {matriz.shape[1]} parâmetros: o ajuste não é único.")
+    usadas = np.ones(len(faturas), dtype=bool)
+    for passada in range(PASSADAS_AJUSTE):
+        coeficientes, _, posto, _ = np.linalg.lstsq(matriz.to_numpy()[usadas], alvo[usadas], rcond=None)
+        if passada == PASSADAS_AJUSTE - 1:
+            break
+        erros = np.abs(alvo - matriz.to_numpy() @ coeficientes)
+        # Discrepante: muito acima do erro típico (mediana absoluta) e da tolerância
+        limite = max(5 * 1.4826 * float(np.median(erros[usadas])) if usadas.any() else 0.0, 10 * tolerancia)
+        novas_usadas = erros <= limite
+        if (novas_usadas == usadas).all() or novas_usadas.sum() < matriz.shape[1]:
+            break
+        usadas = novas_usadas
+    if not usadas.all():
+        alertas.append(f"{int((~usadas).sum())} fatura(s) discrepante(s) ficaram fora do ajuste.")
+    if posto < matriz.shape[1]:
+        alertas.append(
+            "Parâmetros não identificáveis com estas faturas (ex.: nenhuma com mais de 150 kWh, "
+            "ou nenhuma de bandeira verde para separar bandeira de TE+TUSD)."
+        )
+    ajustados = dict(zip(matriz.columns, coeficientes.tolist()))
+    negativos = [nome for nome, valor in ajustados.items() if valor < 0]
+    if negativos:
+        alertas.append(f"Valores negativos no ajuste: {', '.join(negativos)}. Confira as faturas.")
+
+    # Resíduo de cada fatura, com o total previsto arredondado em centavos como na fatura
+    residuos = faturas.copy()
+    previsto = matriz.to_numpy() @ coeficientes
+    if not ajustar_cosip:
+        previsto = previsto + faturas[COLUNA_COSIP].to_numpy(dtype=float)
+    residuos["Previsto (R$)"] = np.round(previsto, 2)
+    residuos["Resíduo (R$)"] = np.round(residuos[COLUNA_TOTAL] - residuos["Previsto (R$)"], 2)
+    totais = residuos[COLUNA_TOTAL].where(residuos[COLUNA_TOTAL] != 0)
+    residuos["Resíduo (%)"] = np.round(100 * residuos["Resíduo (R$)"] / totais, 3)
+    residuos["Fora da tolerância"] = residuos["Resíduo (R$)"].abs() > tolerancia
+    residuos["Usada no ajuste"] = usadas
+    erros = (alvo - matriz.to_numpy() @ coeficientes)[usadas]
+    rmse = float(np.sqrt(np.mean(erros ** 2))) if len(erros) else 0.0
+
+    bandeiras = pd.DataFrame(
+        [(b, ajustados.get(f"{b} até 150", 0.0), ajustados.get(f"{b} acima 150", 0.0))
+         for b in BANDEIRAS if b == BANDEIRAS[0] or f"{b} até 150" in ajustados],
+        columns=["Bandeira", "Bandeira até 150 kWh", "Bandeira acima 150 kWh"],
+    ).set_index("Bandeira")
+    calibradas = _tarifas_ajustadas(tarifas, ajustados, bandeiras)
+
+    partida = {campo.name: getattr(tarifas, campo.name) for campo in fields(Tarifas) if campo.type is float}
+    parametros = pd.DataFrame({
+        "Ajustado": {nome: getattr(calibradas, nome) for nome in partida},
+        "Partida": partida,
+    })
+    return Calibracao(calibradas, parametros, bandeiras, residuos, rmse, alertas)
+
+
+def _tarifas_ajustadas(tarifas: Tarifas, ajustados: dict, bandeiras: pd.DataFrame) -> Tarifas:
+    """Tarifas de partida com TE/TUSD (na proporção original), bandeira e COSIP ajustadas."""
+    valores = {}
+    for faixa in ("ate_150", "acima_150"):
+        te, tusd = getattr(tarifas, f"te_{faixa}"), getattr(tarifas, f"tusd_{faixa}")
+        energia = ajustados["TE+TUSD até 150" if faixa == "ate_150" else "TE+TUSD acima 150"]
+        fracao_te = te / (te + tusd) if te + tusd else 0.5
+        valores[f"te_{faixa}"] = round(energia * fracao_te, 6)
+        valores[f"tusd_{faixa}"] = round(energia * (1 - fracao_te), 6)
+    # Valores de bandeira da bandeira selecionada, se as faturas tiverem essa bandeira
+    if tarifas.bandeira in bandeiras.index:
+        valores["bandeira_ate_150"] = round(float(bandeiras.at[tarifas.bandeira, "Bandeira até 150 kWh"]), 6)
+        valores["bandeira_acima_150"] = round(float(bandeiras.at[tarifas.bandeira, "Bandeira acima 150 kWh"]), 6)
+    if "COSIP" in ajustados:
+        valores["cosip"] = round(ajustados["COSIP"], 2)
+    return replace(tarifas, **valores)
+
+
+# ===================== LINHA DE COMANDO =====================
+def _criar_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m rateio.calibracao",
+        description="Ajusta as tarifas às faturas anteriores e mostra o resíduo de cada fatura.",
+    )
+    parser.add_argument("faturas", help="Arquivo .csv/.xlsx com as colunas Consumo (kWh), Bandeira e Total (R$)")
+    parser.add_argument("--bandeira", choices=BANDEIRAS, default=Tarifas.bandeira, help="Bandeira das tarifas geradas")
+    parser.add_argument("--tolerancia", type=float, default=TOLERANCIA_PADRAO, help="Resíduo aceito por fatura (R$)")
+    parser.add_argument("-o", "--saida", help="Grava os resíduos por fatura neste .csv")
+    return parser
+
+
+def main(argv=None) -> int:
+    args = _criar_parser().parse_args(argv)
+    calibracao = calibrar_tarifas(ler_faturas(Path(args.faturas)), Tarifas(bandeira=args.bandeira), args.tolerancia)
+
+    print(calibracao.parametros.to_string(float_format="{:.6f}".format))
+    print()
+    print(calibracao.bandeiras.to_string(float_format="{:.6f}".format))
+    fora = calibracao.residuos[calibracao.residuos["Fora da tolerância"]]
+    print(f"\nRMSE: R$ {calibracao.rmse:.4f}; {len(fora)} de {len(calibracao.residuos)} faturas fora da tolerância.")
+    if len(fora):
+        print(fora.to_string())
+    for alerta in calibracao.alertas:
+        print(f"⚠️ {alerta}", file=sys.stderr)
+    # Mesmas opções do rateio em lote (python -m rateio)
+    opcoes = " ".join(
+        f"--{nome.replace('_', '-')} {valor:g}" for nome, valor in calibracao.parametros["Ajustado"].items()
+    )
+    print(f"\nOpções para python -m rateio: {opcoes}")
+    if args.saida:
+        calibracao.residuos.to_csv(args.saida, index=False)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+"""
+Comparação de cenários: calcula de uma vez todas as combinações de bandeira,
+bandeira por faixa, método de rateio e fonte do consumo para as mesmas leituras.
+
+Todas as tabelas tarifárias são alinhadas nos mesmos limites de faixa; o custo
+de todas as unidades em todos os cenários sai de um único searchsorted e uma
+multiplicação-soma sobre uma matriz (tabelas × consumos), em inteiros como nas
+tabelas compiladas (mesmos centavos de calcular_rateio).
+"""
+from dataclasses import replace
+from itertools import product
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from .calculo import AREAS_COMUNS, BANDEIRAS, FONTES_CONSUMO, METODOS_RATEIO, Tarifas, compilar, para_centavos, ratear_proporcional
+from .tabela_tarifaria import centavos_de, em_wh
+
+NIVEIS_CENARIO = ["Bandeira", "Bandeira por faixa", "Método de rateio", "Fonte do consumo total"]
+TOTAL_FATURA = "Total fatura"
+
+
+class ComparacaoCenarios(NamedTuple):
+    """
+    valores: uma linha por cenário, uma coluna por unidade (+ Áreas Comuns e Total fatura).
+    deltas: valores menos a linha do cenário atual.
+    """
+    valores: pd.DataFrame
+    deltas: pd.DataFrame
+
+
+def _empilhar_tabelas(lista_tarifas) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Alinha as tabelas compiladas nos mesmos inícios de faixa (Wh).
+    Retorna (inicios, precos, acumulado, cosip), com precos/acumulado de forma (tabelas, faixas).
+    """
+    tabelas = [compilar(tarifas).total for tarifas in lista_tarifas]
+    inicios = np.unique(np.concatenate([tabela.inicios for tabela in tabelas]))
+    precos = np.stack([
+        tabela.precos[np.searchsorted(tabela.inicios, inicios, side="right") - 1] for tabela in tabelas
+    ])
+    acumulado = np.stack([tabela.custo_exato(inicios) for tabela in tabelas])
+    cosip = np.array([compilar(tarifas).cosip for tarifas in lista_tarifas])
+    return inicios, precos, acumulado, cosip
+
+
+def comparar_cenarios(
+    nomes,
+    consumos,
+    tarifas: Tarifas,
+    consumo_predio: float | None,
+    cenario_atual: tuple,
+) -> ComparacaoCenarios:
+    """
+    Calcula o valor de cada unidade em todas as combinações de cenário.
+    consumo_predio é o consumo do medidor principal; se for None, só a fonte
+    "Soma das quitinetes" é considerada. cenario_atual é a tupla
+    (bandeira, usar_bandeira_por_faixa, método, fonte) usada como referência dos
+    deltas; ValueError se ela não estiver entre os cenários comparados.
+    """
+    nomes = list(nomes)
+    consumos = np.asarray(consumos, dtype=float)
+    n = len(consumos)
+
+    # Eixos do cenário
+    variantes_tarifa = list(product(BANDEIRAS, [True, False]))
+    fontes = FONTES_CONSUMO if consumo_predio is not None else ["Soma das quitinetes"]
+    atual = tuple(cenario_atual)
+    if atual[3] not in fontes:
+        raise ValueError(f"Sem o consumo do prédio, a fonte '{atual[3]}' não entra na comparação de cenários")
+    if atual[:2] not in variantes_tarifa or atual[2] not in METODOS_RATEIO:
+        raise ValueError(f"Cenário atual fora dos cenários comparados: {atual}")
+    totais_consumo = np.array([
+        float(consumo_predio) if fonte == "Leituras do prédio" else float(consumos.sum()) for fonte in fontes
+    ])
+
+    # Custo base de unidades e totais para todas as tarifas: (tarifas, n + fontes)
+    inicios, precos, acumulado, cosip = _empilhar_tabelas(
+        [replace(tarifas, bandeira=bandeira, usar_bandeira_por_faixa=por_faixa) for bandeira, por_faixa in variantes_tarifa]
+    )
+    x = em_wh(np.concatenate([consumos, totais_consumo]))
+    k = np.maximum(np.searchsorted(inicios, x, side="right") - 1, 0)
+    custo = centavos_de(acumulado[:, k] + (x - inicios[k]) * precos[:, k]) / 100
+
+    base_unidades = custo[:, :n]                                         # (T, n)
+    valor_total = np.round(custo[:, n:] + cosip[:, np.newaxis], 2)       # (T, F)
+
+    # Valores por método: (T, M, F, n)
+    por_metodo = []
+    for metodo in METODOS_RATEIO:
+        if metodo == "Faixas individuais":
+            valores = np.broadcast_to(base_unidades[:, np.newaxis, :], valor_total.shape + (n,))
+        else:
+            valores = ratear_proporcional(consumos, totais_consumo[np.newaxis, :], valor_total)
+        por_metodo.append(valores)
+    valores = np.stack(por_metodo, axis=1)
+    totais = np.broadcast_to(valor_total[:, np.newaxis, :], valores.shape[:3])
+
+    # Áreas Comuns: o que sobra do total, em centavos inteiros (nunca negativo)
+    areas_comuns = np.maximum(para_centavos(totais) - para_centavos(valores).sum(axis=-1), 0) / 100
+
+    matriz = np.concatenate(
+        [valores.reshape(-1, n), areas_comuns.reshape(-1, 1), totais.reshape(-1, 1)], axis=1
+    )
+    indice = pd.MultiIndex.from_tuples(
+        [(bandeira, por_faixa, metodo, fonte)
+         for (bandeira, por_faixa), metodo, fonte in product(variantes_tarifa, METODOS_RATEIO, fontes)],
+        names=NIVEIS_CENARIO,
+    )
+    df_valores = pd.DataFrame(matriz, index=indice, columns=nomes + [AREAS_COMUNS, TOTAL_FATURA])
+    deltas = (df_valores - df_valores.loc[atual]).round(2)
+    return ComparacaoCenarios(df_valores, deltas)
@@ -0,0 +1,206 @@
+"""
+Demonstrativo individual de cada inquilino (um .xlsx por unidade), reunidos em um ZIP.
+
+Os valores de todos os demonstrativos (composição da tarifa e parcela de Áreas
+Comuns) são calculados de uma vez, em centavos inteiros, no processo principal.
+Só a renderização dos arquivos vai para o pool de processos, em blocos de
+unidades; cada bloco pronto é gravado no ZIP assim que chega e descartado, e no
+máximo 2 blocos por processo ficam em andamento. Assim a memória não cresce com
+o número de unidades, e o ZIP pode ir direto para um arquivo em disco.
+"""
+import io
+import multiprocessing
+import os
+import re
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+import pandas as pd
+
+from .calculo import AREAS_COMUNS, Tarifas, calcular_componentes, ratear_proporcional
+from .importacao import indexar_resumo
+
+MIME_ZIP = "application/zip"
+DIVISOES_AREAS_COMUNS = ["Proporcional ao consumo", "Igual entre as unidades"]
+UNIDADES_POR_BLOCO = 200
+MIN_UNIDADES_POOL = 500  # abaixo disso, criar o pool custa mais que renderizar em série
+
+
+# ===================== VALORES =====================
+def _composicao(
+    consumos: np.ndarray,
+    valores: np.ndarray,
+    consumo_total: float,
+    tarifas: Tarifas,
+    metodo_rateio: str,
+) -> tuple[list[str], np.ndarray]:
+    """
+    Divide o valor de cada unidade entre as componentes da tarifa, em centavos exatos.
+    - Faixas individuais: TE, TUSD e bandeira da própria unidade;
+    - Proporcional: a mesma composição da fatura do prédio (TE, TUSD, bandeira e COSIP).
+    """
+    if metodo_rateio == "Faixas individuais":
+        componentes = calcular_componentes(consumos, tarifas)
+        nomes = ["TE (R$)", "TUSD (R$)", "Bandeira (R$)"]
+        pesos = np.column_stack([componentes.te, componentes.tusd, componentes.bandeira])
+    else:
+        predio = calcular_componentes(consumo_total, tarifas)
+        nomes = ["TE (R$)", "TUSD (R$)", "Bandeira (R$)", "COSIP (R$)"]
+        pesos = np.array([[predio.te, predio.tusd, predio.bandeira, tarifas.cosip]], dtype=float)
+    pesos = np.broadcast_to(pesos, (len(consumos), len(nomes)))
+    return nomes, ratear_proporcional(pesos, pesos.sum(axis=-1), valores)
+
+
+def parcelas_areas_comuns(consumos: np.ndarray, valor_areas_comuns: float, divisao: str = DIVISOES_AREAS_COMUNS[0]) -> np.ndarray:
+    """Parte do valor de Áreas Comuns de cada unidade (R$), somando exatamente o valor total."""
+    if divisao not in DIVISOES_AREAS_COMUNS:
+        raise ValueError(f"Divisão de Áreas Comuns desconhecida: {divisao}")
+    pesos = consumos if divisao == DIVISOES_AREAS_COMUNS[0] else np.ones(len(consumos))
+    return ratear_proporcional(pesos, pesos.sum(), valor_areas_comuns)
+
+
+def montar_demonstrativos(
+    df_resultado: pd.DataFrame,
+    df_resumo: pd.DataFrame,
+    tarifas: Tarifas | None = None,
+    divisao_areas_comuns: str = DIVISOES_AREAS_COMUNS[0],
+) -> pd.DataFrame:
+    """
+    Uma linha por unidade (sem Áreas Comuns) com tudo o que vai no demonstrativo:
+    consumo, valor, composição da tarifa (se tarifas for informada), parcela de
+    Áreas Comuns e total a pagar.
+    """
+    resumo = indexar_resumo(df_resumo)
+    eh_areas_comuns = df_resultado.index.astype(str) == AREAS_COMUNS
+    unidades = df_resultado[~eh_areas_comuns]
+    consumos = unidades["Consumo (kWh)"].to_numpy(dtype=float)
+    valores = unidades["Valor (R$)"].to_numpy(dtype=float)
+    valor_areas_comuns = float(df_resultado.loc[eh_areas_comuns, "Valor (R$)"].sum())
+
+    demonstrativos = pd.DataFrame({"Consumo (kWh)": consumos, "Valor da energia (R$)": valores}, index=unidades.index)
+    metodo = resumo.get("Método de rateio")
+    if tarifas is not None and len(unidades):
+        consumo_total = float(resumo.get("Consumo total (kWh)") or consumos.sum())
+        nomes, composicao = _composicao(consumos, valores, consumo_total, tarifas, metodo)
+        for i, nome in enumerate(nomes):
+            demonstrativos[nome] = composicao[:, i]
+
+    parcelas = parcelas_areas_comuns(consumos, valor_areas_comuns, divisao_areas_comuns)
+    demonstrativos["Áreas Comuns (R$)"] = parcelas
+    demonstrativos["Total a pagar (R$)"] = (np.rint(valores * 100) + np.rint(parcelas * 100)) / 100
+    demonstrativos["Participação no consumo (%)"] = np.round(
+        100 * consumos / consumos.sum() if consumos.sum() > 0 else np.zeros(len(consumos)), 4
+    )
+    demonstrativos.index.name = "Unidade"
+    return demonstrativos
+
+
+# ===================== ARQUIVOS =====================
+def nome_arquivo(unidade: str) -> str:
+    """Nome de arquivo seguro para a unidade (sem barras, dois-pontos etc.)."""
+    return re.sub(r"[^\w\- .]", "_", str(unidade)).strip() + ".xlsx"
+
+
+def _renderizar_bloco(bloco: list[tuple[str, list]]) -> list[tuple[str, bytes]]:
+    """Gera os .xlsx de um bloco de unidades. Roda nos processos do pool (função de módulo)."""
+    import xlsxwriter
+
+    arquivos = []
+    for nome, linhas in bloco:
+        buffer = io.BytesIO()
+        workbook = xlsxwriter.Workbook(buffer, {"in_memory": True, "strings_to_numbers": False})
+        negrito = workbook.add_format({"bold": True})
+        moeda = workbook.add_format({"num_format": "#,##0.00"})
+        ws = workbook.add_worksheet("Demonstrativo")
+        ws.set_column(0, 0, 34)
+        ws.set_column(1, 1, 28)
+        for linha, (item, valor) in enumerate(linhas):
+            ws.write(linha, 0, item, negrito)
+            if isinstance(valor, float):
+                ws.write_number(linha, 1, valor, moeda)
+            elif valor is not None:
+                ws.write(linha, 1, valor)
+        workbook.close()
+        arquivos.append((nome, buffer.getvalue()))
+    return arquivos
+
+
+def _blocos(demonstrativos: pd.DataFrame, cabecalho: list, tamanho: int):
+    """Linhas Item/Valor de cada demonstrativo, em blocos de `tamanho` unidades."""
+    colunas = list(demonstrativos.columns)
+    bloco = []
+    for unidade, *valores in demonstrativos.itertuples(name=None):
+        linhas = cabecalho + [("Unidade", str(unidade))] + [(c, float(v)) for c, v in zip(colunas, valores)]
+        bloco.append((nome_arquivo(unidade), linhas))
+        if len(bloco) == tamanho:
+            yield bloco
+            bloco = []
+    if bloco:
+        yield bloco
+
+
+def gerar_zip_demonstrativos(
+    df_resultado: pd.DataFrame,
+    df_resumo: pd.DataFrame,
+    destino,
+    tarifas: Tarifas | None = None,
+    divisao_areas_comuns: str = DIVISOES_AREAS_COMUNS[0],
+    processos: int | None = None,
+    predio: str | None = None,
+    unidades_por_bloco: int = UNIDADES_POR_BLOCO,
+) -> int:
+    """
+    Grava em destino (caminho ou arquivo binário) um ZIP com um demonstrativo por unidade.
+    processos=1 (ou poucas unidades) renderiza em série, sem pool. Retorna o número de arquivos.
+    """
+    demonstrativos = montar_demonstrativos(df_resultado, df_resumo, tarifas, divisao_areas_comuns)
+    resumo = indexar_resumo(df_resumo)
+    cabecalho = [
+        ("Prédio", predio),
+        ("Identificação", resumo.get("Identificação")),
+        ("Consumo total do prédio (kWh)", resumo.get("Consumo total (kWh)")),
+        ("Total da fatura do prédio (R$)", resumo.get("Total fatura (R$)")),
+        ("Método de rateio", resumo.get("Método de rateio")),
+        ("Divisão de Áreas Comuns", divisao_areas_comuns),
+    ]
+    cabecalho = [(item, valor) for item, valor in cabecalho if valor is not None]
+    blocos = _blocos(demonstrativos, cabecalho, unidades_por_bloco)
+
+    total = 0
+    # Arquivos .xlsx já são compactados: ZIP_STORED evita recomprimir
+    with zipfile.ZipFile(destino, "w", zipfile.ZIP_STORED) as arquivo_zip:
+        nomes_usados = set()
+
+        def gravar(arquivos):
+            nonlocal total
+            for nome, conteudo in arquivos:
+                # Unidades com o mesmo nome de arquivo ganham um sufixo
+                base, sufixo = nome[:-5], 2
+                while nome in nomes_usados:
+                    nome, sufixo = f"{base} ({sufixo}).xlsx", sufixo + 1
+                nomes_usados.add(nome)
+                arquivo_zip.writestr(nome, conteudo)
+                total += 1
+
+        if processos == 1 or len(demonstrativos) < MIN_UNIDADES_POOL:
+            for bloco in blocos:
+                gravar(_renderizar_bloco(bloco))
+            return total
+
+        processos = processos or os.cpu_count() or 1
+        # Chamado de dentro do servidor do Streamlit (várias threads e sockets abertos):
+        # com fork, os processos herdariam travas e conexões no estado em que estivessem
+        metodo = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        with ProcessPoolExecutor(max_workers=processos, mp_context=multiprocessing.get_context(metodo)) as pool:
+            max_pendentes = 2 * processos
+            pendentes = set()
+            for bloco in blocos:
+                pendentes.add(pool.submit(_renderizar_bloco, bloco))
+                if len(pendentes) >= max_pendentes:
+                    prontos, pendentes = wait(pendentes, return_when=FIRST_COMPLETED)
+                    for futuro in prontos:
+                        gravar(futuro.result())
+            for futuro in pendentes:
+                gravar(futuro.result())
+    return total
@@ -0,0 +1,187 @@
+"""
+Montagem das tabelas de resumo/histórico e geração do relatório Excel
+(abas Rateio, Resumo e Histórico), compartilhadas pelo app e pelo modo em lote.
+O xlsxwriter só é importado quando um relatório é gerado.
+"""
+import io
+
+import numpy as np
+import pandas as pd
+
+from .cache import CacheLRU, hash_dataframes
+from .calculo import ResultadoRateio, Tarifas
+
+MIME_XLSX = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+# Relatórios já gerados, indexados pelo hash das abas (compartilhado entre sessões)
+_cache_relatorios = CacheLRU(max_itens=32)
+
+
+# ===================== TABELAS DO RELATÓRIO =====================
+def montar_resumo(
+    nome_simulacao: str,
+    resultado: ResultadoRateio,
+    tarifas: Tarifas,
+    metodo_rateio: str,
+    fonte_consumo: str,
+    leitura_predio_at,
+) -> pd.DataFrame:
+    """
+    Monta a aba Resumo (colunas Item/Valor) no formato lido pela importação do backup.
+    """
+    resumo_dict = {
+        "Identificação": nome_simulacao,
+        "Consumo total (kWh)": resultado.consumo_total,
+        "Valor base (R$)": resultado.valor_base,
+        "COSIP (R$)": tarifas.cosip,
+        "Total fatura (R$)": resultado.valor_total,
+        "Bandeira por faixa": "Sim" if tarifas.usar_bandeira_por_faixa else "Não",
+        "Método de rateio": metodo_rateio,
+        "Fonte do consumo total": fonte_consumo,
+        "Leitura do prédio (kWh)": leitura_predio_at,
+    }
+    return pd.DataFrame(list(resumo_dict.items()), columns=["Item", "Valor"])
+
+
+def linhas_historico(nome_simulacao: str, df: pd.DataFrame, valor_total: float, consumo_total: float) -> pd.DataFrame:
+    """
+    Converte o resultado de uma simulação em linhas de histórico: cada unidade vira uma
+    linha, com colunas extras Identificação, Consumo Total e Valor Total.
+    """
+    linha = df.copy()
+    linha["Identificação"] = nome_simulacao
+    linha["Consumo Total"] = consumo_total
+    linha["Valor Total"] = valor_total
+    return linha.reset_index()
+
+
+def montar_aba_rateio(df_resultado: pd.DataFrame, leituras_atuais) -> pd.DataFrame:
+    """
+    Prepara a aba Rateio: índice "Unidade" e coluna de leitura atual (apenas para quitinetes).
+    leituras_atuais é uma sequência alinhada com as linhas de df_resultado.
+    """
+    df_export = df_resultado.copy()
+    df_export.index.name = "Unidade"
+    leituras = np.zeros(len(df_export))
+    n = min(len(leituras_atuais), len(df_export))
+    leituras[:n] = np.asarray(leituras_atuais[:n], dtype=float)
+    # Coluna float: leituras fracionárias não cabem numa coluna iniciada com 0 inteiro
+    quitinetes = np.array([isinstance(u, str) and u.startswith("Quitinete") for u in df_export.index], dtype=bool)
+    df_export["Leitura atual (kWh)"] = np.where(quitinetes, leituras, 0.0)
+    return df_export
+
+
+# ===================== EXCEL =====================
+def _larguras_colunas(df: pd.DataFrame, index: bool) -> list[int]:
+    """
+    Largura de cada coluna (maior texto da coluna, incluindo o cabeçalho, + 2),
+    calculada com operações de string vetorizadas em vez de visitar cada célula.
+    """
+    colunas = [df.index.to_series()] if index else []
+    cabecalhos = [df.index.name or ""] if index else []
+    colunas += [df[col] for col in df.columns]
+    cabecalhos += [str(col) for col in df.columns]
+
+    larguras = []
+    for cabecalho, serie in zip(cabecalhos, colunas):
+        valores = serie.dropna()
+        maior = int(valores.astype(str).str.len().max()) if len(valores) else 0
+        larguras.append(max(maior, len(cabecalho)) + 2)
+    return larguras
+
+
+def _valor_celula(valor):
+    """Converte valores do pandas/NumPy para tipos aceitos pelo xlsxwriter (NaN, NaT e NA viram célula vazia)."""
+    # Antes do teste de "year": pd.NaT também tem esse atributo e quebraria o write_datetime
+    if pd.isna(valor):
+        return None
+    if isinstance(valor, pd.Timestamp):
+        return valor.to_pydatetime()
+    if hasattr(valor, "item"):  # escalares NumPy
+        return valor.item()
+    return valor
+
+
+def _escrever_aba(workbook, nome: str, df: pd.DataFrame, index: bool, formatos: dict) -> None:
+    """
+    Escreve um DataFrame linha a linha. Com constant_memory, cada linha vai para
+    o disco assim que a próxima começa, então a memória não cresce com o tamanho da aba.
+    """
+    ws = workbook.add_worksheet(nome)
+    for col, largura in enumerate(_larguras_colunas(df, index)):
+        ws.set_column(col, col, largura)
+
+    cabecalho = ([df.index.name or ""] if index else []) + [str(col) for col in df.columns]
+    ws.write_row(0, 0, cabecalho, formatos["cabecalho"])
+
+    for linha, valores in enumerate(df.itertuples(index=index, name=None), start=1):
+        for col, valor in enumerate(valores):
+            valor = _valor_celula(valor)
+            if valor is None:
+                continue
+            if index and col == 0:
+                ws.write(linha, col, valor, formatos["cabecalho"])  # índice em negrito, como no pandas
+            elif hasattr(valor, "year"):
+                ws.write_datetime(linha, col, valor, formatos["data"])
+            else:
+                ws.write(linha, col, valor)
+
+
+def gerar_relatorio_excel(
+    df_rateio: pd.DataFrame | None,
+    df_resumo: pd.DataFrame | None = None,
+    df_historico: pd.DataFrame | None = None,
+) -> bytes:
+    """
+    Gera o arquivo Excel do relatório e retorna seus bytes.
+    df_rateio já deve estar no formato de montar_aba_rateio.
+    As abas são gravadas em modo streaming (xlsxwriter constant_memory).
+    """
+    import xlsxwriter
+
+    buffer = io.BytesIO()
+    workbook = xlsxwriter.Workbook(buffer, {"constant_memory": True, "strings_to_numbers": False})
+    formatos = {
+        "cabecalho": workbook.add_format({"bold": True, "border": 1, "align": "center", "valign": "top"}),
+        "data": workbook.add_format({"num_format": "yyyy-mm-dd hh:mm:ss"}),
+    }
+    try:
+        wrote_any_sheet = False  # Flag para saber se alguma aba foi escrita
+
+        # --- Aba Rateio ---
+        if df_rateio is not None:
+            _escrever_aba(workbook, "Rateio", df_rateio, True, formatos)
+            wrote_any_sheet = True
+
+        # --- Aba Resumo ---
+        if df_resumo is not None:
+            _escrever_aba(workbook, "Resumo", df_resumo, False, formatos)
+            wrote_any_sheet = True
+
+        # --- Aba Histórico ---
+        if df_historico is not None:
+            _escrever_aba(workbook, "Histórico", df_historico, False, formatos)
+            wrote_any_sheet = True
+
+        # Se nenhuma aba foi escrita, cria uma aba padrão
+        if not wrote_any_sheet:
+            _escrever_aba(workbook, "Vazio", pd.DataFrame({'Mensagem': ['Nenhum dado disponível']}), True, formatos)
+
+    except Exception as e:
+        _escrever_aba(workbook, "Erro", pd.DataFrame({'Erro': [str(e)]}), True, formatos)
+
+    workbook.close()
+    return buffer.getvalue()
+
+
+def relatorio_excel_em_cache(
+    df_rateio: pd.DataFrame,
+    df_resumo: pd.DataFrame | None = None,
+    df_historico: pd.DataFrame | None = None,
+) -> bytes:
+    """
+    Igual a gerar_relatorio_excel, mas reaproveita os bytes já gerados para o mesmo
+    conteúdo (hash de Rateio, Resumo e Histórico). O cache guarda no máximo 32 relatórios.
+    """
+    chave = hash_dataframes(df_rateio, df_resumo, df_historico)
+    return _cache_relatorios.obter(chave, lambda: gerar_relatorio_excel(df_rateio, df_resumo, df_historico))
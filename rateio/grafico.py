@@ -0,0 +1,112 @@
+"""
+Gráfico de consumo por unidade, pensado para prédios grandes.
+
+Um único trace para todas as unidades (em vez de um por unidade), opção de
+mostrar só as N maiores e somar o resto em "Outras", ordenação, e renderização
+WebGL (Scattergl) quando há muitos pontos. As figuras ficam em cache pelo hash
+do resultado e pelas opções escolhidas.
+
+O plotly só é importado ao montar a primeira figura, para não pesar na
+inicialização do app enquanto não há resultado para mostrar.
+"""
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pandas as pd
+
+from .cache import CacheLRU, hash_dataframes
+
+if TYPE_CHECKING:
+    import plotly.graph_objects as go
+
+ORDENACOES = ["Maior consumo", "Menor consumo", "Ordem da tabela", "Nome"]
+MODOS_GRAFICO = ["Automático", "Barras", "Pontos (WebGL)"]
+LIMITE_BARRAS = 200  # acima disso o modo automático usa WebGL
+
+# Figuras já montadas, por hash do resultado + opções (compartilhado entre sessões)
+_cache_figuras = CacheLRU(max_itens=32)
+
+
+def dados_grafico(df_resultado: pd.DataFrame, top_n: int = 0, ordenacao: str = ORDENACOES[0]) -> pd.DataFrame:
+    """
+    Tabela Unidade / Consumo (kWh) para o gráfico.
+    Com top_n > 0, mantém as N unidades de maior consumo e soma as demais em uma
+    barra "Outras (k unidades)", sempre no fim.
+    """
+    dados = pd.DataFrame({
+        "Unidade": df_resultado.index.astype(str),
+        "Consumo (kWh)": pd.to_numeric(df_resultado["Consumo (kWh)"], errors="coerce").fillna(0).to_numpy(dtype=float),
+    })
+
+    outras = None
+    if 0 < top_n < len(dados):
+        # argpartition: separa as N maiores sem ordenar a tabela inteira
+        consumos = dados["Consumo (kWh)"].to_numpy()
+        maiores = np.zeros(len(dados), dtype=bool)
+        maiores[np.argpartition(-consumos, top_n - 1)[:top_n]] = True
+        resto = dados[~maiores]
+        outras = pd.DataFrame({
+            "Unidade": [f"Outras ({len(resto)} unidades)"],
+            "Consumo (kWh)": [resto["Consumo (kWh)"].sum()],
+        })
+        dados = dados[maiores]
+
+    if ordenacao == "Maior consumo":
+        dados = dados.sort_values("Consumo (kWh)", ascending=False, kind="stable")
+    elif ordenacao == "Menor consumo":
+        dados = dados.sort_values("Consumo (kWh)", ascending=True, kind="stable")
+    elif ordenacao == "Nome":
+        dados = dados.sort_values("Unidade", kind="stable")
+
+    if outras is not None:
+        dados = pd.concat([dados, outras])
+    return dados.reset_index(drop=True)
+
+
+def figura_consumo(dados: pd.DataFrame, modo: str = MODOS_GRAFICO[0]) -> "go.Figure":
+    """Monta a figura com um único trace: barras, ou pontos WebGL para muitas unidades."""
+    import plotly.graph_objects as go
+
+    usar_webgl = modo == "Pontos (WebGL)" or (modo == "Automático" and len(dados) > LIMITE_BARRAS)
+    x = dados["Unidade"].to_numpy()
+    y = dados["Consumo (kWh)"].to_numpy()
+
+    if usar_webgl:
+        trace = go.Scattergl(
+            x=x, y=y, mode="markers",
+            marker={"color": y, "colorscale": "Viridis", "size": 6},
+            hovertemplate="%{x}<br>%{y:,.1f} kWh<extra></extra>",
+        )
+    else:
+        trace = go.Bar(
+            x=x, y=y,
+            marker={"color": y, "colorscale": "Viridis"},
+            text=y, texttemplate="%{text:,.1f}", textposition="outside",
+            hovertemplate="%{x}<br>%{y:,.1f} kWh<extra></extra>",
+        )
+
+    fig = go.Figure(trace)
+    fig.update_layout(
+        xaxis={"title": "Unidade", "type": "category", "categoryorder": "array", "categoryarray": x},
+        yaxis={"title": "Consumo (kWh)"},
+        showlegend=False,
+        margin={"t": 30},
+    )
+    # Rótulos do eixo X só atrapalham quando há centenas de unidades
+    if len(dados) > LIMITE_BARRAS:
+        fig.update_xaxes(showticklabels=False)
+    return fig
+
+
+def figura_em_cache(
+    df_resultado: pd.DataFrame,
+    top_n: int = 0,
+    ordenacao: str = ORDENACOES[0],
+    modo: str = MODOS_GRAFICO[0],
+) -> "go.Figure":
+    """
+    Retorna a figura do resultado, montando-a só na primeira vez para o mesmo
+    conteúdo e as mesmas opções.
+    """
+    chave = (hash_dataframes(df_resultado), int(top_n), ordenacao, modo)
+    return _cache_figuras.obter(chave, lambda: figura_consumo(dados_grafico(df_resultado, top_n, ordenacao), modo))
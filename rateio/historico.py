@@ -0,0 +1,147 @@
+"""
+Histórico persistente de rateios em SQLite (somente inserção).
+
+Cada cálculo grava uma linha por unidade, indexada por prédio, mês e unidade.
+As leituras são feitas em janelas (por mês e/ou por página), então nada do
+histórico precisa ficar inteiro em memória.
+
+Diferente do histórico antigo em session_state (um por sessão do navegador),
+o banco é um só para o servidor: por padrão historico_rateio.sqlite3 no
+diretório atual (ou RATEIO_HISTORICO_DB). Todas as sessões veem o mesmo
+histórico de cada prédio, e limpar() apaga o do prédio para todas elas.
+"""
+import os
+import sqlite3
+from contextlib import closing
+from datetime import datetime
+
+import pandas as pd
+
+CAMINHO_PADRAO = os.environ.get("RATEIO_HISTORICO_DB", "historico_rateio.sqlite3")
+
+# Colunas do banco -> cabeçalhos da aba Histórico (os mesmos gerados por linhas_historico;
+# "index" é o cabeçalho que a aba sempre teve para a unidade)
+COLUNAS_HISTORICO = {
+    "unidade": "index",
+    "consumo_kwh": "Consumo (kWh)",
+    "valor": "Valor (R$)",
+    "identificacao": "Identificação",
+    "consumo_total": "Consumo Total",
+    "valor_total": "Valor Total",
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS historico (
+    id            INTEGER PRIMARY KEY AUTOINCREMENT,
+    predio        TEXT NOT NULL,
+    mes           TEXT NOT NULL,   -- AAAA-MM
+    unidade       TEXT NOT NULL,
+    identificacao TEXT,
+    consumo_kwh   REAL,
+    valor         REAL,
+    consumo_total REAL,
+    valor_total   REAL,
+    criado_em     TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_historico_predio_mes_unidade ON historico (predio, mes, unidade);
+"""
+
+
+class HistoricoSQLite:
+    """
+    Armazena o histórico de rateios em um arquivo SQLite.
+    Abre uma conexão por operação, então pode ser usado por várias threads/sessões.
+    """
+
+    def __init__(self, caminho=CAMINHO_PADRAO):
+        self.caminho = str(caminho)
+        with closing(self._conectar()) as con:
+            con.execute("PRAGMA journal_mode=WAL")
+            con.executescript(_SCHEMA)
+
+    def _conectar(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.caminho, timeout=30)
+
+    # ===================== ESCRITA =====================
+    def adicionar(
+        self,
+        predio: str,
+        mes: str,
+        nome_simulacao: str,
+        df: pd.DataFrame,
+        valor_total: float,
+        consumo_total: float,
+    ) -> int:
+        """
+        Acrescenta as linhas de um resultado (uma por unidade, incluindo Áreas Comuns).
+        Retorna o número de linhas gravadas.
+        """
+        criado_em = datetime.now().isoformat(timespec="seconds")
+        linhas = [
+            (predio, mes, str(unidade), nome_simulacao, float(consumo), float(valor),
+             float(consumo_total), float(valor_total), criado_em)
+            for unidade, consumo, valor in zip(df.index, df["Consumo (kWh)"], df["Valor (R$)"])
+        ]
+        with closing(self._conectar()) as con, con:
+            con.executemany(
+                "INSERT INTO historico (predio, mes, unidade, identificacao, consumo_kwh, valor,"
+                " consumo_total, valor_total, criado_em) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                linhas,
+            )
+        return len(linhas)
+
+    def limpar(self, predio: str) -> None:
+        """Apaga todo o histórico de um prédio, para todas as sessões (botão "Iniciar novo histórico")."""
+        with closing(self._conectar()) as con, con:
+            con.execute("DELETE FROM historico WHERE predio = ?", (predio,))
+
+    # ===================== LEITURA =====================
+    @staticmethod
+    def _filtro(predio, mes_inicio, mes_fim) -> tuple[str, list]:
+        condicoes, params = ["predio = ?"], [predio]
+        if mes_inicio is not None:
+            condicoes.append("mes >= ?")
+            params.append(mes_inicio)
+        if mes_fim is not None:
+            condicoes.append("mes <= ?")
+            params.append(mes_fim)
+        return " AND ".join(condicoes), params
+
+    def contar(self, predio: str, mes_inicio: str | None = None, mes_fim: str | None = None) -> int:
+        """Número de linhas do histórico do prédio na janela de meses."""
+        where, params = self._filtro(predio, mes_inicio, mes_fim)
+        with closing(self._conectar()) as con:
+            return con.execute(f"SELECT COUNT(*) FROM historico WHERE {where}", params).fetchone()[0]
+
+    def ler(
+        self,
+        predio: str,
+        mes_inicio: str | None = None,
+        mes_fim: str | None = None,
+        limite: int | None = None,
+        deslocamento: int = 0,
+    ) -> pd.DataFrame:
+        """
+        Lê uma janela do histórico do prédio, na ordem de gravação, já com os
+        cabeçalhos da aba Histórico. Sem limite, lê toda a janela de meses.
+        """
+        where, params = self._filtro(predio, mes_inicio, mes_fim)
+        sql = f"SELECT {', '.join(COLUNAS_HISTORICO)} FROM historico WHERE {where} ORDER BY id"
+        if limite is not None:
+            sql += " LIMIT ? OFFSET ?"
+            params += [limite, deslocamento]
+        with closing(self._conectar()) as con:
+            df = pd.read_sql_query(sql, con, params=params)
+        return df.rename(columns=COLUNAS_HISTORICO)
+
+    def pagina(self, predio: str, numero: int, tamanho: int = 50) -> pd.DataFrame:
+        """Página `numero` (começando em 1) do histórico do prédio."""
+        return self.ler(predio, limite=tamanho, deslocamento=(numero - 1) * tamanho)
+
+    def meses(self, predio: str) -> list[str]:
+        """Meses (AAAA-MM) com registros para o prédio, em ordem crescente."""
+        with closing(self._conectar()) as con:
+            linhas = con.execute(
+                "SELECT DISTINCT mes FROM historico WHERE predio = ? ORDER BY mes", (predio,)
+            ).fetchall()
+        return [mes for (mes,) in linhas]
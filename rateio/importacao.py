@@ -0,0 +1,123 @@
+"""
+Leitura do backup do mês anterior (planilha com as abas Resumo e Rateio).
+
+A planilha é aberta uma única vez em modo somente leitura e apenas as abas
+necessárias são lidas. importar_backup_em_cache ainda guarda o resultado já
+indexado pelo hash do conteúdo, para não reprocessar o mesmo arquivo a cada rerun.
+O openpyxl só é importado na primeira leitura de um backup.
+"""
+import hashlib
+import io
+from typing import NamedTuple
+
+import pandas as pd
+
+from .cache import CacheLRU
+from .calculo import AREAS_COMUNS
+
+
+class BackupImportado(NamedTuple):
+    """Abas lidas de um backup: Resumo, Rateio e (se existir) Histórico."""
+    resumo: pd.DataFrame
+    rateio: pd.DataFrame
+    historico: pd.DataFrame | None
+
+
+class BackupIndexado(NamedTuple):
+    """Backup pronto para o app: abas lidas, itens do Resumo em dict e leituras anteriores."""
+    resumo: pd.DataFrame
+    rateio: pd.DataFrame
+    itens: dict
+    prev_map: dict
+
+
+# Backups já processados, indexados pelo hash do arquivo (compartilhado entre sessões)
+_cache_backups = CacheLRU(max_itens=16)
+
+
+def _ler_aba(ws) -> pd.DataFrame:
+    """Converte uma aba (openpyxl, somente leitura) em DataFrame usando a 1ª linha como cabeçalho."""
+    linhas = ws.iter_rows(values_only=True)
+    cabecalho = next(linhas, None)
+    if cabecalho is None:
+        return pd.DataFrame()
+    # Ignora linhas totalmente vazias (comuns no fim de abas editadas à mão)
+    dados = [linha for linha in linhas if any(valor is not None for valor in linha)]
+    return pd.DataFrame(dados, columns=list(cabecalho))
+
+
+def ler_backup(arquivo, ler_historico: bool = False) -> BackupImportado:
+    """
+    Lê as abas Resumo e Rateio (ou a primeira aba, se Rateio não existir) de um backup.
+    arquivo pode ser um caminho, bytes ou um objeto de arquivo (ex.: upload do Streamlit).
+    """
+    from openpyxl import load_workbook
+
+    if isinstance(arquivo, bytes):
+        arquivo = io.BytesIO(arquivo)
+    wb = load_workbook(arquivo, read_only=True, data_only=True)
+    try:
+        # Lê aba Resumo
+        resumo_imp = _ler_aba(wb["Resumo"])
+
+        # Lê aba Rateio (ou primeira aba se não existir)
+        if "Rateio" in wb.sheetnames:
+            rateio_imp = _ler_aba(wb["Rateio"])
+        else:
+            rateio_imp = _ler_aba(wb.worksheets[0]) if wb.sheetnames else pd.DataFrame()
+
+        historico_imp = None
+        if ler_historico and "Histórico" in wb.sheetnames:
+            historico_imp = _ler_aba(wb["Histórico"])
+    finally:
+        wb.close()
+
+    # 🔧 Força cabeçalhos consistentes se não existirem (a coluna da unidade sem nome);
+    # a ordem é a da aba exportada: Unidade, Consumo, Valor e, nos backups novos, Leitura atual
+    if "Unidade" not in rateio_imp.columns:
+        padrao = ["Unidade", "Consumo (kWh)", "Valor (R$)", "Leitura atual (kWh)"]
+        rateio_imp.columns = padrao[: len(rateio_imp.columns)] + list(rateio_imp.columns[len(padrao):])
+
+    return BackupImportado(resumo_imp, rateio_imp, historico_imp)
+
+
+def indexar_resumo(resumo: pd.DataFrame | None) -> dict:
+    """Dict Item -> Valor da aba Resumo (vale a primeira ocorrência de cada item)."""
+    if resumo is None or "Item" not in resumo.columns or "Valor" not in resumo.columns:
+        return {}
+    itens = {}
+    for item, valor in zip(resumo["Item"], resumo["Valor"]):
+        itens.setdefault(item, valor)
+    return itens
+
+
+def item_resumo(resumo: pd.DataFrame | None, item: str):
+    """Retorna o valor de um item da aba Resumo, ou None se não existir."""
+    return indexar_resumo(resumo).get(item)
+
+
+def importar_backup_em_cache(conteudo: bytes) -> BackupIndexado:
+    """
+    Lê e indexa um backup a partir dos bytes do arquivo. O resultado fica em cache
+    pelo hash do conteúdo: reenviar (ou manter carregado) o mesmo arquivo não relê a planilha.
+    """
+    chave = hashlib.blake2b(conteudo, digest_size=16).hexdigest()
+
+    def importar() -> BackupIndexado:
+        resumo_imp, rateio_imp, _ = ler_backup(conteudo)
+        return BackupIndexado(resumo_imp, rateio_imp, indexar_resumo(resumo_imp), leituras_anteriores(rateio_imp))
+
+    return _cache_backups.obter(chave, importar)
+
+
+def leituras_anteriores(rateio: pd.DataFrame) -> dict:
+    """
+    Leitura anterior de cada quitinete a partir da aba Rateio do backup, usada
+    pelo app (importar_backup_em_cache) e pelo rateio em lote.
+    Usa a coluna "Leitura atual (kWh)" quando o backup a tiver; backups antigos
+    só têm "Consumo (kWh)", que é usado no lugar dela.
+    Áreas Comuns não tem medidor próprio e fica de fora.
+    """
+    coluna = "Leitura atual (kWh)" if "Leitura atual (kWh)" in rateio.columns else "Consumo (kWh)"
+    quitinetes = rateio[~rateio["Unidade"].astype(str).str.contains(AREAS_COMUNS, regex=False)]
+    return dict(zip(quitinetes["Unidade"], quitinetes[coluna]))
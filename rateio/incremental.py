@@ -0,0 +1,163 @@
+"""
+Recálculo incremental do rateio: quando o operador corrige uma leitura, só as
+unidades alteradas são recalculadas.
+
+RateioIncremental guarda, entre um cálculo e o seguinte, o consumo (em Wh
+inteiros) e o valor (em centavos inteiros) de cada unidade, além das somas de
+consumo e de valor usadas na linha de Áreas Comuns.
+
+- Faixas individuais: o valor de cada unidade só depende do próprio consumo,
+  então só as unidades alteradas passam pelas faixas;
+- Proporcional: a parte exata (piso e resto da divisão em centavos) também é
+  guardada por unidade. Se a fatura do prédio não mudou, só as partes das
+  unidades alteradas e de Áreas Comuns são refeitas; se mudou (consumo total
+  do prédio, ou soma das quitinetes), todas as partes são reescaladas para o
+  novo total de uma vez. Os centavos que sobram vão para os maiores restos,
+  como em ratear_proporcional.
+
+Mudança de tarifas, método ou lista de unidades refaz o cálculo inteiro. Os
+valores são os mesmos de calcular_rateio com as mesmas entradas; a soma das
+quitinetes é feita em Wh inteiros, então não acumula resíduo de ponto flutuante.
+"""
+import numpy as np
+import pandas as pd
+
+from .calculo import (
+    ResultadoRateio,
+    Tarifas,
+    calcular_areas_comuns,
+    calcular_fatura_total,
+    calcular_valor_base,
+    para_centavos,
+    tabela_rateio,
+)
+from .tabela_tarifaria import TabelaCompilada
+
+FAIXAS_INDIVIDUAIS = "Faixas individuais"
+PROPORCIONAL = "Proporcional ao total da fatura"
+
+
+def _em_wh(consumos) -> np.ndarray:
+    return np.rint(np.asarray(consumos, dtype=float) * 1000).astype(np.int64)
+
+
+def _maiores_restos(restos: np.ndarray, faltam: int) -> np.ndarray:
+    """
+    1 para as `faltam` parcelas de maior resto (empate: a de menor posição), 0 para as outras.
+    Mesma escolha da ordenação estável de ratear_proporcional, sem ordenar o array inteiro.
+    """
+    extra = np.zeros(len(restos), dtype=np.int64)
+    faltam = min(max(faltam, 0), len(restos))
+    if faltam == 0:
+        return extra
+    limite = np.partition(restos, len(restos) - faltam)[len(restos) - faltam]
+    acima = restos > limite
+    extra[acima] = 1
+    extra[np.flatnonzero(restos == limite)[: faltam - int(acima.sum())]] = 1
+    return extra
+
+
+class RateioIncremental:
+    """
+    Rateio de um prédio que reaproveita o cálculo anterior. Uma instância por
+    sessão (ou por prédio): chame calcular() a cada clique em "Calcular".
+    """
+
+    def __init__(self):
+        self._tarifas = None
+        self._chave = None          # (método, nomes): se mudar, ou as tarifas, recalcula tudo
+        self._indice = None         # nomes já convertidos no índice da tabela
+        self._consumos = None       # kWh informados, para detectar as unidades alteradas
+        self._wh = None             # consumo de cada unidade em Wh inteiros
+        self._centavos = None       # valor de cada unidade em centavos
+        self._soma_wh = 0
+        self._soma_centavos = 0
+        self._fatura = None         # (consumo total em Wh, centavos da fatura) da parte proporcional
+        self._pisos = None          # parte inteira e resto de cada parcela (unidades + Áreas Comuns)
+        self._restos = None
+        self.recalculadas = 0       # unidades recalculadas na última chamada
+
+    def limpar(self) -> None:
+        """Descarta o cálculo guardado; o próximo calcular() refaz tudo."""
+        self.__init__()
+
+    def calcular(
+        self,
+        nomes,
+        consumos,
+        tarifas: Tarifas | TabelaCompilada,
+        metodo: str,
+        consumo_total: float | None = None,
+    ) -> ResultadoRateio:
+        """
+        Mesmo contrato de calcular_rateio. Se consumo_total for None, usa a soma das quitinetes.
+        """
+        if metodo not in (FAIXAS_INDIVIDUAIS, PROPORCIONAL):
+            raise ValueError(f"Método de rateio desconhecido: {metodo}")
+        consumos = np.array(consumos, dtype=float)
+        chave = (metodo, tuple(nomes))
+
+        if chave != self._chave or not self._mesmas_tarifas(tarifas) or len(consumos) != len(self._consumos):
+            alteradas = np.arange(len(consumos))
+            self._chave, self._tarifas = chave, tarifas
+            self._indice = pd.Index(list(nomes))
+            self._wh = np.zeros(len(consumos), dtype=np.int64)
+            self._centavos = np.zeros(len(consumos), dtype=np.int64)
+            self._soma_wh = self._soma_centavos = 0
+            self._fatura = None
+        else:
+            alteradas = np.flatnonzero(consumos != self._consumos)
+        self._consumos = consumos
+        self.recalculadas = len(alteradas)
+
+        # Soma das unidades mantida pela diferença das alteradas
+        wh_novos = _em_wh(consumos[alteradas])
+        self._soma_wh += int((wh_novos - self._wh[alteradas]).sum())
+        self._wh[alteradas] = wh_novos
+
+        soma_consumo = self._soma_wh / 1000
+        consumo_total = soma_consumo if consumo_total is None else float(consumo_total)
+        valor_total, valor_base = calcular_fatura_total(consumo_total, tarifas)
+
+        if metodo == FAIXAS_INDIVIDUAIS:
+            novos = para_centavos(calcular_valor_base(consumos[alteradas], tarifas))
+            self._soma_centavos += int((novos - self._centavos[alteradas]).sum())
+            self._centavos[alteradas] = novos
+        else:
+            self._ratear_proporcional(alteradas, consumo_total, valor_total)
+
+        areas_comuns = calcular_areas_comuns(consumo_total, soma_consumo, valor_total, self._soma_centavos)
+        df = tabela_rateio(self._indice, consumos, self._centavos / 100, areas_comuns)
+        return ResultadoRateio(df, consumo_total, valor_base, valor_total, areas_comuns.alertas)
+
+    def _mesmas_tarifas(self, tarifas) -> bool:
+        # Tarifas é comparada por valor; uma TabelaCompilada (com arrays) só pela identidade
+        if isinstance(tarifas, Tarifas):
+            return tarifas == self._tarifas
+        return tarifas is self._tarifas
+
+    def _ratear_proporcional(self, alteradas: np.ndarray, consumo_total: float, valor_total: float) -> None:
+        """Atualiza pisos e restos (só das alteradas, ou de todas se a fatura mudou) e distribui os centavos."""
+        fatura = (int(_em_wh(consumo_total)), int(para_centavos(valor_total)))
+        total_wh, centavos_total = fatura
+        n = len(self._wh)
+        if total_wh <= 0:
+            self._fatura = None
+            self._centavos = np.zeros(n, dtype=np.int64)
+            self._soma_centavos = 0
+            return
+
+        if fatura != self._fatura:
+            # Reescala: todas as partes exatas para o novo total da fatura
+            self._fatura = fatura
+            pesos = np.append(self._wh, total_wh - self._soma_wh)
+            self._pisos, self._restos = np.divmod(pesos * centavos_total, total_wh)
+        else:
+            # Mesma fatura: só as unidades alteradas e a parcela de Áreas Comuns mudam
+            posicoes = np.append(alteradas, n)
+            pesos = np.append(self._wh[alteradas], total_wh - self._soma_wh)
+            self._pisos[posicoes], self._restos[posicoes] = np.divmod(pesos * centavos_total, total_wh)
+
+        faltam = centavos_total - int(self._pisos.sum())
+        self._centavos = (self._pisos + _maiores_restos(self._restos, faltam))[:n]
+        self._soma_centavos = int(self._centavos.sum())
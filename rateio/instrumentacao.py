@@ -0,0 +1,180 @@
+"""
+Instrumentação opcional das fases do app (importação, cálculo, resultados,
+exportação, histórico): tempo de parede, linhas processadas e pico de memória.
+
+Desligada, cada fase custa só a entrada e saída de um context manager vazio.
+Ligada (RATEIO_DIAGNOSTICO=1 ou ?diagnostico=1 na URL), as medições ficam
+guardadas para o painel de diagnóstico e saem como uma linha JSON por fase
+no logger "rateio.diagnostico".
+
+O pico de memória usa tracemalloc, que é do processo inteiro e deixa tudo mais
+lento; por isso só quem sobe o servidor decide medi-lo (RATEIO_DIAGNOSTICO=1).
+Pela URL, um visitante liga apenas o tempo e as linhas da própria sessão.
+Como zerar o pico afeta o processo todo, só uma fase por vez mede memória: as
+que começam enquanto outra está medindo ficam sem pico (None). Mesmo assim, o
+valor inclui o que outras sessões alocaram no mesmo intervalo.
+"""
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from typing import NamedTuple
+
+import pandas as pd
+
+ATIVO_POR_PADRAO = os.environ.get("RATEIO_DIAGNOSTICO", "").strip() not in ("", "0")
+# Só a variável de ambiente liga o tracemalloc; ?diagnostico=1 mede apenas o tempo
+MEDIR_MEMORIA = ATIVO_POR_PADRAO
+
+# Uma fase por vez (no processo todo) zera e lê o pico do tracemalloc
+_medindo_memoria = threading.Lock()
+
+logger = logging.getLogger("rateio.diagnostico")
+
+# Bibliotecas carregadas só no primeiro uso (gráfico, importação e exportação)
+MODULOS_SOB_DEMANDA = ("plotly", "openpyxl", "xlsxwriter")
+
+
+class Medicao(NamedTuple):
+    """Uma fase medida."""
+    execucao: int              # número do rerun da sessão
+    fase: str
+    inicio: str                # data/hora ISO
+    duracao_s: float
+    linhas: int | None
+    pico_memoria_mb: float | None
+
+
+def modulos_carregados(modulos=MODULOS_SOB_DEMANDA) -> dict[str, bool]:
+    """Quais bibliotecas pesadas este processo já importou."""
+    return {modulo: modulo in sys.modules for modulo in modulos}
+
+
+class _Fase:
+    """Objeto entregue pelo `with`: a fase informa quantas linhas processou."""
+    __slots__ = ("linhas",)
+
+    def __init__(self, linhas=None):
+        self.linhas = linhas
+
+
+def _configurar_logger() -> None:
+    """Garante que as linhas INFO do diagnóstico saiam em stderr, mesmo sem logging configurado."""
+    if not logger.handlers:
+        handler = logging.StreamHandler(sys.stderr)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+
+
+class Instrumentacao:
+    """
+    Medições de uma sessão. nova_execucao() marca o início de cada rerun;
+    fase(nome) mede um trecho. Pode ser usada de outras threads (ex.: o download).
+    """
+
+    def __init__(
+        self,
+        ativo: bool = ATIVO_POR_PADRAO,
+        sessao: str = "",
+        max_medicoes: int = 500,
+        medir_memoria: bool = MEDIR_MEMORIA,
+    ):
+        self.ativo = ativo
+        self.sessao = sessao
+        self.medir_memoria = medir_memoria
+        self.execucao = 0
+        self.medicoes = deque(maxlen=max_medicoes)
+        self._lock = threading.Lock()
+        if ativo:
+            self.ativar()
+
+    def ativar(self, ativo: bool = True) -> None:
+        self.ativo = ativo
+        if ativo:
+            _configurar_logger()
+            if self.medir_memoria and not tracemalloc.is_tracing():
+                tracemalloc.start()
+
+    def nova_execucao(self) -> None:
+        with self._lock:
+            self.execucao += 1
+
+    @contextmanager
+    def fase(self, nome: str, linhas: int | None = None):
+        """Mede o bloco `with`. Se a fase souber as linhas só no fim, atribua a `.linhas` do objeto retornado."""
+        marcador = _Fase(linhas)
+        if not self.ativo:
+            yield marcador
+            return
+
+        memoria_inicial = None
+        if self.medir_memoria and tracemalloc.is_tracing() and _medindo_memoria.acquire(blocking=False):
+            tracemalloc.reset_peak()
+            memoria_inicial = tracemalloc.get_traced_memory()[0]
+        inicio_iso = datetime.now().isoformat(timespec="milliseconds")
+        inicio = time.perf_counter()
+        try:
+            yield marcador
+        finally:
+            duracao = time.perf_counter() - inicio
+            pico = None
+            if memoria_inicial is not None:
+                if tracemalloc.is_tracing():
+                    pico = max(tracemalloc.get_traced_memory()[1] - memoria_inicial, 0) / 2**20
+                _medindo_memoria.release()
+            self.registrar(nome, duracao, marcador.linhas, pico, inicio_iso)
+
+    def registrar(
+        self,
+        nome: str,
+        duracao_s: float,
+        linhas: int | None = None,
+        pico_memoria_mb: float | None = None,
+        inicio: str | None = None,
+    ) -> None:
+        """Guarda e emite no log uma medição feita fora de fase() (ex.: as importações do script)."""
+        if not self.ativo:
+            return
+        inicio = inicio or datetime.now().isoformat(timespec="milliseconds")
+        linhas = None if linhas is None else int(linhas)
+        medicao = Medicao(self.execucao, nome, inicio, duracao_s, linhas, pico_memoria_mb)
+        with self._lock:
+            self.medicoes.append(medicao)
+        logger.info(json.dumps({
+            "evento": "fase",
+            "sessao": self.sessao,
+            "execucao": medicao.execucao,
+            "fase": nome,
+            "inicio": inicio,
+            "duracao_ms": round(duracao_s * 1e3, 3),
+            "linhas": linhas,
+            "pico_memoria_mb": None if pico_memoria_mb is None else round(pico_memoria_mb, 3),
+        }, ensure_ascii=False))
+
+    def tabela(self) -> pd.DataFrame:
+        """Medições guardadas, da mais recente para a mais antiga."""
+        with self._lock:
+            medicoes = list(self.medicoes)
+        df = pd.DataFrame(medicoes, columns=Medicao._fields)
+        return df.iloc[::-1].reset_index(drop=True)
+
+    def resumo_por_fase(self) -> pd.DataFrame:
+        """Por fase: número de medições, tempo médio/máximo, linhas e pico de memória máximos."""
+        df = self.tabela()
+        if df.empty:
+            return df
+        return df.groupby("fase").agg(
+            medicoes=("duracao_s", "size"),
+            duracao_media_s=("duracao_s", "mean"),
+            duracao_max_s=("duracao_s", "max"),
+            linhas_max=("linhas", "max"),
+            pico_memoria_max_mb=("pico_memoria_mb", "max"),
+        )
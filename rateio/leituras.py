@@ -0,0 +1,98 @@
+"""
+Tabela de leituras das quitinetes (modo de entrada em tabela, sem limite de unidades).
+
+Uma linha por quitinete com as colunas Nome, Leitura anterior e Leitura atual.
+As leituras anteriores vêm do backup (prev_map) por junção vetorizada, e os
+consumos saem da tabela inteira de uma vez.
+"""
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from .calculo import AREAS_COMUNS
+
+COLUNA_NOME = "Nome"
+COLUNA_ANTERIOR = "Leitura anterior (kWh)"
+COLUNA_ATUAL = "Leitura atual (kWh)"
+COLUNAS_TABELA = [COLUNA_NOME, COLUNA_ANTERIOR, COLUNA_ATUAL]
+
+
+class LeiturasUnidades(NamedTuple):
+    """Dados prontos para o cálculo, na ordem das linhas da tabela."""
+    unidades: list          # rótulos "Quitinete i - Nome"
+    nomes: list             # nomes dos inquilinos (ou "Qi")
+    consumos: np.ndarray    # kWh, nunca negativo
+    leituras_atuais: np.ndarray
+
+
+def nome_da_unidade(unidade: str) -> str:
+    """Extrai o nome do inquilino de um rótulo "Quitinete i - Nome"."""
+    unidade = str(unidade)
+    return unidade.split("-")[-1].strip() if "-" in unidade else unidade.strip()
+
+
+def _anteriores_por_nome(prev_map: dict) -> pd.Series:
+    """Série nome/rótulo -> leitura anterior, sem Áreas Comuns."""
+    if not prev_map:
+        return pd.Series(dtype=float)
+    anteriores = pd.Series(prev_map, dtype=object)
+    anteriores = pd.to_numeric(anteriores, errors="coerce")
+    anteriores = anteriores[~anteriores.index.astype(str).str.contains(AREAS_COMUNS, regex=False)]
+    # Aceita tanto o rótulo completo quanto só o nome do inquilino
+    por_nome = pd.Series(anteriores.to_numpy(), index=[nome_da_unidade(u) for u in anteriores.index])
+    return pd.concat([anteriores, por_nome])
+
+
+def tabela_inicial(prev_map: dict, n_linhas: int = 1) -> pd.DataFrame:
+    """
+    Tabela inicial: uma linha por quitinete do backup (nome e leitura anterior
+    preenchidos), ou n_linhas linhas vazias quando não há backup.
+    """
+    unidades = [u for u in (prev_map or {}) if AREAS_COMUNS not in str(u)]
+    if unidades:
+        tabela = pd.DataFrame({COLUNA_NOME: [nome_da_unidade(u) for u in unidades]})
+    else:
+        tabela = pd.DataFrame({COLUNA_NOME: [""] * n_linhas})
+    tabela[COLUNA_ANTERIOR] = np.nan
+    tabela[COLUNA_ATUAL] = np.nan
+    return preencher_anteriores(tabela, prev_map)
+
+
+def nomes_da_tabela(tabela: pd.DataFrame) -> pd.Series:
+    """Nomes dos inquilinos como são casados com o backup (texto, sem espaços nas pontas)."""
+    return tabela[COLUNA_NOME].fillna("").astype(str).str.strip()
+
+
+def preencher_anteriores(tabela: pd.DataFrame, prev_map: dict, ignorar=frozenset()) -> pd.DataFrame:
+    """
+    Completa as leituras anteriores vazias com as do backup, casando pelo nome
+    do inquilino. Leituras já digitadas são mantidas, e as linhas cujo nome está
+    em ignorar (já completadas antes) ficam como estão, mesmo vazias: assim uma
+    leitura apagada de propósito não volta a ser preenchida.
+    """
+    tabela = tabela.copy()
+    anteriores = _anteriores_por_nome(prev_map)
+    if not anteriores.empty:
+        anteriores = anteriores[~anteriores.index.duplicated()]
+        nomes = nomes_da_tabela(tabela)
+        do_backup = nomes.map(anteriores).where(~nomes.isin(ignorar))
+        tabela[COLUNA_ANTERIOR] = pd.to_numeric(tabela[COLUNA_ANTERIOR], errors="coerce").fillna(do_backup)
+    return tabela
+
+
+def ler_tabela(tabela: pd.DataFrame) -> LeiturasUnidades:
+    """
+    Converte a tabela editada em rótulos, nomes e consumos (atual - anterior, nunca negativo).
+    Linhas sem nome recebem "Qi"; leituras vazias contam como 0.
+    """
+    nomes = nomes_da_tabela(tabela)
+    padrao = pd.Series([f"Q{i+1}" for i in range(len(tabela))], index=tabela.index)
+    nomes = nomes.where(nomes != "", padrao).tolist()
+
+    anteriores = pd.to_numeric(tabela[COLUNA_ANTERIOR], errors="coerce").fillna(0).to_numpy(dtype=float)
+    atuais = pd.to_numeric(tabela[COLUNA_ATUAL], errors="coerce").fillna(0).to_numpy(dtype=float)
+    consumos = np.maximum(atuais - anteriores, 0.0)  # nunca deixa negativo
+
+    unidades = [f"Quitinete {i+1} - {nome}" for i, nome in enumerate(nomes)]
+    return LeiturasUnidades(unidades, nomes, consumos, atuais)
@@ -0,0 +1,197 @@
+"""
+Rateio em lote: calcula o rateio de uma pasta inteira de prédios, em paralelo.
+
+Entrada:
+- uma pasta com o backup do mês anterior de cada prédio (um .xlsx por prédio,
+  com as abas Resumo/Rateio geradas pelo app); o nome do arquivo identifica o prédio;
+- um arquivo de leituras (.csv ou .xlsx) com as colunas "Prédio", "Unidade" e
+  "Leitura atual (kWh)". A linha com Unidade = "Prédio" traz a leitura do medidor
+  principal. A coluna opcional "Leitura anterior (kWh)" substitui a do backup.
+
+Saída: um relatório por prédio (abas Rateio/Resumo/Histórico), igual ao botão de download,
+e, com --demonstrativos, um ZIP com o demonstrativo de cada inquilino.
+
+Uso:
+    python -m rateio PASTA_BACKUPS LEITURAS.csv -o PASTA_SAIDA
+"""
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import fields
+from datetime import datetime
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+import pandas as pd
+
+from .calculo import BANDEIRAS, FONTES_CONSUMO, METODOS_RATEIO, Tarifas, calcular_rateio
+from .demonstrativos import DIVISOES_AREAS_COMUNS, gerar_zip_demonstrativos
+from .exportacao import gerar_relatorio_excel, linhas_historico, montar_aba_rateio, montar_resumo
+from .importacao import item_resumo, leituras_anteriores, ler_backup
+
+UNIDADE_PREDIO = "Prédio"  # valor da coluna Unidade para o medidor principal
+_CAMPOS_NUMERICOS = [campo for campo in fields(Tarifas) if campo.type is float]
+
+
+# ===================== LEITURAS =====================
+def ler_leituras(caminho) -> pd.DataFrame:
+    """Lê o arquivo de leituras (.csv ou .xlsx) e valida as colunas obrigatórias."""
+    caminho = Path(caminho)
+    if caminho.suffix.lower() == ".csv":
+        leituras = pd.read_csv(caminho, dtype={"Prédio": str, "Unidade": str})
+    else:
+        leituras = pd.read_excel(caminho, dtype={"Prédio": str, "Unidade": str})
+    faltando = {"Prédio", "Unidade", "Leitura atual (kWh)"} - set(leituras.columns)
+    if faltando:
+        raise ValueError(f"Arquivo de leituras sem as colunas: {', '.join(sorted(faltando))}")
+    return leituras
+
+
+# ===================== PROCESSAMENTO DE UM PRÉDIO =====================
+def processar_predio(
+    caminho_backup,
+    leituras: pd.DataFrame,
+    tarifas: Tarifas,
+    pasta_saida,
+    nome_simulacao: str,
+    metodo_rateio: str | None = None,
+    fonte_consumo: str | None = None,
+    divisao_areas_comuns: str | None = None,
+) -> Path:
+    """
+    Calcula o rateio de um prédio e grava o relatório em pasta_saida.
+    Método de rateio e fonte do consumo vêm do backup quando não forem informados.
+    Com divisao_areas_comuns, grava também o ZIP de demonstrativos por inquilino
+    (renderizados em série: o paralelismo já é por prédio).
+    Retorna o caminho do arquivo gerado.
+    """
+    caminho_backup = Path(caminho_backup)
+    backup = ler_backup(caminho_backup, ler_historico=True)
+
+    # Configurações do mês anterior, quando não sobrescritas
+    if metodo_rateio is None:
+        metodo_rateio = item_resumo(backup.resumo, "Método de rateio")
+        if metodo_rateio not in METODOS_RATEIO:
+            metodo_rateio = METODOS_RATEIO[0]
+    if fonte_consumo is None:
+        fonte_consumo = item_resumo(backup.resumo, "Fonte do consumo total")
+        if fonte_consumo not in FONTES_CONSUMO:
+            fonte_consumo = FONTES_CONSUMO[0]
+
+    # Separa o medidor principal das quitinetes
+    eh_predio = leituras["Unidade"] == UNIDADE_PREDIO
+    quitinetes = leituras[~eh_predio]
+    leituras_atuais = quitinetes["Leitura atual (kWh)"].astype(float).to_numpy()
+
+    # Leitura anterior: coluna do arquivo, senão backup, senão 0
+    prev_map = leituras_anteriores(backup.rateio)
+    anteriores = quitinetes["Unidade"].map(prev_map)
+    if "Leitura anterior (kWh)" in quitinetes.columns:
+        anteriores = quitinetes["Leitura anterior (kWh)"].fillna(anteriores)
+    anteriores = pd.to_numeric(anteriores, errors="coerce").fillna(0.0).to_numpy()
+    consumos = (leituras_atuais - anteriores).clip(min=0)  # nunca deixa negativo
+
+    leitura_predio_at = None
+    consumo_total = None
+    if eh_predio.any():
+        linha_predio = leituras[eh_predio].iloc[0]
+        leitura_predio_at = float(linha_predio["Leitura atual (kWh)"])
+        leitura_predio_ant = linha_predio.get("Leitura anterior (kWh)")
+        if leitura_predio_ant is None or pd.isna(leitura_predio_ant):
+            leitura_predio_ant = item_resumo(backup.resumo, "Leitura do prédio (kWh)")
+        leitura_predio_ant = float(leitura_predio_ant) if leitura_predio_ant is not None else 0.0
+        if fonte_consumo == "Leituras do prédio":
+            consumo_total = max(leitura_predio_at - leitura_predio_ant, 0.0)
+    elif fonte_consumo == "Leituras do prédio":
+        raise ValueError(f"{caminho_backup.name}: sem leitura do prédio para a fonte '{fonte_consumo}'")
+
+    resultado = calcular_rateio(quitinetes["Unidade"], consumos, tarifas, metodo_rateio, consumo_total)
+
+    df_resumo = montar_resumo(nome_simulacao, resultado, tarifas, metodo_rateio, fonte_consumo, leitura_predio_at)
+    novas_linhas = linhas_historico(nome_simulacao, resultado.df, resultado.valor_total, resultado.consumo_total)
+    df_historico = novas_linhas if backup.historico is None else pd.concat([backup.historico, novas_linhas], ignore_index=True)
+
+    conteudo = gerar_relatorio_excel(montar_aba_rateio(resultado.df, leituras_atuais), df_resumo, df_historico)
+    destino = Path(pasta_saida) / f"rateio_{caminho_backup.stem}.xlsx"
+    destino.write_bytes(conteudo)
+    if divisao_areas_comuns is not None:
+        gerar_zip_demonstrativos(
+            resultado.df, df_resumo, Path(pasta_saida) / f"demonstrativos_{caminho_backup.stem}.zip",
+            tarifas, divisao_areas_comuns, processos=1, predio=caminho_backup.stem,
+        )
+    return destino
+
+
+def _processar_tarefa(tarefa: dict) -> Path:
+    """Ponto de entrada dos processos do pool (precisa ser uma função de módulo)."""
+    return processar_predio(**tarefa)
+
+
+# ===================== LINHA DE COMANDO =====================
+def _criar_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m rateio",
+        description="Calcula o rateio de energia de vários prédios em paralelo.",
+    )
+    parser.add_argument("pasta_backups", help="Pasta com o backup (.xlsx) do mês anterior de cada prédio")
+    parser.add_argument("leituras", help="Arquivo .csv/.xlsx com as colunas Prédio, Unidade e Leitura atual (kWh)")
+    parser.add_argument("-o", "--saida", default="saida_rateio", help="Pasta onde os relatórios serão gravados")
+    parser.add_argument("-j", "--processos", type=int, default=os.cpu_count(), help="Número de processos (padrão: todos os núcleos)")
+    parser.add_argument("--identificacao", help="Identificação da simulação (padrão: data/hora atual)")
+    parser.add_argument("--metodo", choices=METODOS_RATEIO, help="Método de rateio (padrão: o do backup)")
+    parser.add_argument("--fonte", choices=FONTES_CONSUMO, help="Fonte do consumo total (padrão: a do backup)")
+    parser.add_argument(
+        "--demonstrativos", nargs="?", const=DIVISOES_AREAS_COMUNS[0], choices=DIVISOES_AREAS_COMUNS,
+        help="Gera também um ZIP com o demonstrativo de cada inquilino (opcional: divisão de Áreas Comuns)",
+    )
+    parser.add_argument("--bandeira", choices=BANDEIRAS, default=Tarifas.bandeira)
+    parser.add_argument("--sem-bandeira-por-faixa", action="store_true", help="Usa o valor único da bandeira")
+    for campo in _CAMPOS_NUMERICOS:
+        parser.add_argument(f"--{campo.name.replace('_', '-')}", type=float, default=campo.default)
+    return parser
+
+
+def main(argv=None) -> int:
+    args = _criar_parser().parse_args(argv)
+
+    tarifas = Tarifas(
+        **{campo.name: getattr(args, campo.name) for campo in _CAMPOS_NUMERICOS},
+        bandeira=args.bandeira,
+        usar_bandeira_por_faixa=not args.sem_bandeira_por_faixa,
+    )
+    nome_simulacao = args.identificacao or datetime.now(ZoneInfo("America/Sao_Paulo")).strftime("%d/%m/%Y %H:%M")
+
+    leituras = ler_leituras(args.leituras)
+    por_predio = {predio: grupo for predio, grupo in leituras.groupby("Prédio", sort=False)}
+    pasta_saida = Path(args.saida)
+    pasta_saida.mkdir(parents=True, exist_ok=True)
+
+    tarefas = []
+    for caminho in sorted(Path(args.pasta_backups).glob("*.xlsx")):
+        if caminho.stem not in por_predio:
+            print(f"⚠️ {caminho.name}: sem leituras no arquivo, ignorado", file=sys.stderr)
+            continue
+        tarefas.append({
+            "caminho_backup": caminho,
+            "leituras": por_predio[caminho.stem],
+            "tarifas": tarifas,
+            "pasta_saida": pasta_saida,
+            "nome_simulacao": nome_simulacao,
+            "metodo_rateio": args.metodo,
+            "fonte_consumo": args.fonte,
+            "divisao_areas_comuns": args.demonstrativos,
+        })
+
+    falhas = 0
+    with ProcessPoolExecutor(max_workers=args.processos) as pool:
+        futuros = {pool.submit(_processar_tarefa, tarefa): tarefa["caminho_backup"] for tarefa in tarefas}
+        for futuro in as_completed(futuros):
+            try:
+                print(f"✅ {futuro.result()}")
+            except Exception as e:
+                falhas += 1
+                print(f"❌ {futuros[futuro].name}: {e}", file=sys.stderr)
+
+    print(f"{len(tarefas) - falhas} de {len(tarefas)} prédios processados.")
+    return 1 if falhas else 0
@@ -0,0 +1,294 @@
+"""
+Importação de exportações de medidores inteligentes (CSV de intervalos, ex.: 15 min).
+
+O arquivo é lido em blocos de linhas (pd.read_csv com chunksize) e cada bloco é
+reduzido a uma linha por medidor e mês antes de ler o próximo. A memória fica
+proporcional ao número de medidores × meses, não ao tamanho do arquivo, o que
+permite importar exportações de centenas de MB.
+
+Formatos aceitos (nomes das colunas detectados sem diferenciar maiúsculas):
+- energia por intervalo (kWh consumidos em cada intervalo), e/ou
+- leitura acumulada do registrador (kWh no fim de cada intervalo).
+Separador "," com decimal "." ou separador ";" com decimal "," (padrão brasileiro).
+Datas no formato ISO ou dia/mês/ano. A data/hora de cada linha é o fim do
+intervalo: a linha de 00:00 do dia 1º fecha o mês anterior, e a leitura do
+registrador no início de um mês é a última do mês anterior.
+
+Uso pela linha de comando (gera o arquivo de leituras do rateio em lote):
+    python -m rateio.medidores EXPORTACAO.csv --predio NOME --medidor-predio ID -o leituras.csv
+"""
+import argparse
+import csv
+import io
+import sys
+from pathlib import Path
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from .leituras import COLUNA_ANTERIOR, COLUNA_ATUAL, COLUNA_NOME, _anteriores_por_nome
+from .tarifa_branca import POSTOS, TarifaBranca, postos_horarios
+
+LINHAS_POR_BLOCO = 500_000
+
+# Nomes aceitos para cada coluna (comparados em minúsculas, sem espaços nas pontas)
+NOMES_COLUNAS = {
+    "medidor": ("medidor", "id medidor", "id_medidor", "meter", "meter_id", "unidade"),
+    "data_hora": ("data_hora", "data/hora", "data hora", "datahora", "timestamp", "datetime", "data"),
+    "energia": ("energia (kwh)", "consumo (kwh)", "kwh", "energia", "consumo", "energy_kwh"),
+    "leitura": ("leitura (kwh)", "leitura", "registrador", "register", "register_kwh"),
+}
+
+COLUNAS_TOTAIS = ["inicio", "fim", "intervalos", "consumo_kwh", "leitura_inicial", "leitura_final"]
+COLUNAS_POSTOS = ["kwh_fora_ponta", "kwh_intermediario", "kwh_ponta"]  # na ordem de POSTOS (tarifa branca)
+
+
+class LeiturasMedidores(NamedTuple):
+    """Leituras de um mês prontas para o app: tabela das quitinetes e medidor do prédio."""
+    tabela: pd.DataFrame                 # colunas Nome / Leitura anterior / Leitura atual
+    predio_anterior: float | None
+    predio_atual: float | None
+
+
+# ===================== LEITURA EM BLOCOS =====================
+def _abrir_texto(arquivo):
+    """Objeto de texto para o csv/pandas: aceita caminho, bytes ou arquivo binário (upload)."""
+    if isinstance(arquivo, (str, Path)):
+        return open(arquivo, "r", encoding="utf-8-sig", newline="")
+    if isinstance(arquivo, bytes):
+        arquivo = io.BytesIO(arquivo)
+    return io.TextIOWrapper(arquivo, encoding="utf-8-sig", newline="")
+
+
+def detectar_colunas(cabecalho: list[str]) -> dict[str, str]:
+    """Coluna do arquivo para cada papel (medidor, data_hora, energia, leitura)."""
+    por_nome = {str(coluna).strip().lower(): coluna for coluna in cabecalho}
+    colunas = {}
+    for papel, candidatos in NOMES_COLUNAS.items():
+        encontrada = next((por_nome[nome] for nome in candidatos if nome in por_nome), None)
+        if encontrada is not None:
+            colunas[papel] = encontrada
+    faltando = {"medidor", "data_hora"} - set(colunas)
+    if faltando:
+        raise ValueError(f"Exportação sem as colunas: {', '.join(sorted(faltando))}")
+    if "energia" not in colunas and "leitura" not in colunas:
+        raise ValueError("Exportação sem coluna de energia (kWh) nem de leitura do registrador")
+    return colunas
+
+
+def _reduzir(partes: list[pd.DataFrame]) -> pd.DataFrame:
+    """Junta totais parciais (de blocos diferentes) em uma linha por medidor e mês."""
+    todos = pd.concat(partes)
+    grupos = todos.groupby(level=["medidor", "mes"], sort=False)
+    postos = [coluna for coluna in COLUNAS_POSTOS if coluna in todos.columns]
+    somas = grupos[["intervalos", "consumo_kwh"] + postos].sum()
+    # Leitura inicial/final vêm do bloco com a primeira/última data do grupo
+    primeiras = todos.sort_values("inicio", kind="stable").groupby(level=["medidor", "mes"], sort=False)[["inicio", "leitura_inicial"]].first()
+    ultimas = todos.sort_values("fim", kind="stable").groupby(level=["medidor", "mes"], sort=False)[["fim", "leitura_final"]].last()
+    return pd.concat([primeiras, ultimas, somas], axis=1)[COLUNAS_TOTAIS + postos]
+
+
+def _converter_datas(textos: pd.Series, dayfirst: bool) -> np.ndarray:
+    """Converte as datas/horas do bloco. Os medidores repetem os mesmos horários, então cada texto distinto é convertido uma vez só."""
+    codigos, distintos = pd.factorize(textos)
+    if len(distintos) and str(distintos[0])[:4].isdigit():
+        dayfirst = False  # ano na frente: formato ISO
+    datas = pd.to_datetime(pd.Series(distintos, dtype=object), dayfirst=dayfirst, errors="coerce").to_numpy()
+    # Código -1 (célula vazia) cai no NaT acrescentado no fim
+    return np.append(datas, np.datetime64("NaT"))[codigos]
+
+
+def _totais_do_bloco(bloco: pd.DataFrame, colunas: dict, dayfirst: bool, tarifa_branca: TarifaBranca | None) -> pd.DataFrame:
+    dados = pd.DataFrame({
+        "medidor": bloco[colunas["medidor"]].astype(str).str.strip(),
+        "data_hora": _converter_datas(bloco[colunas["data_hora"]], dayfirst),
+        "energia": pd.to_numeric(bloco[colunas["energia"]], errors="coerce") if "energia" in colunas else np.nan,
+        "leitura": pd.to_numeric(bloco[colunas["leitura"]], errors="coerce") if "leitura" in colunas else np.nan,
+    })
+    dados = dados[dados["data_hora"].notna()].sort_values("data_hora", kind="stable")
+    # A data/hora é o fim do intervalo: mês e posto vêm do instante anterior a ela
+    # (00:00 do dia 1º cai no último minuto do mês anterior)
+    instante = dados["data_hora"] - pd.Timedelta(1, "ns")
+    # Mês como inteiro AAAAMM (strftime linha a linha é o passo mais lento); vira texto só no fim
+    dados["mes"] = instante.dt.year * 100 + instante.dt.month
+    # Registrador antes do intervalo; sem a energia, a própria leitura (perde o primeiro intervalo)
+    dados["leitura_antes"] = dados["leitura"] - dados["energia"].fillna(0.0)
+    if tarifa_branca is not None:
+        # Energia de cada intervalo na coluna do seu posto (0 nas outras)
+        postos = postos_horarios(instante, tarifa_branca)
+        for posto, coluna in enumerate(COLUNAS_POSTOS):
+            dados[coluna] = dados["energia"].where(postos == posto, 0.0)
+    grupos = dados.groupby(["medidor", "mes"], sort=False)
+    totais = pd.DataFrame({
+        "inicio": grupos["data_hora"].min(),
+        "fim": grupos["data_hora"].max(),
+        "intervalos": grupos["data_hora"].size(),
+        "consumo_kwh": grupos["energia"].sum(min_count=1),
+        "leitura_inicial": grupos["leitura_antes"].first(),
+        "leitura_final": grupos["leitura"].last(),
+    })
+    if tarifa_branca is not None:
+        totais[COLUNAS_POSTOS] = grupos[COLUNAS_POSTOS].sum()
+    return totais
+
+
+def agregar_intervalos(
+    arquivo,
+    linhas_por_bloco: int = LINHAS_POR_BLOCO,
+    dayfirst: bool = True,
+    tarifa_branca: TarifaBranca | None = None,
+) -> pd.DataFrame:
+    """
+    Lê a exportação em blocos e devolve uma linha por (medidor, mes) com: primeira
+    e última data/hora, número de intervalos, soma da energia e leituras do
+    registrador no início e no fim do mês (NaN quando o arquivo não traz a coluna).
+    A leitura inicial é a final do mês anterior do mesmo medidor, então os meses
+    seguidos somam a diferença total do registrador.
+    Com tarifa_branca, soma também a energia de cada posto (COLUNAS_POSTOS), o que
+    exige a coluna de energia por intervalo.
+    arquivo pode ser um caminho, bytes ou um objeto de arquivo (ex.: upload do Streamlit).
+    """
+    texto = _abrir_texto(arquivo)
+    try:
+        primeira_linha = texto.readline()
+        texto.seek(0)
+        sep, decimal = (";", ",") if primeira_linha.count(";") > primeira_linha.count(",") else (",", ".")
+        colunas = detectar_colunas(next(csv.reader([primeira_linha], delimiter=sep)))
+        if tarifa_branca is not None and "energia" not in colunas:
+            raise ValueError("A tarifa branca precisa da energia (kWh) de cada intervalo, não só da leitura do registrador")
+
+        parciais = []
+        blocos = pd.read_csv(
+            texto, sep=sep, decimal=decimal, usecols=list(colunas.values()),
+            dtype={colunas["medidor"]: str, colunas["data_hora"]: str}, chunksize=linhas_por_bloco,
+        )
+        for bloco in blocos:
+            parciais.append(_totais_do_bloco(bloco, colunas, dayfirst, tarifa_branca))
+            # Mantém só um total acumulado, para a memória não crescer com o número de blocos
+            if len(parciais) > 1:
+                parciais = [_reduzir(parciais)]
+    finally:
+        if isinstance(arquivo, (str, Path)):
+            texto.close()
+        else:
+            texto.detach()  # não fecha o arquivo de quem chamou
+
+    if not parciais:
+        vazio = pd.MultiIndex.from_arrays([[], []], names=["medidor", "mes"])
+        return pd.DataFrame(columns=COLUNAS_TOTAIS + (COLUNAS_POSTOS if tarifa_branca else []), index=vazio)
+    totais = _reduzir(parciais).sort_index()
+    # Início do mês = última leitura do mês anterior; no primeiro mês do arquivo, a de antes do primeiro intervalo
+    anterior = totais.groupby(level="medidor", sort=False)["leitura_final"].shift()
+    totais["leitura_inicial"] = anterior.fillna(totais["leitura_inicial"])
+    meses = [f"{m // 100:04d}-{m % 100:02d}" for m in totais.index.levels[1]]
+    totais.index = totais.index.set_levels(meses, level="mes")
+    return totais
+
+
+# ===================== LEITURAS DO MÊS =====================
+def meses_disponiveis(totais: pd.DataFrame) -> list[str]:
+    return sorted(totais.index.get_level_values("mes").unique())
+
+
+def medidores_disponiveis(totais: pd.DataFrame) -> list[str]:
+    return sorted(totais.index.get_level_values("medidor").unique())
+
+
+def leituras_do_mes(
+    totais: pd.DataFrame,
+    mes: str,
+    medidor_predio: str | None = None,
+    prev_map: dict | None = None,
+) -> LeiturasMedidores:
+    """
+    Leituras anterior/atual de cada medidor no mês. Com registrador, são as leituras
+    do início e do fim do mês; só com energia por intervalo, a anterior vem do
+    backup (prev_map, pelo nome) ou é 0, e a atual é a anterior + a energia do mês.
+    O medidor do prédio sai da tabela e vai para predio_anterior/predio_atual.
+    """
+    do_mes = totais.xs(mes, level="mes")
+    anteriores_backup = _anteriores_por_nome(prev_map or {})
+    anteriores_backup = anteriores_backup[~anteriores_backup.index.duplicated()]
+
+    tem_registro = do_mes["leitura_inicial"].notna() & do_mes["leitura_final"].notna()
+    do_backup = do_mes.index.to_series().map(anteriores_backup).fillna(0.0)
+    anterior = do_mes["leitura_inicial"].where(tem_registro, do_backup)
+    atual = do_mes["leitura_final"].where(tem_registro, anterior + do_mes["consumo_kwh"].fillna(0.0))
+    leituras = pd.DataFrame({COLUNA_ANTERIOR: anterior, COLUNA_ATUAL: atual})
+
+    predio_anterior = predio_atual = None
+    if medidor_predio is not None and medidor_predio in leituras.index:
+        predio_anterior, predio_atual = (float(v) for v in leituras.loc[medidor_predio])
+        leituras = leituras.drop(index=medidor_predio)
+
+    tabela = leituras.rename_axis(COLUNA_NOME).reset_index()[[COLUNA_NOME, COLUNA_ANTERIOR, COLUNA_ATUAL]]
+    return LeiturasMedidores(tabela, predio_anterior, predio_atual)
+
+
+def energia_postos_do_mes(
+    totais: pd.DataFrame,
+    mes: str,
+    medidor_predio: str | None = None,
+) -> tuple[pd.DataFrame, np.ndarray | None]:
+    """
+    kWh por posto (colunas POSTOS) de cada medidor no mês, para calcular_rateio_branca,
+    e os do medidor do prédio (ou None). Exige totais lidos com tarifa_branca.
+    """
+    if COLUNAS_POSTOS[0] not in totais.columns:
+        raise ValueError("Exportação lida sem a energia por posto; leia de novo com a tarifa branca")
+    energia = totais.xs(mes, level="mes")[COLUNAS_POSTOS].set_axis(POSTOS, axis=1).rename_axis(COLUNA_NOME)
+    predio = None
+    if medidor_predio is not None and medidor_predio in energia.index:
+        predio = energia.loc[medidor_predio].to_numpy(dtype=float)
+        energia = energia.drop(index=medidor_predio)
+    return energia, predio
+
+
+# ===================== LINHA DE COMANDO =====================
+def _criar_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m rateio.medidores",
+        description="Converte uma exportação de medidores (CSV de intervalos) no arquivo de leituras do rateio em lote.",
+    )
+    parser.add_argument("exportacao", help="CSV de intervalos (medidor, data/hora e energia e/ou leitura)")
+    parser.add_argument("--predio", required=True, help="Nome do prédio (nome do arquivo de backup, sem .xlsx)")
+    parser.add_argument("--medidor-predio", help="Identificação do medidor principal do prédio")
+    parser.add_argument("--mes", help="Mês AAAA-MM (padrão: o último do arquivo)")
+    parser.add_argument("--linhas-por-bloco", type=int, default=LINHAS_POR_BLOCO)
+    parser.add_argument("--mes-primeiro", action="store_true", help="Datas no formato mês/dia/ano")
+    parser.add_argument("-o", "--saida", default="leituras.csv", help="Arquivo de leituras gerado (.csv)")
+    return parser
+
+
+def main(argv=None) -> int:
+    from .lote import UNIDADE_PREDIO
+
+    args = _criar_parser().parse_args(argv)
+    totais = agregar_intervalos(args.exportacao, args.linhas_por_bloco, dayfirst=not args.mes_primeiro)
+    meses = meses_disponiveis(totais)
+    if not meses:
+        print("Nenhuma linha com data/hora válida na exportação.", file=sys.stderr)
+        return 1
+    mes = args.mes or meses[-1]
+    if mes not in meses:
+        print(f"Mês {mes} não está na exportação (meses: {', '.join(meses)}).", file=sys.stderr)
+        return 1
+
+    leituras = leituras_do_mes(totais, mes, args.medidor_predio)
+    saida = leituras.tabela.rename(columns={COLUNA_NOME: "Unidade"})
+    if leituras.predio_atual is not None:
+        linha_predio = pd.DataFrame({
+            "Unidade": [UNIDADE_PREDIO],
+            COLUNA_ANTERIOR: [leituras.predio_anterior],
+            COLUNA_ATUAL: [leituras.predio_atual],
+        })
+        saida = pd.concat([linha_predio, saida], ignore_index=True)
+    saida.insert(0, "Prédio", args.predio)
+    saida.to_csv(args.saida, index=False)
+    print(f"{len(saida)} leituras de {mes} gravadas em {args.saida}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,200 @@
+"""
+Representação compacta dos dados guardados em cada sessão do app, com orçamento
+de memória por sessão.
+
+- Colunas em R$ viram centavos inteiros e colunas em kWh viram Wh inteiros,
+  no menor tipo inteiro que comporta os valores (em geral int32), desde que
+  a conversão volte exatamente aos mesmos floats; senão ficam como estão;
+- textos repetidos (rótulos de unidades, Identificação) viram categorias;
+- quando a sessão passa do orçamento, os itens usados há mais tempo vão para
+  um arquivo temporário e voltam para a memória ao serem lidos de novo.
+"""
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+import threading
+import weakref
+from collections import OrderedDict
+from pathlib import Path
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+ORCAMENTO_PADRAO = int(float(os.environ.get("RATEIO_MEMORIA_SESSAO_MB", "32")) * 2**20)
+ESCALAS = {"(R$)": 100, "(kWh)": 1000}  # sufixo da coluna -> fator para inteiro (centavos, Wh)
+FRACAO_CATEGORIA = 0.5                   # textos com até 50% de valores distintos viram categoria
+
+
+class TabelaCompacta(NamedTuple):
+    """DataFrame compactado e o fator de cada coluna convertida para inteiro."""
+    df: pd.DataFrame
+    escalas: dict
+
+
+def _escala(coluna) -> int | None:
+    for sufixo, fator in ESCALAS.items():
+        if isinstance(coluna, str) and coluna.endswith(sufixo):
+            return fator
+    return None
+
+
+def _como_categoria(valores: pd.Index | pd.Series):
+    """Converte textos repetidos em categoria; devolve o original se não compensar."""
+    textual = valores.dtype == object or pd.api.types.is_string_dtype(valores.dtype)
+    if textual and len(valores) and valores.nunique(dropna=False) <= FRACAO_CATEGORIA * len(valores):
+        return valores.astype("category")
+    return valores
+
+
+def _inteiros_sem_perda(serie: pd.Series, fator: int) -> np.ndarray | None:
+    """serie × fator em inteiros, se dividir de volta por fator der exatamente os mesmos floats."""
+    numerica = pd.api.types.is_numeric_dtype(serie) and not pd.api.types.is_bool_dtype(serie)
+    if not numerica or serie.isna().any():
+        return None
+    valores = serie.to_numpy(dtype=float)
+    escalados = np.rint(valores * fator)
+    if len(escalados) and np.abs(escalados).max() >= 2**53:
+        return None  # além disso o float não representa todos os inteiros
+    if not np.array_equal(escalados / fator, valores):
+        return None  # frações de centavo ou de Wh: guardar em inteiro perderia dados
+    return escalados.astype(np.int64)
+
+
+def compactar(df: pd.DataFrame) -> TabelaCompacta:
+    """
+    Versão compacta de df. Colunas em R$/kWh só viram inteiros quando a volta é exata;
+    com valores vazios ou frações menores que centavo/Wh ficam em float.
+    """
+    compacto = {}
+    escalas = {}
+    for coluna in df.columns:
+        serie = df[coluna]
+        fator = _escala(coluna)
+        inteiros = None if fator is None else _inteiros_sem_perda(serie, fator)
+        if inteiros is not None:
+            compacto[coluna] = pd.to_numeric(inteiros, downcast="integer")
+            escalas[coluna] = fator
+        else:
+            compacto[coluna] = _como_categoria(serie)
+    resultado = pd.DataFrame(compacto, index=_como_categoria(df.index))
+    resultado.index.name = df.index.name
+    return TabelaCompacta(resultado, escalas)
+
+
+def expandir(tabela: TabelaCompacta) -> pd.DataFrame:
+    """DataFrame no formato original (floats em R$/kWh, textos no tipo de antes)."""
+    df = tabela.df.copy()
+    for coluna, fator in tabela.escalas.items():
+        df[coluna] = df[coluna].to_numpy() / fator
+    # Categorias voltam ao tipo original dos textos
+    for coluna in df.columns:
+        if isinstance(df[coluna].dtype, pd.CategoricalDtype):
+            df[coluna] = df[coluna].astype(df[coluna].cat.categories.dtype)
+    if isinstance(df.index, pd.CategoricalIndex):
+        df.index = df.index.astype(df.index.categories.dtype)
+    return df
+
+
+def tamanho_bytes(valor) -> int:
+    """Memória aproximada de um item guardado."""
+    if isinstance(valor, TabelaCompacta):
+        valor = valor.df
+    if isinstance(valor, (pd.DataFrame, pd.Series)):
+        return int(valor.memory_usage(deep=True).sum()) if isinstance(valor, pd.DataFrame) else int(valor.memory_usage(deep=True))
+    if isinstance(valor, np.ndarray):
+        return int(valor.nbytes)
+    if isinstance(valor, (list, tuple, dict)):
+        itens = valor.items() if isinstance(valor, dict) else ((v, None) for v in valor)
+        return sys.getsizeof(valor) + sum(sys.getsizeof(a) + sys.getsizeof(b) for a, b in itens)
+    return sys.getsizeof(valor)
+
+
+class ArmazemSessao:
+    """
+    Itens grandes de uma sessão (resultado, leituras...), guardados compactados.
+    Se o total em memória passar de orcamento_bytes, os usados há mais tempo são
+    gravados em disco (pasta temporária da sessão, apagada quando o armazém some).
+    """
+
+    def __init__(self, orcamento_bytes: int = ORCAMENTO_PADRAO):
+        self.orcamento_bytes = orcamento_bytes
+        self._memoria = OrderedDict()   # chave -> (valor, bytes), do mais antigo ao mais recente
+        self._disco = {}                # chave -> caminho do arquivo
+        self._lock = threading.Lock()
+        self._pasta = None
+        self._finalizador = None
+
+    # ===================== API =====================
+    def guardar(self, chave: str, valor) -> None:
+        """Guarda valor (DataFrames são compactados). None remove a chave."""
+        if valor is None:
+            self.remover(chave)
+            return
+        if isinstance(valor, pd.DataFrame):
+            valor = compactar(valor)
+        with self._lock:
+            self._remover_sem_lock(chave)
+            self._memoria[chave] = (valor, tamanho_bytes(valor))
+            self._respeitar_orcamento(manter=chave)
+
+    def obter(self, chave: str, padrao=None):
+        """Valor guardado (DataFrames já expandidos), lendo do disco se tiver sido despejado."""
+        with self._lock:
+            if chave in self._memoria:
+                self._memoria.move_to_end(chave)
+                valor = self._memoria[chave][0]
+            elif chave in self._disco:
+                caminho = self._disco.pop(chave)
+                with open(caminho, "rb") as arq:
+                    valor = pickle.load(arq)
+                os.remove(caminho)
+                self._memoria[chave] = (valor, tamanho_bytes(valor))
+                self._respeitar_orcamento(manter=chave)
+            else:
+                return padrao
+        return expandir(valor) if isinstance(valor, TabelaCompacta) else valor
+
+    def remover(self, chave: str) -> None:
+        with self._lock:
+            self._remover_sem_lock(chave)
+
+    def __contains__(self, chave: str) -> bool:
+        return chave in self._memoria or chave in self._disco
+
+    @property
+    def uso_bytes(self) -> int:
+        """Bytes ocupados em memória pelos itens guardados."""
+        return sum(tamanho for _, tamanho in self._memoria.values())
+
+    @property
+    def chaves_em_disco(self) -> list:
+        return list(self._disco)
+
+    # ===================== INTERNO =====================
+    def _remover_sem_lock(self, chave: str) -> None:
+        self._memoria.pop(chave, None)
+        caminho = self._disco.pop(chave, None)
+        if caminho is not None and os.path.exists(caminho):
+            os.remove(caminho)
+
+    def _respeitar_orcamento(self, manter: str) -> None:
+        """Despeja em disco os itens mais antigos até caber no orçamento (o item `manter` fica por último)."""
+        while self.uso_bytes > self.orcamento_bytes:
+            chave = next((c for c in self._memoria if c != manter), None)
+            if chave is None:
+                break  # só sobrou o item atual, que fica em memória enquanto é usado
+            valor, _ = self._memoria.pop(chave)
+            descritor, caminho = tempfile.mkstemp(suffix=".pkl", dir=self._pasta_sessao())
+            with os.fdopen(descritor, "wb") as arq:
+                pickle.dump(valor, arq, protocol=pickle.HIGHEST_PROTOCOL)
+            self._disco[chave] = caminho
+
+    def _pasta_sessao(self) -> Path:
+        if self._pasta is None:
+            self._pasta = Path(tempfile.mkdtemp(prefix="rateio_sessao_"))
+            # Apaga os arquivos quando a sessão (e o armazém) deixa de existir
+            self._finalizador = weakref.finalize(self, shutil.rmtree, self._pasta, True)
+        return self._pasta
@@ -0,0 +1,208 @@
+"""
+Série mensal de consumo por unidade, para acompanhar tendências ao longo de vários meses.
+
+Cada mês (vindo de um backup ou de um cálculo) grava uma linha por unidade em
+SQLite, com chave (prédio, unidade, mês). Os indicadores (média móvel, variação
+em relação ao mês anterior e alerta de anomalia) são calculados na chegada do
+mês e gravados junto; para isso só são lidos os JANELA meses anteriores, nunca
+a série inteira.
+"""
+import re
+import sqlite3
+from contextlib import closing
+
+import numpy as np
+import pandas as pd
+
+from .historico import CAMINHO_PADRAO
+
+JANELA = 6              # meses da média móvel e da base de comparação
+MIN_MESES_BASE = 3      # meses anteriores necessários para avaliar anomalias
+LIMITE_Z = 3.0          # desvios da base a partir dos quais o consumo é anômalo
+
+# Colunas do banco -> cabeçalhos exibidos
+COLUNAS_SERIE = {
+    "mes": "Mês",
+    "unidade": "Unidade",
+    "consumo_kwh": "Consumo (kWh)",
+    "valor": "Valor (R$)",
+    "media_movel": f"Média {JANELA} meses (kWh)",
+    "delta_kwh": "Δ mês anterior (kWh)",
+    "delta_pct": "Δ mês anterior (%)",
+    "z": "Desvios da média",
+    "anomalia": "Alerta",
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS serie_mensal (
+    predio      TEXT NOT NULL,
+    unidade     TEXT NOT NULL,
+    mes         TEXT NOT NULL,   -- AAAA-MM
+    consumo_kwh REAL,
+    valor       REAL,
+    media_movel REAL,
+    delta_kwh   REAL,
+    delta_pct   REAL,
+    z           REAL,
+    anomalia    TEXT,
+    PRIMARY KEY (predio, unidade, mes)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS ix_serie_predio_mes ON serie_mensal (predio, mes);
+"""
+
+_PADROES_MES = [
+    (re.compile(r"(\d{4})[-_/.](\d{1,2})(?!\d)"), (1, 2)),   # AAAA-MM
+    (re.compile(r"(?<!\d)(\d{1,2})[-_/.](\d{4})"), (2, 1)),  # MM/AAAA (também em DD/MM/AAAA)
+]
+
+
+def mes_do_texto(*textos) -> str | None:
+    """
+    Procura um mês (AAAA-MM, MM/AAAA ou DD/MM/AAAA) nos textos, na ordem dada.
+    Serve para deduzir o mês de um backup pelo nome do arquivo ou pela Identificação.
+    """
+    for texto in textos:
+        if not isinstance(texto, str):
+            continue
+        for padrao, (g_ano, g_mes) in _PADROES_MES:
+            for achado in padrao.finditer(texto):
+                ano, mes = int(achado.group(g_ano)), int(achado.group(g_mes))
+                if 1 <= mes <= 12 and 1900 <= ano <= 2999:
+                    return f"{ano:04d}-{mes:02d}"
+    return None
+
+
+def calcular_indicadores(largura: pd.DataFrame) -> dict[str, pd.DataFrame]:
+    """
+    Indicadores de uma tabela unidades × meses (colunas em ordem crescente).
+    A média móvel inclui o próprio mês; a anomalia compara o mês com a média e
+    o desvio dos JANELA meses anteriores.
+    """
+    por_mes = largura.T  # rolling/shift ao longo dos meses
+    anterior = por_mes.shift(1)
+    base = anterior.rolling(JANELA, min_periods=MIN_MESES_BASE)
+    media_base = base.mean()
+    # Piso no desvio: séries muito estáveis não disparam alerta por poucos kWh
+    desvio = np.maximum(base.std(ddof=0), np.maximum(0.1 * media_base, 1.0))
+    z = (por_mes - media_base) / desvio
+
+    anomalia = pd.DataFrame(None, index=por_mes.index, columns=por_mes.columns, dtype=object)
+    anomalia = anomalia.mask(z > LIMITE_Z, "Acima do normal")
+    anomalia = anomalia.mask(z < -LIMITE_Z, "Abaixo do normal")
+    anomalia = anomalia.mask((por_mes == 0) & (media_base > 0), "Consumo zerado")
+
+    delta = por_mes - anterior
+    return {
+        "media_movel": por_mes.rolling(JANELA, min_periods=1).mean().T,
+        "delta_kwh": delta.T,
+        "delta_pct": (delta / anterior.where(anterior > 0) * 100).T,
+        "z": z.T,
+        "anomalia": anomalia.T,
+    }
+
+
+class SerieMensal:
+    """
+    Série mensal por unidade em SQLite (por padrão, o mesmo arquivo do histórico).
+    Abre uma conexão por operação, como HistoricoSQLite.
+    """
+
+    def __init__(self, caminho=CAMINHO_PADRAO):
+        self.caminho = str(caminho)
+        with closing(self._conectar()) as con:
+            con.execute("PRAGMA journal_mode=WAL")
+            con.executescript(_SCHEMA)
+
+    def _conectar(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.caminho, timeout=30)
+
+    # ===================== ESCRITA =====================
+    def adicionar_mes(self, predio: str, mes: str, df: pd.DataFrame) -> int:
+        """
+        Grava (ou substitui) o mês do prédio a partir de um resultado indexado por
+        unidade, com as colunas "Consumo (kWh)" e "Valor (R$)".
+        Recalcula os indicadores desse mês e, se ele não for o último, dos meses
+        seguintes. Retorna quantos meses foram recalculados.
+        """
+        valores = df["Valor (R$)"] if "Valor (R$)" in df.columns else pd.Series(np.nan, index=df.index)
+        linhas = [
+            (predio, str(unidade), mes, float(consumo), None if pd.isna(valor) else float(valor))
+            for unidade, consumo, valor in zip(df.index, pd.to_numeric(df["Consumo (kWh)"], errors="coerce").fillna(0), valores)
+        ]
+        with closing(self._conectar()) as con, con:
+            con.execute("DELETE FROM serie_mensal WHERE predio = ? AND mes = ?", (predio, mes))
+            con.executemany(
+                "INSERT INTO serie_mensal (predio, unidade, mes, consumo_kwh, valor) VALUES (?, ?, ?, ?, ?)",
+                linhas,
+            )
+            return self._recalcular(con, predio, mes)
+
+    def _recalcular(self, con: sqlite3.Connection, predio: str, mes: str) -> int:
+        """Atualiza os indicadores de `mes` em diante, lendo só a janela anterior a ele."""
+        anteriores = con.execute(
+            "SELECT DISTINCT mes FROM serie_mensal WHERE predio = ? AND mes < ? ORDER BY mes DESC LIMIT ?",
+            (predio, mes, JANELA),
+        ).fetchall()
+        inicio = anteriores[-1][0] if anteriores else mes
+        linhas = pd.read_sql_query(
+            "SELECT unidade, mes, consumo_kwh FROM serie_mensal WHERE predio = ? AND mes >= ?",
+            con, params=(predio, inicio),
+        )
+        largura = linhas.pivot(index="unidade", columns="mes", values="consumo_kwh").sort_index(axis=1)
+        indicadores = calcular_indicadores(largura)
+
+        # Só as células existentes dos meses recalculados voltam para o banco
+        novos = pd.DataFrame({nome: tabela.stack(future_stack=True) for nome, tabela in indicadores.items()})
+        existe = largura.notna().stack(future_stack=True).to_numpy()
+        novos = novos[existe & (novos.index.get_level_values("mes") >= mes)]
+        novos = novos.astype(object).where(novos.notna(), None)
+        con.executemany(
+            "UPDATE serie_mensal SET media_movel = ?, delta_kwh = ?, delta_pct = ?, z = ?, anomalia = ?"
+            " WHERE predio = ? AND unidade = ? AND mes = ?",
+            [(*valores, predio, unidade, mes_linha) for (unidade, mes_linha), valores in zip(novos.index, novos.itertuples(index=False))],
+        )
+        return int((largura.columns >= mes).sum())
+
+    def limpar(self, predio: str) -> None:
+        """Apaga a série inteira de um prédio."""
+        with closing(self._conectar()) as con, con:
+            con.execute("DELETE FROM serie_mensal WHERE predio = ?", (predio,))
+
+    # ===================== LEITURA =====================
+    def meses(self, predio: str) -> list[str]:
+        """Meses (AAAA-MM) carregados para o prédio, em ordem crescente."""
+        with closing(self._conectar()) as con:
+            linhas = con.execute(
+                "SELECT DISTINCT mes FROM serie_mensal WHERE predio = ? ORDER BY mes", (predio,)
+            ).fetchall()
+        return [mes for (mes,) in linhas]
+
+    def ler(
+        self,
+        predio: str,
+        unidade: str | None = None,
+        mes_inicio: str | None = None,
+        mes_fim: str | None = None,
+        so_anomalias: bool = False,
+    ) -> pd.DataFrame:
+        """Linhas da série (com indicadores), por mês e unidade, já com os cabeçalhos de exibição."""
+        condicoes, params = ["predio = ?"], [predio]
+        for condicao, valor in (("unidade = ?", unidade), ("mes >= ?", mes_inicio), ("mes <= ?", mes_fim)):
+            if valor is not None:
+                condicoes.append(condicao)
+                params.append(valor)
+        if so_anomalias:
+            condicoes.append("anomalia IS NOT NULL")
+        sql = (f"SELECT {', '.join(COLUNAS_SERIE)} FROM serie_mensal WHERE {' AND '.join(condicoes)}"
+               " ORDER BY mes, unidade")
+        with closing(self._conectar()) as con:
+            df = pd.read_sql_query(sql, con, params=params)
+        return df.rename(columns=COLUNAS_SERIE)
+
+    def tabela_consumo(self, predio: str) -> pd.DataFrame:
+        """Consumo em formato largo: uma linha por unidade, uma coluna por mês."""
+        with closing(self._conectar()) as con:
+            linhas = pd.read_sql_query(
+                "SELECT unidade, mes, consumo_kwh FROM serie_mensal WHERE predio = ?", con, params=(predio,)
+            )
+        return linhas.pivot(index="unidade", columns="mes", values="consumo_kwh").sort_index(axis=1)
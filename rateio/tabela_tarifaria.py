@@ -0,0 +1,142 @@
+"""
+Tabela tarifária genérica: qualquer número de faixas de consumo, limites
+diferentes para TE, TUSD e bandeira, e valores próprios para cada bandeira.
+
+A tabela é compilada em arrays de custo acumulado nos limites das faixas.
+Assim, o custo de qualquer consumo é um searchsorted (acha a faixa) mais
+uma multiplicação-soma (acumulado + excedente × preço da faixa).
+
+As contas são feitas em inteiros: consumo em Wh, preços em milionésimos de
+R$/kWh (a precisão das tarifas publicadas) e custo em bilionésimos de R$. O
+custo é exato, não depende da ordem das somas, e o arredondamento para
+centavos é o comercial (meio centavo para cima), sem resíduo de ponto flutuante.
+"""
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from typing import NamedTuple
+
+import numpy as np
+
+WH_POR_KWH = 1000
+ESCALA_PRECO = 10**6                                  # preço: milionésimos de R$/kWh
+ESCALA_CUSTO = WH_POR_KWH * ESCALA_PRECO              # custo: bilionésimos de R$
+UNIDADES_POR_CENTAVO = ESCALA_CUSTO // 100
+
+
+def em_wh(consumos) -> np.ndarray:
+    """Consumos em kWh -> Wh inteiros (int64)."""
+    return np.rint(np.asarray(consumos, dtype=float) * WH_POR_KWH).astype(np.int64)
+
+
+def centavos_de(custos) -> np.ndarray:
+    """Custos exatos (bilionésimos de R$) -> centavos, arredondando meio centavo para cima."""
+    return (np.asarray(custos, dtype=np.int64) + UNIDADES_POR_CENTAVO // 2) // UNIDADES_POR_CENTAVO
+
+
+# ===================== DEFINIÇÃO =====================
+@dataclass(frozen=True)
+class Faixas:
+    """
+    Preço por kWh em faixas de consumo.
+    limites=(150,) e precos=(a, b): o que vai até 150 kWh custa a, o excedente custa b.
+    Sem limites, é um preço único.
+    """
+    limites: tuple = ()
+    precos: tuple = (0.0,)
+
+    def __post_init__(self):
+        limites = tuple(float(x) for x in self.limites)
+        precos = tuple(float(x) for x in self.precos)
+        if len(precos) != len(limites) + 1:
+            raise ValueError("Informe um preço a mais que o número de limites (um por faixa).")
+        if any(x <= 0 for x in limites) or any(b <= a for a, b in zip(limites, limites[1:])):
+            raise ValueError("Os limites das faixas devem ser positivos e crescentes.")
+        object.__setattr__(self, "limites", limites)
+        object.__setattr__(self, "precos", precos)
+
+    def preco_em(self, inicios: np.ndarray) -> np.ndarray:
+        """Preço da faixa que contém cada início de segmento."""
+        return np.asarray(self.precos)[np.searchsorted(self.limites, inicios, side="right")]
+
+
+@dataclass(frozen=True)
+class TabelaTarifaria:
+    """
+    Tabela de uma concessionária: faixas de TE e TUSD, faixas de cada bandeira e COSIP.
+    """
+    te: Faixas
+    tusd: Faixas
+    bandeiras: dict = field(hash=False)  # nome da bandeira -> Faixas
+    cosip: float = 0.0
+
+    def compilar(self, bandeira: str) -> "TabelaCompilada":
+        """Gera as tabelas de custo acumulado para a bandeira escolhida."""
+        if bandeira not in self.bandeiras:
+            raise ValueError(f"Bandeira sem valores na tabela: {bandeira}")
+        faixas_bandeira = self.bandeiras[bandeira]
+        return TabelaCompilada(
+            te=compilar_faixas(self.te),
+            tusd=compilar_faixas(self.tusd),
+            bandeira=compilar_faixas(faixas_bandeira),
+            total=compilar_faixas(self.te, self.tusd, faixas_bandeira),
+            cosip=float(self.cosip),
+            usar_bandeira_por_faixa=len(faixas_bandeira.limites) > 0,
+        )
+
+
+# ===================== COMPILAÇÃO =====================
+class CustoCompilado(NamedTuple):
+    """
+    Custo acumulado por segmento, em inteiros: o segmento k começa em inicios[k] Wh,
+    onde o custo já é acumulado[k] (bilionésimos de R$), e cada Wh a mais custa
+    precos[k] (milionésimos de R$/kWh). segmentos traz as mesmas três colunas em
+    listas de int do Python, para custo_escalar.
+    """
+    inicios: np.ndarray
+    precos: np.ndarray
+    acumulado: np.ndarray
+    segmentos: tuple
+
+    def custo_exato(self, consumos_wh) -> np.ndarray:
+        """Custo exato (bilionésimos de R$) de um array de consumos em Wh."""
+        consumos_wh = np.asarray(consumos_wh, dtype=np.int64)
+        k = np.maximum(np.searchsorted(self.inicios, consumos_wh, side="right") - 1, 0)
+        return self.acumulado[k] + (consumos_wh - self.inicios[k]) * self.precos[k]
+
+    def custo(self, consumos) -> np.ndarray:
+        """Custo (R$, arredondado em centavos) de um array de consumos em kWh."""
+        return centavos_de(self.custo_exato(em_wh(consumos))) / 100
+
+    def custo_escalar(self, consumo: float) -> float:
+        """Custo de um único consumo, sem o overhead de criar arrays."""
+        inicios, precos, acumulado = self.segmentos
+        wh = round(consumo * WH_POR_KWH)
+        k = max(bisect_right(inicios, wh) - 1, 0)
+        exato = acumulado[k] + (wh - inicios[k]) * precos[k]
+        return ((exato + UNIDADES_POR_CENTAVO // 2) // UNIDADES_POR_CENTAVO) / 100
+
+
+def compilar_faixas(*componentes: Faixas) -> CustoCompilado:
+    """
+    Soma uma ou mais componentes (ex.: TE + TUSD + bandeira) em uma única tabela
+    de custo acumulado, usando a união de todos os limites.
+    """
+    limites = sorted({limite for faixas in componentes for limite in faixas.limites})
+    inicios = np.array([0.0] + limites)
+    precos = sum(np.rint(faixas.preco_em(inicios) * ESCALA_PRECO).astype(np.int64) for faixas in componentes)
+    inicios = em_wh(inicios)
+    precos = np.asarray(precos, dtype=np.int64)
+    acumulado = np.concatenate(([0], np.cumsum(np.diff(inicios) * precos[:-1]))).astype(np.int64)
+    # Listas calculadas uma vez aqui: custo_escalar roda a cada unidade digitada
+    segmentos = (inicios.tolist(), precos.tolist(), acumulado.tolist())
+    return CustoCompilado(inicios, precos, acumulado, segmentos)
+
+
+class TabelaCompilada(NamedTuple):
+    """Tabela pronta para o cálculo: custo de cada componente e do total (sem COSIP)."""
+    te: CustoCompilado
+    tusd: CustoCompilado
+    bandeira: CustoCompilado
+    total: CustoCompilado
+    cosip: float
+    usar_bandeira_por_faixa: bool
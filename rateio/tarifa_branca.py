@@ -0,0 +1,167 @@
+"""
+Tarifa branca (modalidade horária): preço por kWh conforme o posto tarifário
+do intervalo em que a energia foi consumida.
+
+- Ponta: horas_ponta horas a partir de inicio_ponta, em dias úteis;
+- Intermediário: horas_intermediario hora(s) antes e depois da ponta, em dias úteis;
+- Fora ponta: o resto do dia, e o dia inteiro em sábados, domingos e feriados nacionais.
+
+O posto é calculado uma vez por horário do mês (não por unidade). A energia de
+todas as unidades por posto sai de uma multiplicação de matrizes
+(unidades × intervalos) @ (intervalos × postos), e o custo de
+energia_por_posto @ preços. O resultado alimenta os mesmos métodos de rateio da
+tarifa convencional (Faixas individuais e Proporcional ao total da fatura).
+"""
+from dataclasses import dataclass
+from datetime import date, timedelta
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from .calculo import BANDEIRA_VALOR_UNICO, ResultadoRateio, montar_resultado, para_centavos, ratear_proporcional
+from .tabela_tarifaria import ESCALA_PRECO, centavos_de, em_wh
+
+POSTOS = ["Fora ponta", "Intermediário", "Ponta"]
+FORA_PONTA, INTERMEDIARIO, PONTA = range(len(POSTOS))
+MINUTOS_DIA = 24 * 60
+
+
+@dataclass(frozen=True)
+class TarifaBranca:
+    """
+    Preços (R$/kWh com tributos) de cada posto e horários da ponta.
+    Os valores padrão são apenas de referência: ajuste conforme a fatura da concessionária.
+    """
+    te_fora_ponta: float = 0.290000
+    te_intermediario: float = 0.290000
+    te_ponta: float = 0.460000
+    tusd_fora_ponta: float = 0.190000
+    tusd_intermediario: float = 0.520000
+    tusd_ponta: float = 1.020000
+    bandeira: str = "Vermelha 1"     # valor único por kWh, igual em todos os postos
+    cosip: float = 61.00
+    inicio_ponta: str = "18:30"      # horário de ponta da Celesc: 18h30 às 21h30
+    horas_ponta: float = 3.0
+    horas_intermediario: float = 1.0
+    feriados_extras: tuple = ()      # datas ISO (ex.: feriados municipais), tratadas como fora ponta
+
+    @property
+    def precos(self) -> np.ndarray:
+        """Preço total (TE + TUSD + bandeira) de cada posto, na ordem de POSTOS."""
+        bandeira = BANDEIRA_VALOR_UNICO[self.bandeira]
+        return np.array([
+            self.te_fora_ponta + self.tusd_fora_ponta + bandeira,
+            self.te_intermediario + self.tusd_intermediario + bandeira,
+            self.te_ponta + self.tusd_ponta + bandeira,
+        ])
+
+
+# ===================== POSTOS TARIFÁRIOS =====================
+def _pascoa(ano: int) -> date:
+    """Domingo de Páscoa (algoritmo de Meeus/Jones/Butcher, calendário gregoriano)."""
+    a, b, c = ano % 19, ano // 100, ano % 100
+    d, e = b // 4, b % 4
+    g = (8 * b + 13) // 25
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = c // 4, c % 4
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    mes = (h + l - 7 * m + 114) // 31
+    dia = (h + l - 7 * m + 114) % 31 + 1
+    return date(ano, mes, dia)
+
+
+@lru_cache(maxsize=32)
+def feriados_nacionais(ano: int) -> frozenset:
+    """Feriados em que todo o dia é fora ponta (lista da ANEEL para a tarifa horária)."""
+    pascoa = _pascoa(ano)
+    fixos = [(1, 1), (4, 21), (5, 1), (9, 7), (10, 12), (11, 2), (11, 15), (11, 20), (12, 25)]
+    moveis = [
+        pascoa - timedelta(days=47),  # terça-feira de Carnaval
+        pascoa - timedelta(days=2),   # Sexta-feira da Paixão
+        pascoa + timedelta(days=60),  # Corpus Christi
+    ]
+    return frozenset([date(ano, mes, dia) for mes, dia in fixos] + moveis)
+
+
+def postos_horarios(horarios, tarifa: TarifaBranca = TarifaBranca()) -> np.ndarray:
+    """
+    Posto (FORA_PONTA, INTERMEDIARIO ou PONTA) de cada horário de início de intervalo,
+    calculado para o array inteiro de uma vez.
+    As janelas podem passar da meia-noite (ex.: ponta começando às 22h30); o dia
+    útil é o do início da janela (intermediário de antes da ponta), mesmo que o
+    horário já seja do dia seguinte.
+    """
+    ponta = tarifa.horas_ponta * 60
+    margem = tarifa.horas_intermediario * 60
+    if ponta < 0 or margem < 0 or ponta + 2 * margem > MINUTOS_DIA:
+        raise ValueError("Ponta e intermediário (antes e depois) precisam caber em 24 horas")
+    horarios = pd.DatetimeIndex(horarios)
+    hora, minuto = (int(parte) for parte in tarifa.inicio_ponta.split(":"))
+    # Minutos desde o início da janela (intermediário de antes), módulo 24 h
+    desde_janela = (horarios.hour * 60 + horarios.minute - (hora * 60 + minuto - margem)) % MINUTOS_DIA
+
+    dias = (horarios - pd.to_timedelta(desde_janela, unit="min")).normalize()
+    feriados = set().union(*(feriados_nacionais(ano) for ano in np.unique(dias.year))) if len(horarios) else set()
+    feriados |= {date.fromisoformat(str(d)) for d in tarifa.feriados_extras}
+    dia_util = (dias.dayofweek < 5) & ~dias.isin(pd.DatetimeIndex(sorted(feriados)))
+
+    postos = np.full(len(horarios), FORA_PONTA, dtype=np.int8)
+    postos[dia_util & (desde_janela < ponta + 2 * margem)] = INTERMEDIARIO
+    postos[dia_util & (desde_janela >= margem) & (desde_janela < margem + ponta)] = PONTA
+    return postos
+
+
+# ===================== ENERGIA E CUSTO POR POSTO =====================
+def energia_por_posto(consumos, horarios, tarifa: TarifaBranca = TarifaBranca()) -> np.ndarray:
+    """
+    kWh de cada unidade em cada posto.
+    consumos: matriz (unidades × intervalos) de kWh por intervalo; horarios: início de cada intervalo.
+    Retorna (unidades × 3), colunas na ordem de POSTOS. Intervalos vazios (NaN) contam como 0.
+    """
+    consumos = np.nan_to_num(np.atleast_2d(np.asarray(consumos, dtype=float)))
+    postos = postos_horarios(horarios, tarifa)
+    if consumos.shape[-1] != len(postos):
+        raise ValueError("Informe um horário para cada intervalo de consumo.")
+    return consumos @ np.eye(len(POSTOS))[postos]
+
+
+def custo_por_posto(energia_postos, tarifa: TarifaBranca = TarifaBranca()):
+    """
+    Custo (R$, sem COSIP) de cada linha de energia por posto. Como na tabela tarifária,
+    a conta é em inteiros (Wh × milionésimos de R$/kWh) e o centavo é arredondado para cima no meio.
+    """
+    precos = np.rint(tarifa.precos * ESCALA_PRECO).astype(np.int64)
+    return centavos_de(em_wh(energia_postos) @ precos) / 100
+
+
+def calcular_rateio_branca(
+    nomes,
+    energia_postos,
+    tarifa: TarifaBranca,
+    metodo: str,
+    energia_postos_predio=None,
+) -> ResultadoRateio:
+    """
+    Rateio de um prédio na tarifa branca. energia_postos é (unidades × 3), como em
+    energia_por_posto; energia_postos_predio é o medidor principal (3 valores) ou
+    None para usar a soma das unidades.
+    - Faixas individuais: cada unidade paga a própria energia por posto;
+    - Proporcional: o total da fatura do prédio é dividido pelo consumo (kWh) de cada unidade.
+    A diferença entre o prédio e as unidades vai para "Áreas Comuns", como na tarifa convencional.
+    """
+    energia_postos = np.atleast_2d(np.asarray(energia_postos, dtype=float))
+    predio = energia_postos.sum(axis=0) if energia_postos_predio is None else np.asarray(energia_postos_predio, dtype=float)
+    consumos = energia_postos.sum(axis=1)
+    consumo_total = float(predio.sum())
+
+    valor_base = float(custo_por_posto(predio, tarifa))
+    valor_total = int(para_centavos(valor_base) + para_centavos(tarifa.cosip)) / 100
+    if metodo == "Faixas individuais":
+        valores_individuais = custo_por_posto(energia_postos, tarifa)
+    elif metodo == "Proporcional ao total da fatura":
+        valores_individuais = ratear_proporcional(consumos, consumo_total, valor_total)
+    else:
+        raise ValueError(f"Método de rateio desconhecido: {metodo}")
+    return montar_resultado(nomes, consumos, consumo_total, valor_base, valor_total, valores_individuais)
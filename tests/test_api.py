@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from rateio import Tarifas, calcular_rateio
+from rateio.api import (
+    COSIP_MAX, CONSUMO_MAX_KWH, TARIFA_MAX_KWH, ErroRequisicao, calcular_json, calcular_lote_json, gerar_xlsx,
+)
+
+
+def test_calcular_json_igual_a_calcular_rateio():
+    corpo = {
+        "unidades": [
+            {"nome": "A", "consumo_kwh": 120.5},
+            {"nome": "B", "leitura_anterior": 1000, "leitura_atual": 1130},
+        ],
+        "tarifas": {"bandeira": "Amarela", "cosip": 50.0},
+        "leitura_predio": {"anterior": 5000, "atual": 5300},
+    }
+    resposta = calcular_json(corpo)
+    esperado = calcular_rateio(["A", "B"], np.array([120.5, 130.0]), Tarifas(bandeira="Amarela", cosip=50.0),
+                               "Proporcional ao total da fatura", 300.0)
+    assert [u["valor"] for u in resposta["unidades"]] == esperado.df["Valor (R$)"].tolist()
+    assert resposta["valor_total"] == esperado.valor_total
+
+
+@pytest.mark.parametrize("corpo", [
+    [],
+    {"unidades": []},
+    {"unidades": [{"nome": "A"}]},
+    {"unidades": [{"consumo_kwh": 1}], "metodo": "Outro"},
+    {"unidades": [{"consumo_kwh": 1}], "tarifas": {"bandeira": "Roxa"}},
+    {"unidades": [{"consumo_kwh": 1}], "tarifas": {"preco": 1}},
+    {"unidades": [{"consumo_kwh": 1}], "tarifas": {"te_ate_150": "nan"}},
+    {"unidades": [{"consumo_kwh": 1}], "tarifas": {"cosip": "inf"}},
+    {"unidades": [{"consumo_kwh": 1}], "tarifas": {"tusd_acima_150": 1e12}},
+    {"unidades": [{"consumo_kwh": 1e15}]},
+    {"unidades": [{"consumo_kwh": 6e5}, {"consumo_kwh": 6e5}]},
+    {"unidades": [{"leitura_anterior": 0, "leitura_atual": 1e300}]},
+    {"unidades": [{"consumo_kwh": 1}], "consumo_total_kwh": 1e15},
+])
+def test_corpo_invalido(corpo):
+    with pytest.raises(ErroRequisicao):
+        calcular_json(corpo)
+
+
+def test_lote_um_erro_nao_derruba_os_outros():
+    resposta = calcular_lote_json({"predios": [{"unidades": [{"consumo_kwh": 10}]}, {"unidades": []}]})
+    assert "valor_total" in resposta["resultados"][0]
+    assert "erro" in resposta["resultados"][1]
+
+
+def test_xlsx():
+    assert gerar_xlsx({"unidades": [{"consumo_kwh": 10}]})[:2] == b"PK"
+
+
+def test_consumo_e_tarifas_no_limite_nao_estouram():
+    tarifas = {nome: TARIFA_MAX_KWH for nome in ("te_acima_150", "tusd_acima_150", "bandeira_acima_150")}
+    resposta = calcular_json({
+        "unidades": [{"consumo_kwh": CONSUMO_MAX_KWH / 2}, {"consumo_kwh": CONSUMO_MAX_KWH / 4}],
+        "tarifas": {**tarifas, "cosip": COSIP_MAX},
+        "consumo_total_kwh": CONSUMO_MAX_KWH,
+    })
+    valores = [u["valor"] for u in resposta["unidades"]]
+    assert min(valores) > 0
+    assert sum(valores) == pytest.approx(resposta["valor_total"])
@@ -0,0 +1,101 @@
+import asyncio
+import json
+import re
+
+import pytest
+
+from rateio.api import ServidorRateio
+
+CORPO = json.dumps({"unidades": [{"nome": "A", "consumo_kwh": 100}]}).encode()
+
+
+async def _conversar(*envios: bytes) -> tuple[bytes, list]:
+    """Envia os bytes para um servidor novo e devolve tudo o que ele respondeu até fechar a conexão."""
+    loop = asyncio.get_running_loop()
+    erros = []
+    loop.set_exception_handler(lambda _loop, contexto: erros.append(contexto))
+    servidor = ServidorRateio(processos=1)
+    tcp = await servidor.iniciar("127.0.0.1", 0)
+    try:
+        porta = tcp.sockets[0].getsockname()[1]
+        leitor, escritor = await asyncio.open_connection("127.0.0.1", porta)
+        for envio in envios:
+            escritor.write(envio)
+        await escritor.drain()
+        resposta = await asyncio.wait_for(leitor.read(), 30)
+        escritor.close()
+    finally:
+        tcp.close()
+        await tcp.wait_closed()
+        servidor.fechar()
+    return resposta, erros
+
+
+def conversar(*envios: bytes) -> bytes:
+    resposta, erros = asyncio.run(_conversar(*envios))
+    assert erros == []  # nada de "Unhandled exception in client_connected_cb"
+    return resposta
+
+
+def status(resposta: bytes) -> list[int]:
+    # As respostas vêm coladas: a linha de status seguinte começa logo depois do corpo JSON
+    return [int(codigo) for codigo in re.findall(rb"HTTP/1\.1 (\d{3}) ", resposta)]
+
+
+def test_requisicao_valida_e_keep_alive():
+    pedido = b"POST /rateio HTTP/1.1\r\nContent-Length: %d\r\n\r\n%s" % (len(CORPO), CORPO)
+    resposta = conversar(pedido, pedido.replace(b"HTTP/1.1\r\n", b"HTTP/1.1\r\nConnection: close\r\n", 1))
+    assert status(resposta) == [200, 200]
+    assert b'"valor_total"' in resposta
+
+
+def test_entrada_fora_dos_limites_responde_400():
+    corpo = json.dumps({"unidades": [{"consumo_kwh": 1e300}], "tarifas": {"te_ate_150": "nan"}}).encode()
+    resposta = conversar(b"POST /rateio HTTP/1.1\r\nConnection: close\r\nContent-Length: %d\r\n\r\n%s" % (len(corpo), corpo))
+    assert status(resposta) == [400]
+    assert b"NaN" not in resposta
+
+
+@pytest.mark.parametrize("content_length, esperado", [
+    (b"abc", 400),
+    (b"-4", 400),
+    (b"1e3", 400),
+    (b"5, 7", 400),
+    (b"999999999999", 413),
+])
+def test_content_length_invalido(content_length, esperado):
+    resposta = conversar(b"POST /rateio HTTP/1.1\r\nContent-Length: " + content_length + b"\r\n\r\n{}")
+    assert status(resposta) == [esperado]
+
+
+def test_content_length_repetido_e_diferente():
+    resposta = conversar(b"POST /rateio HTTP/1.1\r\nContent-Length: 2\r\nContent-Length: 3\r\n\r\n{}")
+    assert status(resposta) == [400]
+
+
+def test_post_sem_content_length():
+    assert status(conversar(b"POST /rateio HTTP/1.1\r\n\r\n")) == [411]
+
+
+def test_chunked_nao_vira_a_proxima_requisicao():
+    corpo = b"GET /saude HTTP/1.1\r\n\r\n"  # se fosse lido como requisição, viria um 200 a mais
+    pedido = b"POST /rateio HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n%x\r\n%s\r\n0\r\n\r\n" % (len(corpo), corpo)
+    assert status(conversar(pedido)) == [501]
+
+
+def test_cabecalho_grande_demais():
+    pedido = b"GET /saude HTTP/1.1\r\nX-Longo: " + b"a" * 70_000 + b"\r\n\r\n"
+    assert status(conversar(pedido)) == [431]
+
+
+@pytest.mark.parametrize("pedido", [
+    b"LIXO\r\n\r\n",
+    b"GET /saude\r\n\r\n",
+    b"GET /saude HTTP/1.1\r\nsem-dois-pontos\r\n\r\n",
+])
+def test_requisicao_malformada(pedido):
+    assert status(conversar(pedido)) == [400]
+
+
+def test_get_sem_corpo_continua_aceito():
+    assert status(conversar(b"GET /saude HTTP/1.1\r\nConnection: close\r\n\r\n")) == [200]
@@ -0,0 +1,38 @@
+import pandas as pd
+
+from rateio.cache import CacheLRU, hash_dataframes
+from rateio.exportacao import relatorio_excel_em_cache
+
+
+def rateio(valor=150.0) -> pd.DataFrame:
+    return pd.DataFrame(
+        {"Consumo (kWh)": [130.0], "Valor (R$)": [valor]}, index=pd.Index(["Quitinete 1 - Ana"], name="Unidade")
+    )
+
+
+def test_hash_depende_do_conteudo_e_das_abas():
+    assert hash_dataframes(rateio(), None) == hash_dataframes(rateio(), None)
+    assert hash_dataframes(rateio(), None) != hash_dataframes(rateio(150.01), None)
+    assert hash_dataframes(rateio(), None) != hash_dataframes(None, rateio())
+    assert hash_dataframes(rateio()) != hash_dataframes(rateio().rename(columns={"Valor (R$)": "Total (R$)"}))
+
+
+def test_cache_descarta_o_usado_ha_mais_tempo():
+    cache = CacheLRU(max_itens=2)
+    geradas = []
+
+    def gerar(chave):
+        geradas.append(chave)
+        return chave.upper()
+
+    for chave in ["a", "b", "a", "c", "a", "b"]:
+        assert cache.obter(chave, lambda: gerar(chave)) == chave.upper()
+    # "b" saiu quando "c" entrou ("a" tinha sido usado depois dele) e foi gerado de novo
+    assert geradas == ["a", "b", "c", "b"]
+    assert len(cache) == 2
+
+
+def test_relatorio_so_e_gerado_de_novo_quando_o_conteudo_muda():
+    primeiro = relatorio_excel_em_cache(rateio())
+    assert relatorio_excel_em_cache(rateio()) is primeiro
+    assert relatorio_excel_em_cache(rateio(151.0)) is not primeiro
@@ -0,0 +1,103 @@
+import numpy as np
+import pytest
+
+from rateio import AREAS_COMUNS, Tarifas, calcular_fatura_total, calcular_rateio, calcular_valor_base
+from rateio.calculo import para_centavos, ratear, ratear_proporcional
+
+PROPORCIONAL = "Proporcional ao total da fatura"
+FAIXAS = "Faixas individuais"
+
+
+def valor_base_duas_faixas(consumo: float, tarifas: Tarifas) -> float:
+    """Fórmula do modelo de duas faixas escrita por extenso (como no app original)."""
+    c1 = min(consumo, 150.0)
+    c2 = max(consumo - 150.0, 0.0)
+    te = c1 * tarifas.te_ate_150 + c2 * tarifas.te_acima_150
+    tusd = c1 * tarifas.tusd_ate_150 + c2 * tarifas.tusd_acima_150
+    if tarifas.usar_bandeira_por_faixa:
+        bandeira = c1 * tarifas.bandeira_ate_150 + c2 * tarifas.bandeira_acima_150
+    else:
+        bandeira = consumo * tarifas.bandeira_valor_unico
+    return te + tusd + bandeira
+
+
+# ===================== MAIORES RESTOS =====================
+def test_ratear_proporcional_soma_exatamente_o_total():
+    rng = np.random.default_rng(0)
+    for _ in range(200):
+        consumos = np.round(rng.uniform(0, 500, rng.integers(1, 40)), 1)
+        consumo_total = round(float(consumos.sum() * rng.uniform(1.0, 1.3)), 1)
+        valor_total = round(float(rng.uniform(50, 5000)), 2)
+        valores = ratear_proporcional(consumos, consumo_total, valor_total)
+        areas_comuns = para_centavos(valor_total) - para_centavos(valores).sum()
+        parte_areas = (consumo_total - consumos.sum()) / consumo_total * valor_total
+        # Cada parcela fica a menos de 1 centavo da parte exata, e Áreas Comuns fecha o total
+        exatas = consumos / consumo_total * valor_total
+        assert np.all(np.abs(valores - exatas) < 0.01 + 1e-9)
+        assert abs(areas_comuns / 100 - parte_areas) < 0.01 + 1e-9
+
+
+def test_ratear_proporcional_centavo_extra_vai_para_maior_resto():
+    # 10,00 / 3 = 3,333...: sobra 1 centavo, e o empate fica com a primeira parcela
+    assert ratear_proporcional([1.0, 1.0, 1.0], 3.0, 10.0).tolist() == [3.34, 3.33, 3.33]
+    # Maior resto ganha o centavo: partes exatas 1,4 / 2,8 / 5,8 centavos
+    assert para_centavos(ratear_proporcional([1.0, 2.0, 4.14], 7.14, 0.10)).tolist() == [1, 3, 6]
+
+
+def test_ratear_proporcional_total_zero_da_zero():
+    assert ratear_proporcional([0.0, 0.0], 0.0, 61.0).tolist() == [0.0, 0.0]
+
+
+def test_ratear_proporcional_em_lote_igual_a_um_por_vez():
+    consumos = np.array([120.5, 80.0, 210.3])
+    totais = np.array([420.0, 500.0, 410.8])
+    valores = np.array([350.12, 480.99, 301.0])
+    lote = ratear_proporcional(consumos, totais, valores)
+    for i in range(len(totais)):
+        np.testing.assert_array_equal(lote[i], ratear_proporcional(consumos, totais[i], valores[i]))
+
+
+# ===================== TARIFAS E RATEIO =====================
+@pytest.mark.parametrize("por_faixa", [True, False])
+def test_valor_base_igual_a_formula_de_duas_faixas(por_faixa):
+    tarifas = Tarifas(usar_bandeira_por_faixa=por_faixa)
+    consumos = np.round(np.random.default_rng(1).uniform(0, 3000, 500), 1)
+    vetorizado = calcular_valor_base(consumos, tarifas)
+    esperado = np.array([valor_base_duas_faixas(c, tarifas) for c in consumos])
+    np.testing.assert_allclose(vetorizado, esperado, atol=0.005 + 1e-9)
+    assert calcular_valor_base(float(consumos[0]), tarifas) == vetorizado[0]
+
+
+def test_fatura_total_soma_cosip():
+    tarifas = Tarifas(cosip=61.0)
+    total, base = calcular_fatura_total(300.0, tarifas)
+    assert total == round(base + 61.0, 2)
+
+
+@pytest.mark.parametrize("metodo", [PROPORCIONAL, FAIXAS])
+def test_areas_comuns_fecha_o_total_da_fatura(metodo):
+    consumos = np.array([120.0, 95.5, 143.2])
+    resultado = calcular_rateio(["A", "B", "C"], consumos, Tarifas(), metodo, 420.0)
+    assert resultado.df.index[-1] == AREAS_COMUNS
+    assert resultado.df.loc[AREAS_COMUNS, "Consumo (kWh)"] == pytest.approx(420.0 - consumos.sum())
+    if metodo == PROPORCIONAL:
+        assert para_centavos(resultado.df["Valor (R$)"]).sum() == para_centavos(resultado.valor_total)
+
+
+def test_consumo_das_unidades_acima_do_predio_gera_alerta():
+    resultado = calcular_rateio(["A", "B"], [200.0, 200.0], Tarifas(), FAIXAS, 300.0)
+    assert resultado.alertas
+    assert AREAS_COMUNS not in resultado.df.index or resultado.df.loc[AREAS_COMUNS, "Consumo (kWh)"] == 0
+
+
+def test_sem_consumo_total_usa_soma_das_quitinetes():
+    resultado = calcular_rateio(["A", "B"], [100.0, 50.0], Tarifas(), PROPORCIONAL)
+    assert resultado.consumo_total == 150.0
+    # Proporcional: a fatura inteira (com a COSIP) fica com as quitinetes, sem Áreas Comuns
+    assert AREAS_COMUNS not in resultado.df.index
+    assert para_centavos(resultado.df["Valor (R$)"]).sum() == para_centavos(resultado.valor_total)
+
+
+def test_metodo_desconhecido():
+    with pytest.raises(ValueError):
+        ratear([1.0], 1.0, 1.0, Tarifas(), "Outro")
@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from rateio import BANDEIRAS, Tarifas, calcular_valor_base
+from rateio.calibracao import calibrar_tarifas, validar_faturas
+
+
+def faturas_sinteticas(tarifas: Tarifas, n: int = 300, semente: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(semente)
+    consumos = np.round(rng.uniform(30, 900, n), 1)
+    bandeiras = rng.choice(BANDEIRAS, n)
+    sem_bandeira = Tarifas(**{**tarifas.__dict__, "bandeira_ate_150": 0.0, "bandeira_acima_150": 0.0})
+    totais = np.where(
+        bandeiras == "Verde", calcular_valor_base(consumos, sem_bandeira), calcular_valor_base(consumos, tarifas)
+    ) + tarifas.cosip
+    return pd.DataFrame({"Consumo (kWh)": consumos, "Bandeira": bandeiras, "Total (R$)": np.round(totais, 2)})
+
+
+def test_recupera_os_parametros_das_faturas():
+    verdadeiras = Tarifas(te_ate_150=0.40, te_acima_150=0.43, tusd_ate_150=0.46, tusd_acima_150=0.49,
+                          bandeira_ate_150=0.05, bandeira_acima_150=0.06, cosip=58.3)
+    calibracao = calibrar_tarifas(faturas_sinteticas(verdadeiras), Tarifas())
+    ajustadas = calibracao.tarifas
+    assert ajustadas.te_ate_150 + ajustadas.tusd_ate_150 == pytest.approx(0.86, abs=1e-4)
+    assert ajustadas.te_acima_150 + ajustadas.tusd_acima_150 == pytest.approx(0.92, abs=1e-4)
+    assert ajustadas.cosip == pytest.approx(58.3, abs=0.05)
+    assert calibracao.bandeiras.loc["Verde"].tolist() == [0.0, 0.0]
+    assert calibracao.rmse < 0.01
+    assert not calibracao.residuos["Fora da tolerância"].any()
+
+
+def test_fatura_discrepante_sai_do_ajuste():
+    faturas = faturas_sinteticas(Tarifas())
+    faturas.loc[7, "Total (R$)"] += 250.0  # multa/juros
+    calibracao = calibrar_tarifas(faturas, Tarifas())
+    assert not calibracao.residuos.loc[7, "Usada no ajuste"]
+    assert calibracao.residuos.loc[7, "Fora da tolerância"]
+    assert calibracao.rmse < 0.01
+
+
+def test_faturas_sem_colunas_obrigatorias():
+    with pytest.raises(ValueError):
+        validar_faturas(pd.DataFrame({"Consumo (kWh)": [100.0]}))
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from rateio import AREAS_COMUNS, Tarifas, calcular_rateio
+from rateio.calculo import para_centavos
+from rateio.cenarios import TOTAL_FATURA, comparar_cenarios
+
+
+@pytest.mark.parametrize("consumo_predio", [None, 1500.0])
+def test_cada_cenario_igual_a_calcular_rateio(consumo_predio):
+    rng = np.random.default_rng(5)
+    nomes = [f"Quitinete {i+1}" for i in range(12)]
+    consumos = np.round(rng.uniform(20, 250, len(nomes)), 1)
+    tarifas = Tarifas()
+    atual = ("Vermelha 1", True, "Proporcional ao total da fatura", "Soma das quitinetes")
+    comparacao = comparar_cenarios(nomes, consumos, tarifas, consumo_predio, atual)
+
+    for (bandeira, por_faixa, metodo, fonte), linha in comparacao.valores.iterrows():
+        tarifas_cenario = Tarifas(bandeira=bandeira, usar_bandeira_por_faixa=por_faixa)
+        consumo_total = consumo_predio if fonte == "Leituras do prédio" else None
+        resultado = calcular_rateio(nomes, consumos, tarifas_cenario, metodo, consumo_total)
+        np.testing.assert_array_equal(linha[nomes].to_numpy(dtype=float), resultado.df.loc[nomes, "Valor (R$)"].to_numpy())
+        assert linha[TOTAL_FATURA] == resultado.valor_total
+        areas = resultado.df.loc[AREAS_COMUNS, "Valor (R$)"] if AREAS_COMUNS in resultado.df.index else 0.0
+        assert para_centavos(linha[AREAS_COMUNS]) == para_centavos(areas)
+
+    assert (comparacao.deltas.loc[atual] == 0).all()
+
+
+def test_sem_leitura_do_predio_so_soma_das_quitinetes():
+    comparacao = comparar_cenarios(["A"], [100.0], Tarifas(), None, ("Verde", True, "Faixas individuais", "Soma das quitinetes"))
+    assert set(comparacao.valores.index.get_level_values("Fonte do consumo total")) == {"Soma das quitinetes"}
+    assert comparacao.deltas.shape == comparacao.valores.shape
+
+
+@pytest.mark.parametrize("atual", [
+    ("Verde", True, "Faixas individuais", "Leituras do prédio"),   # fonte sem o consumo do prédio
+    ("Roxa", True, "Faixas individuais", "Soma das quitinetes"),
+    ("Verde", True, "Outro método", "Soma das quitinetes"),
+])
+def test_cenario_atual_fora_da_comparacao(atual):
+    with pytest.raises(ValueError):
+        comparar_cenarios(["A"], [100.0], Tarifas(), None, atual)
@@ -0,0 +1,52 @@
+import io
+import zipfile
+
+import numpy as np
+import openpyxl
+import pytest
+
+from rateio import Tarifas, calcular_rateio
+from rateio.demonstrativos import MIN_UNIDADES_POOL, gerar_zip_demonstrativos, montar_demonstrativos
+from rateio.exportacao import montar_resumo
+
+METODOS = ["Faixas individuais", "Proporcional ao total da fatura"]
+
+
+def predio(n: int, metodo: str):
+    nomes = [f"Quitinete {i} - Morador" for i in range(n)]
+    nomes[-1] = nomes[0]  # dois inquilinos com o mesmo nome de arquivo
+    consumos = np.linspace(40.0, 260.0, n).round(1)
+    resultado = calcular_rateio(nomes, consumos, Tarifas(), metodo, consumos.sum() + 137.5)
+    resumo = montar_resumo("Maio", resultado, Tarifas(), metodo, "Leituras do prédio", 5000.0)
+    return resultado, resumo
+
+
+def total_do_arquivo(conteudo: bytes) -> float:
+    planilha = openpyxl.load_workbook(io.BytesIO(conteudo)).active
+    return next(valor for item, valor in planilha.iter_rows(values_only=True) if item == "Total a pagar (R$)")
+
+
+@pytest.mark.parametrize("metodo", METODOS)
+def test_demonstrativos_somam_a_fatura(metodo):
+    resultado, resumo = predio(12, metodo)
+    demonstrativos = montar_demonstrativos(resultado.df, resumo, Tarifas())
+    assert round(demonstrativos["Total a pagar (R$)"].sum(), 2) == resultado.valor_total
+    composicao = demonstrativos.filter(regex="^(TE|TUSD|Bandeira|COSIP) ").sum(axis=1)
+    np.testing.assert_allclose(composicao, demonstrativos["Valor da energia (R$)"], atol=1e-9)
+
+
+@pytest.mark.parametrize("processos, n", [(1, 12), (2, MIN_UNIDADES_POOL)])
+def test_zip_tem_um_demonstrativo_por_unidade(processos, n):
+    resultado, resumo = predio(n, METODOS[1])
+    destino = io.BytesIO()
+    total = gerar_zip_demonstrativos(
+        resultado.df, resumo, destino, Tarifas(), processos=processos, predio="Prédio", unidades_por_bloco=100
+    )
+    demonstrativos = montar_demonstrativos(resultado.df, resumo, Tarifas())
+    with zipfile.ZipFile(destino) as arquivo_zip:
+        nomes = arquivo_zip.namelist()
+        assert total == len(nomes) == n == len(set(nomes))
+        assert "Quitinete 0 - Morador (2).xlsx" in nomes
+        # Com o pool, os blocos entram no ZIP na ordem em que ficam prontos
+        totais = sorted(total_do_arquivo(arquivo_zip.read(nome)) for nome in nomes)
+    assert totais == sorted(demonstrativos["Total a pagar (R$)"])
@@ -0,0 +1,38 @@
+import io
+
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+
+from rateio import Tarifas, calcular_rateio
+from rateio.exportacao import gerar_relatorio_excel, linhas_historico, montar_aba_rateio, montar_resumo
+from rateio.importacao import indexar_resumo, ler_backup
+
+
+def test_relatorio_volta_igual_pelo_ler_backup():
+    nomes = ["Quitinete 1 - Ana", "Quitinete 2 - Bia", "Quitinete 3 - Cid"]
+    resultado = calcular_rateio(nomes, np.array([120.0, 80.5, 33.25]), Tarifas(), "Proporcional ao total da fatura", 260.0)
+    df_rateio = montar_aba_rateio(resultado.df, [1120.0, 2080.5, 533.25])
+    df_resumo = montar_resumo("Maio", resultado, Tarifas(), "Proporcional ao total da fatura", "Leituras do prédio", 5260.0)
+    df_historico = linhas_historico("Maio", resultado.df, resultado.valor_total, resultado.consumo_total)
+
+    backup = ler_backup(gerar_relatorio_excel(df_rateio, df_resumo, df_historico), ler_historico=True)
+    pd.testing.assert_frame_equal(backup.rateio.set_index("Unidade"), df_rateio, check_dtype=False)
+    assert indexar_resumo(backup.resumo) == dict(zip(df_resumo["Item"], df_resumo["Valor"]))
+    pd.testing.assert_frame_equal(backup.historico, df_historico, check_dtype=False)
+
+
+def test_nan_e_nat_viram_celula_vazia():
+    df = pd.DataFrame({
+        "Item": ["Leitura", "Data"],
+        "Valor": [np.nan, 1.0],
+        "Quando": [pd.Timestamp("2024-05-31 18:30"), pd.NaT],
+    })
+    conteudo = gerar_relatorio_excel(None, df)
+    # Um erro na escrita não sobe: vira uma aba "Erro" no fim do arquivo
+    assert load_workbook(io.BytesIO(conteudo), read_only=True).sheetnames == ["Resumo"]
+    backup = ler_backup(conteudo)
+    assert backup.resumo["Valor"].isna().tolist() == [True, False]
+    assert backup.resumo["Quando"].tolist()[0] == pd.Timestamp("2024-05-31 18:30")
+    assert backup.resumo["Quando"].isna().tolist() == [False, True]
+
@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from rateio.grafico import LIMITE_BARRAS, dados_grafico, figura_consumo, figura_em_cache
+
+
+def resultado(consumos) -> pd.DataFrame:
+    nomes = [f"Quitinete {i + 1}" for i in range(len(consumos))]
+    return pd.DataFrame({"Consumo (kWh)": consumos, "Valor (R$)": np.zeros(len(consumos))}, index=nomes)
+
+
+def test_top_n_soma_o_resto_em_outras_no_fim():
+    df = resultado([50.0, 300.0, 10.0, 120.0, 300.0, 75.0])
+    dados = dados_grafico(df, top_n=3)
+    assert dados["Unidade"].tolist() == ["Quitinete 2", "Quitinete 5", "Quitinete 4", "Outras (3 unidades)"]
+    assert dados["Consumo (kWh)"].tolist() == [300.0, 300.0, 120.0, 135.0]
+    assert dados["Consumo (kWh)"].sum() == pytest.approx(df["Consumo (kWh)"].sum())
+
+
+def test_ordenacoes_e_top_n_maior_que_a_tabela():
+    df = resultado([50.0, 300.0, 10.0])
+    assert dados_grafico(df, top_n=10, ordenacao="Menor consumo")["Consumo (kWh)"].tolist() == [10.0, 50.0, 300.0]
+    assert dados_grafico(df, ordenacao="Ordem da tabela")["Unidade"].tolist() == df.index.tolist()
+    # "Outras" continua no fim mesmo ordenando por menor consumo
+    assert dados_grafico(df, top_n=1, ordenacao="Menor consumo")["Unidade"].tolist() == ["Quitinete 2", "Outras (2 unidades)"]
+
+
+def test_um_unico_trace_e_webgl_para_muitas_unidades():
+    poucas = figura_consumo(dados_grafico(resultado([1.0, 2.0])))
+    muitas = figura_consumo(dados_grafico(resultado(np.arange(LIMITE_BARRAS + 1, dtype=float))))
+    assert [trace.type for trace in poucas.data] == ["bar"]
+    assert [trace.type for trace in muitas.data] == ["scattergl"]
+
+
+def test_figura_em_cache_por_conteudo_e_opcoes():
+    df = resultado([50.0, 300.0, 10.0])
+    assert figura_em_cache(df, 2) is figura_em_cache(df.copy(), 2)
+    assert figura_em_cache(df, 2) is not figura_em_cache(df, 0)
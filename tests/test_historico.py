@@ -0,0 +1,44 @@
+import pandas as pd
+
+from rateio.historico import HistoricoSQLite
+
+
+def resultado(valores) -> pd.DataFrame:
+    nomes = [f"Quitinete {i + 1}" for i in range(len(valores))]
+    return pd.DataFrame({"Consumo (kWh)": [v * 2 for v in valores], "Valor (R$)": valores}, index=nomes)
+
+
+def test_adicionar_e_ler_por_mes(tmp_path):
+    historico = HistoricoSQLite(tmp_path / "historico.sqlite3")
+    assert historico.adicionar("A", "2024-04", "Abril", resultado([10.0, 20.0]), 30.0, 60.0) == 2
+    historico.adicionar("A", "2024-05", "Maio", resultado([11.0, 21.0, 31.0]), 63.0, 126.0)
+    historico.adicionar("B", "2024-05", "Maio B", resultado([5.0]), 5.0, 10.0)
+
+    assert historico.meses("A") == ["2024-04", "2024-05"]
+    assert historico.contar("A") == 5
+    assert historico.contar("A", mes_inicio="2024-05") == 3
+    maio = historico.ler("A", "2024-05", "2024-05")
+    assert list(maio.columns) == ["index", "Consumo (kWh)", "Valor (R$)", "Identificação", "Consumo Total", "Valor Total"]
+    assert maio["Valor (R$)"].tolist() == [11.0, 21.0, 31.0]
+    assert set(maio["Identificação"]) == {"Maio"}
+    assert historico.ler("B")["index"].tolist() == ["Quitinete 1"]
+
+
+def test_pagina_na_ordem_de_gravacao(tmp_path):
+    historico = HistoricoSQLite(tmp_path / "historico.sqlite3")
+    for mes in ["2024-01", "2024-02", "2024-03"]:
+        historico.adicionar("A", mes, mes, resultado([1.0, 2.0]), 3.0, 6.0)
+    assert historico.pagina("A", 1, tamanho=4)["Identificação"].tolist() == ["2024-01"] * 2 + ["2024-02"] * 2
+    assert historico.pagina("A", 2, tamanho=4)["Identificação"].tolist() == ["2024-03"] * 2
+    assert historico.pagina("A", 3, tamanho=4).empty
+
+
+def test_limpar_so_apaga_o_predio_e_vale_para_outras_instancias(tmp_path):
+    caminho = tmp_path / "historico.sqlite3"
+    historico = HistoricoSQLite(caminho)
+    historico.adicionar("A", "2024-05", "Maio", resultado([1.0]), 1.0, 2.0)
+    historico.adicionar("B", "2024-05", "Maio", resultado([1.0]), 1.0, 2.0)
+    # Outra sessão (outra instância no mesmo arquivo) apaga o prédio A
+    HistoricoSQLite(caminho).limpar("A")
+    assert historico.contar("A") == 0 and historico.meses("A") == []
+    assert historico.contar("B") == 1
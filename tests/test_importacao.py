@@ -0,0 +1,35 @@
+import io
+
+import numpy as np
+import pandas as pd
+
+from rateio import Tarifas, calcular_rateio
+from rateio.exportacao import gerar_relatorio_excel, montar_aba_rateio, montar_resumo
+from rateio.importacao import importar_backup_em_cache, leituras_anteriores, ler_backup
+
+
+def backup_exportado() -> bytes:
+    nomes = ["Quitinete 1 - Ana", "Quitinete 2 - Bia"]
+    resultado = calcular_rateio(nomes, np.array([120.0, 80.0]), Tarifas(), "Faixas individuais", 260.0)
+    df_resumo = montar_resumo("Maio", resultado, Tarifas(), "Faixas individuais", "Leituras do prédio", 5260.0)
+    return gerar_relatorio_excel(montar_aba_rateio(resultado.df, [1120.0, 2080.0]), df_resumo)
+
+
+def test_app_e_lote_usam_as_mesmas_leituras_anteriores():
+    conteudo = backup_exportado()
+    esperado = {"Quitinete 1 - Ana": 1120.0, "Quitinete 2 - Bia": 2080.0}
+    assert importar_backup_em_cache(conteudo).prev_map == esperado
+    assert leituras_anteriores(ler_backup(conteudo).rateio) == esperado
+
+
+def test_backup_antigo_sem_leitura_atual_usa_o_consumo():
+    buffer = io.BytesIO()
+    with pd.ExcelWriter(buffer, engine="openpyxl") as writer:
+        pd.DataFrame({"Item": ["COSIP (R$)"], "Valor": [61.0]}).to_excel(writer, sheet_name="Resumo", index=False)
+        # Aba Rateio sem cabeçalho na coluna da unidade
+        pd.DataFrame(
+            {"Consumo (kWh)": [130.0, 40.0], "Valor (R$)": [150.0, 10.0]}, index=["Quitinete 1 - Ana", "Áreas Comuns"]
+        ).to_excel(writer, sheet_name="Rateio")
+    backup = importar_backup_em_cache(buffer.getvalue())
+    assert backup.prev_map == {"Quitinete 1 - Ana": 130.0}
+    assert backup.itens["COSIP (R$)"] == 61.0
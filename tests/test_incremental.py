@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from rateio import Tarifas, calcular_rateio
+from rateio.incremental import RateioIncremental, _maiores_restos
+
+METODOS = ["Faixas individuais", "Proporcional ao total da fatura"]
+
+
+def assert_mesmo_resultado(incremental, completo):
+    pd.testing.assert_frame_equal(incremental.df, completo.df)
+    assert incremental.consumo_total == pytest.approx(completo.consumo_total)
+    assert incremental.valor_base == completo.valor_base
+    assert incremental.valor_total == completo.valor_total
+    assert incremental.alertas == completo.alertas
+
+
+@pytest.mark.parametrize("semente", range(20))
+def test_incremental_igual_ao_calculo_completo(semente):
+    rng = np.random.default_rng(semente)
+    n = int(rng.integers(1, 60))
+    nomes = [f"Quitinete {i+1}" for i in range(n)]
+    consumos = np.round(rng.uniform(0, 400, n), int(rng.integers(0, 3)))
+    tarifas, metodo = Tarifas(), METODOS[semente % 2]
+    consumo_total = None if semente % 3 == 0 else round(float(consumos.sum() * rng.uniform(0.8, 1.3)), 1)
+    incremental = RateioIncremental()
+    for passo in range(25):
+        acao = rng.integers(0, 6)
+        if acao <= 2:
+            consumos = consumos.copy()
+            consumos[rng.integers(0, n)] = round(float(rng.uniform(0, 400)), 1)
+        elif acao == 3 and consumo_total is not None:
+            consumo_total = round(consumo_total + float(rng.uniform(-50, 50)), 1)
+        elif acao == 4 and passo % 5 == 0:
+            metodo = METODOS[1] if metodo == METODOS[0] else METODOS[0]
+        elif acao == 5 and passo % 7 == 0:
+            tarifas = Tarifas(bandeira="Amarela", usar_bandeira_por_faixa=bool(passo % 2))
+        assert_mesmo_resultado(
+            incremental.calcular(nomes, consumos, tarifas, metodo, consumo_total),
+            calcular_rateio(nomes, consumos, tarifas, metodo, consumo_total),
+        )
+
+
+def test_so_a_unidade_alterada_e_recalculada():
+    nomes = ["A", "B", "C"]
+    incremental = RateioIncremental()
+    incremental.calcular(nomes, [100.0, 120.0, 80.0], Tarifas(), METODOS[1], 350.0)
+    assert incremental.recalculadas == 3
+    incremental.calcular(nomes, [100.0, 125.0, 80.0], Tarifas(), METODOS[1], 350.0)
+    assert incremental.recalculadas == 1
+    incremental.calcular(nomes, [100.0, 125.0, 80.0], Tarifas(), METODOS[1], 350.0)
+    assert incremental.recalculadas == 0
+    incremental.calcular(nomes, [100.0, 125.0, 80.0], Tarifas(bandeira="Verde"), METODOS[1], 350.0)
+    assert incremental.recalculadas == 3
+
+
+def test_empates_nos_restos_seguem_a_ordem_das_unidades():
+    nomes = [f"U{i}" for i in range(30)]
+    consumos = np.full(30, 10.0)
+    incremental = RateioIncremental()
+    for consumo_total in [301.0, 301.0, 333.3]:
+        consumos = consumos.copy()
+        consumos[5] += 1
+        assert_mesmo_resultado(
+            incremental.calcular(nomes, consumos, Tarifas(), METODOS[1], consumo_total),
+            calcular_rateio(nomes, consumos, Tarifas(), METODOS[1], consumo_total),
+        )
+
+
+def test_maiores_restos_igual_a_ordenacao_estavel():
+    rng = np.random.default_rng(3)
+    for _ in range(200):
+        restos = rng.integers(0, 5, rng.integers(1, 20))
+        faltam = int(rng.integers(0, len(restos) + 1))
+        esperado = np.zeros(len(restos), dtype=np.int64)
+        esperado[np.argsort(-restos, kind="stable")[:faltam]] = 1
+        np.testing.assert_array_equal(_maiores_restos(restos, faltam), esperado)
@@ -0,0 +1,47 @@
+import tracemalloc
+
+import pytest
+
+from rateio.instrumentacao import Instrumentacao
+
+
+@pytest.fixture
+def sem_tracemalloc():
+    tracemalloc.stop()
+    yield
+    tracemalloc.stop()
+
+
+def test_desligada_nao_guarda_medicoes():
+    diag = Instrumentacao(ativo=False, medir_memoria=False)
+    with diag.fase("cálculo", linhas=3):
+        pass
+    assert diag.tabela().empty
+
+
+def test_ligada_pela_url_mede_so_o_tempo(sem_tracemalloc):
+    diag = Instrumentacao(ativo=False, medir_memoria=False)
+    diag.ativar()
+    with diag.fase("cálculo") as fase:
+        fase.linhas = 3
+    assert not tracemalloc.is_tracing()
+    medicao = diag.tabela().iloc[0]
+    assert (medicao["fase"], medicao["linhas"]) == ("cálculo", 3)
+    assert medicao["pico_memoria_mb"] is None
+
+
+def test_so_uma_fase_por_vez_mede_memoria(sem_tracemalloc):
+    uma = Instrumentacao(ativo=True, sessao="a", medir_memoria=True)
+    outra = Instrumentacao(ativo=True, sessao="b", medir_memoria=True)
+    assert tracemalloc.is_tracing()
+    with uma.fase("exportação"):
+        # Começou com a outra medindo: não zera o pico dela e fica sem pico
+        with outra.fase("cálculo"):
+            bytes(2**20)
+        bytearray(2**21)
+    assert outra.tabela().iloc[0]["pico_memoria_mb"] is None
+    assert uma.tabela().iloc[0]["pico_memoria_mb"] >= 2.0
+    # Terminada a primeira, a próxima fase volta a medir
+    with outra.fase("cálculo"):
+        pass
+    assert outra.tabela().iloc[0]["pico_memoria_mb"] is not None
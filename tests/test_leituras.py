@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+
+from rateio.leituras import COLUNA_ANTERIOR, COLUNA_ATUAL, COLUNA_NOME, ler_tabela, preencher_anteriores, tabela_inicial
+
+PREV_MAP = {"Quitinete 1 - Ana": 1000.0, "Quitinete 2 - Bia": 2000.0, "Áreas Comuns": 50.0}
+
+
+def test_tabela_inicial_vem_do_backup_sem_areas_comuns():
+    tabela = tabela_inicial(PREV_MAP)
+    assert tabela[COLUNA_NOME].tolist() == ["Ana", "Bia"]
+    assert tabela[COLUNA_ANTERIOR].tolist() == [1000.0, 2000.0]
+    assert tabela[COLUNA_ATUAL].isna().all()
+    assert len(tabela_inicial({}, n_linhas=3)) == 3
+
+
+def test_preencher_casa_pelo_nome_e_mantem_o_digitado():
+    tabela = pd.DataFrame({
+        COLUNA_NOME: [" Bia ", "Ana", "Cid", "Quitinete 1 - Ana"],
+        COLUNA_ANTERIOR: [np.nan, 990.0, np.nan, np.nan],
+        COLUNA_ATUAL: [2100.0, 1100.0, 10.0, 1100.0],
+    })
+    preenchida = preencher_anteriores(tabela, PREV_MAP)
+    assert preenchida[COLUNA_ANTERIOR].tolist()[:2] == [2000.0, 990.0]
+    assert np.isnan(preenchida[COLUNA_ANTERIOR].iloc[2])         # sem backup para Cid
+    assert preenchida[COLUNA_ANTERIOR].iloc[3] == 1000.0           # rótulo completo também casa
+    assert tabela[COLUNA_ANTERIOR].isna().sum() == 3               # não altera a tabela de entrada
+
+
+def test_leitura_apagada_de_proposito_nao_volta():
+    # O app passa os nomes já completados nas execuções anteriores; só a linha nova (Cid) é preenchida
+    tabela = pd.DataFrame({
+        COLUNA_NOME: ["Ana", "Bia", "Quitinete 9 - Cid"],
+        COLUNA_ANTERIOR: [np.nan, 2000.0, np.nan],
+        COLUNA_ATUAL: [1100.0, 2100.0, 30.0],
+    })
+    prev_map = {**PREV_MAP, "Quitinete 9 - Cid": 7.0}
+    preenchida = preencher_anteriores(tabela, prev_map, ignorar=frozenset({"Ana", "Bia"}))
+    assert np.isnan(preenchida[COLUNA_ANTERIOR].iloc[0])
+    assert preenchida[COLUNA_ANTERIOR].tolist()[1:] == [2000.0, 7.0]
+    assert ler_tabela(preenchida).consumos.tolist() == [1100.0, 100.0, 23.0]
+
+
+def test_ler_tabela_nomes_padrao_e_consumo_nunca_negativo():
+    tabela = pd.DataFrame({
+        COLUNA_NOME: ["Ana", None, "  "],
+        COLUNA_ANTERIOR: [1000.0, 500.0, np.nan],
+        COLUNA_ATUAL: [1120.5, 400.0, 12.0],
+    })
+    leituras = ler_tabela(tabela)
+    assert leituras.unidades == ["Quitinete 1 - Ana", "Quitinete 2 - Q2", "Quitinete 3 - Q3"]
+    assert leituras.consumos.tolist() == [120.5, 0.0, 12.0]
+    assert leituras.leituras_atuais.tolist() == [1120.5, 400.0, 12.0]
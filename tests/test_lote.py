@@ -0,0 +1,50 @@
+import subprocess
+import sys
+import zipfile
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from rateio import Tarifas, calcular_rateio
+from rateio.exportacao import gerar_relatorio_excel, montar_aba_rateio, montar_resumo
+from rateio.importacao import leituras_anteriores, ler_backup
+
+NOMES = ["Quitinete 1 - Ana", "Quitinete 2 - Bia"]
+
+
+def gravar_backup(caminho, leituras_anteriores_mes):
+    resultado = calcular_rateio(NOMES, np.array([120.0, 80.0]), Tarifas(), "Faixas individuais", 260.0)
+    df_resumo = montar_resumo("Abril", resultado, Tarifas(), "Faixas individuais", "Leituras do prédio", 5000.0)
+    caminho.write_bytes(gerar_relatorio_excel(montar_aba_rateio(resultado.df, leituras_anteriores_mes), df_resumo))
+
+
+def test_lote_pela_linha_de_comando(tmp_path):
+    backups = tmp_path / "backups"
+    backups.mkdir()
+    gravar_backup(backups / "Predio A.xlsx", [1000.0, 2000.0])
+    gravar_backup(backups / "Predio B.xlsx", [500.0, 700.0])
+    gravar_backup(backups / "Sem leituras.xlsx", [1.0, 1.0])
+    pd.DataFrame({
+        "Prédio": ["Predio A"] * 3 + ["Predio B"] * 3,
+        "Unidade": ["Prédio", *NOMES] * 2,
+        "Leitura atual (kWh)": [5300.0, 1150.0, 2090.0, 5250.0, 600.0, 800.0],
+    }).to_csv(tmp_path / "leituras.csv", index=False)
+
+    processo = subprocess.run(
+        [sys.executable, "-m", "rateio", str(backups), str(tmp_path / "leituras.csv"), "-o", str(tmp_path / "saida"),
+         "-j", "1", "--identificacao", "Maio", "--demonstrativos"],
+        capture_output=True, text=True, timeout=300,
+    )
+    assert processo.returncode == 0, processo.stderr
+    assert "2 de 2 prédios processados" in processo.stdout
+    assert "Sem leituras.xlsx" in processo.stderr
+
+    relatorio = ler_backup(tmp_path / "saida" / "rateio_Predio A.xlsx", ler_historico=True)
+    consumos = relatorio.rateio.set_index("Unidade")["Consumo (kWh)"]
+    assert consumos[NOMES].tolist() == pytest.approx([150.0, 90.0])
+    # O relatório vira o backup do mês seguinte: leituras atuais viram as anteriores
+    assert leituras_anteriores(relatorio.rateio) == {NOMES[0]: 1150.0, NOMES[1]: 2090.0}
+    assert relatorio.historico["Identificação"].eq("Maio").any()
+    with zipfile.ZipFile(tmp_path / "saida" / "demonstrativos_Predio B.zip") as arquivo_zip:
+        assert len(arquivo_zip.namelist()) == len(NOMES)
@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from rateio.leituras import COLUNA_ANTERIOR, COLUNA_ATUAL
+from rateio.medidores import agregar_intervalos, leituras_do_mes, meses_disponiveis
+from rateio.tarifa_branca import TarifaBranca
+
+
+def exportacao(medidores=("M1", "M2"), inicio="2024-05-01 00:15", periodos=24 * 4 * 45, energia=0.25):
+    """CSV de intervalos de 15 min (data/hora no fim) com energia e leitura do registrador (kWh no fim do intervalo)."""
+    horarios = pd.date_range(inicio, periods=periodos, freq="15min")
+    partes = []
+    for i, medidor in enumerate(medidores):
+        kwh = np.full(periodos, energia * (i + 1))
+        partes.append(pd.DataFrame({
+            "Medidor": medidor,
+            "Data_Hora": horarios.strftime("%Y-%m-%d %H:%M"),
+            "Energia (kWh)": kwh,
+            "Leitura (kWh)": 1000 * (i + 1) + np.cumsum(kwh),
+        }))
+    return pd.concat(partes, ignore_index=True)
+
+
+def test_leitura_em_blocos_igual_a_leitura_inteira():
+    conteudo = exportacao().to_csv(index=False).encode()
+    inteira = agregar_intervalos(conteudo)
+    em_blocos = agregar_intervalos(conteudo, linhas_por_bloco=777)
+    pd.testing.assert_frame_equal(inteira, em_blocos)
+    assert meses_disponiveis(inteira) == ["2024-05", "2024-06"]
+    assert inteira.loc[("M1", "2024-05"), "consumo_kwh"] == pytest.approx(0.25 * 4 * 24 * 31)
+
+
+def test_meses_seguidos_somam_a_diferenca_do_registrador():
+    df = exportacao(medidores=("M1",), inicio="2024-05-15 10:00", periodos=96 * 60)
+    df = df.drop(columns="Energia (kWh)")  # só o registrador
+    totais = agregar_intervalos(df.to_csv(index=False).encode(), linhas_por_bloco=1000)
+    meses = meses_disponiveis(totais)
+    assert meses == ["2024-05", "2024-06", "2024-07"]
+    tabelas = [leituras_do_mes(totais, mes).tabela.iloc[0] for mes in meses]
+    diferencas = [tabela[COLUNA_ATUAL] - tabela[COLUNA_ANTERIOR] for tabela in tabelas]
+    leituras = df["Leitura (kWh)"]
+    # O primeiro mês, sem a energia do intervalo, começa na primeira leitura do arquivo
+    assert sum(diferencas) == pytest.approx(leituras.iloc[-1] - leituras.iloc[0])
+    # Junho inteiro: a leitura de 01/06 00:00 fecha maio e a de 01/07 00:00 fecha junho
+    assert diferencas[1] == pytest.approx(0.25 * 4 * 24 * 30)
+
+
+def test_leitura_de_meia_noite_do_dia_1_fecha_o_mes_anterior():
+    totais = agregar_intervalos(exportacao(inicio="2024-05-31 23:45", periodos=2).to_csv(index=False).encode())
+    linha = totais.loc[("M1", "2024-05")]
+    assert linha["intervalos"] == 2
+    assert (linha["leitura_inicial"], linha["leitura_final"]) == pytest.approx((1000.0, 1000.5))
+    assert linha["consumo_kwh"] == pytest.approx(0.5)
+
+
+def test_formato_brasileiro_com_ponto_e_virgula():
+    df = exportacao(periodos=96)
+    df["Data_Hora"] = pd.to_datetime(df["Data_Hora"]).dt.strftime("%d/%m/%Y %H:%M")
+    conteudo = df.to_csv(index=False, sep=";", decimal=",").encode()
+    totais = agregar_intervalos(conteudo)
+    assert totais.loc[("M2", "2024-05"), "consumo_kwh"] == pytest.approx(0.5 * 96)
+
+
+def test_colunas_obrigatorias():
+    with pytest.raises(ValueError):
+        agregar_intervalos(b"Medidor,Valor\nM1,1\n")
+
+
+def test_energia_por_posto_soma_o_consumo():
+    conteudo = exportacao(periodos=96 * 7).to_csv(index=False).encode()
+    totais = agregar_intervalos(conteudo, tarifa_branca=TarifaBranca())
+    linha = totais.loc[("M1", "2024-05")]
+    assert linha[["kwh_fora_ponta", "kwh_intermediario", "kwh_ponta"]].sum() == pytest.approx(linha["consumo_kwh"])
+
+
+def test_leituras_do_mes_separa_o_medidor_do_predio():
+    conteudo = exportacao(medidores=("PREDIO", "M1", "M2"), periodos=96 * 3).to_csv(index=False).encode()
+    leituras = leituras_do_mes(agregar_intervalos(conteudo), "2024-05", medidor_predio="PREDIO")
+    assert leituras.tabela["Nome"].tolist() == ["M1", "M2"]
+    assert leituras.predio_atual is not None
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from rateio.memoria import ArmazemSessao, compactar, expandir, tamanho_bytes
+
+
+def rateio(n=200) -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "Consumo (kWh)": np.arange(n) * 1.5,
+            "Valor (R$)": np.round(np.arange(n) * 1.07, 2),
+            "Bloco": ["A", "B"] * (n // 2),
+        },
+        index=pd.Index([f"Quitinete {i}" for i in range(n)], name="Unidade"),
+    )
+
+
+def test_compactar_e_expandir_voltam_ao_mesmo_dataframe():
+    df = rateio()
+    tabela = compactar(df)
+    assert tabela.escalas == {"Consumo (kWh)": 1000, "Valor (R$)": 100}
+    assert pd.api.types.is_integer_dtype(tabela.df["Valor (R$)"])
+    assert isinstance(tabela.df["Bloco"].dtype, pd.CategoricalDtype)
+    pd.testing.assert_frame_equal(expandir(tabela), df)
+
+
+@pytest.mark.parametrize("coluna, valores", [
+    ("Valor (R$)", [10.005, 3.0]),          # meio centavo
+    ("Consumo (kWh)", [1 / 3, 2.0]),        # fração de Wh
+    ("Valor (R$)", [1e17, 1.0]),            # grande demais para o float guardar inteiros exatos
+    ("Consumo (kWh)", [np.nan, 2.0]),
+])
+def test_compactar_nao_perde_fracoes(coluna, valores):
+    df = pd.DataFrame({coluna: valores})
+    tabela = compactar(df)
+    assert tabela.escalas == {}
+    pd.testing.assert_frame_equal(expandir(tabela), df)
+
+
+def test_armazem_despeja_o_mais_antigo_em_disco_e_relê():
+    df = rateio()
+    orcamento = int(tamanho_bytes(compactar(df)) * 2.5)
+    armazem = ArmazemSessao(orcamento_bytes=orcamento)
+    for chave in ["a", "b", "c"]:
+        armazem.guardar(chave, df.assign(**{"Valor (R$)": df["Valor (R$)"] + ord(chave)}))
+    assert armazem.chaves_em_disco == ["a"]
+    assert armazem.uso_bytes <= orcamento
+
+    # Ler "a" traz de volta da pasta da sessão e despeja o usado há mais tempo ("b")
+    pd.testing.assert_frame_equal(armazem.obter("a"), df.assign(**{"Valor (R$)": df["Valor (R$)"] + ord("a")}))
+    assert armazem.chaves_em_disco == ["b"]
+    assert "b" in armazem and armazem.obter("x") is None
+    armazem.remover("b")
+    assert armazem.chaves_em_disco == [] and "b" not in armazem
@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from rateio.serie_mensal import JANELA, SerieMensal, calcular_indicadores, mes_do_texto
+
+MESES = [f"2024-{m:02d}" for m in range(1, 11)]
+
+
+def mes_de_resultado(consumos: dict) -> pd.DataFrame:
+    return pd.DataFrame({"Consumo (kWh)": list(consumos.values()), "Valor (R$)": 1.0}, index=list(consumos))
+
+
+def consumos_do_mes(i: int) -> dict:
+    return {"Quitinete 1": 100.0 + 7 * (i % 3), "Quitinete 2": 50.0 + i, "Quitinete 3": 0.0 if i == 8 else 80.0}
+
+
+def test_mes_fora_de_ordem_recalcula_os_seguintes(tmp_path):
+    em_ordem = SerieMensal(tmp_path / "em_ordem.sqlite3")
+    for i, mes in enumerate(MESES):
+        em_ordem.adicionar_mes("A", mes, mes_de_resultado(consumos_do_mes(i)))
+
+    fora_de_ordem = SerieMensal(tmp_path / "fora.sqlite3")
+    atrasado = 3
+    for i, mes in enumerate(MESES):
+        if i != atrasado:
+            fora_de_ordem.adicionar_mes("A", mes, mes_de_resultado(consumos_do_mes(i)))
+    # Chega depois: ele e todos os meses seguintes são recalculados
+    recalculados = fora_de_ordem.adicionar_mes("A", MESES[atrasado], mes_de_resultado(consumos_do_mes(atrasado)))
+    assert recalculados == len(MESES) - atrasado
+    pd.testing.assert_frame_equal(fora_de_ordem.ler("A"), em_ordem.ler("A"))
+    assert fora_de_ordem.ler("A", so_anomalias=True)["Alerta"].tolist() == ["Consumo zerado"]
+
+
+def test_substituir_um_mes_nao_duplica(tmp_path):
+    serie = SerieMensal(tmp_path / "serie.sqlite3")
+    serie.adicionar_mes("A", "2024-01", mes_de_resultado({"Quitinete 1": 10.0}))
+    serie.adicionar_mes("A", "2024-01", mes_de_resultado({"Quitinete 1": 20.0}))
+    assert serie.tabela_consumo("A").loc["Quitinete 1"].tolist() == [20.0]
+    serie.limpar("A")
+    assert serie.meses("A") == []
+
+
+def test_janela_de_seis_meses():
+    assert JANELA == 6
+    # Mês 1 muito alto: entra na média móvel até o mês 6 e na base de comparação até o mês 7
+    consumos = [1000.0] + [100.0] * 7
+    largura = pd.DataFrame([consumos], index=["Quitinete 1"], columns=MESES[:8])
+    indicadores = calcular_indicadores(largura)
+    media = indicadores["media_movel"].loc["Quitinete 1"]
+    assert media["2024-06"] == pytest.approx((1000 + 5 * 100) / 6)
+    assert media["2024-07"] == pytest.approx(100.0)
+    z = indicadores["z"].loc["Quitinete 1"]
+    assert z["2024-07"] == pytest.approx(-150 / np.std([1000.0] + [100.0] * 5))  # base dos meses 1 a 6
+    assert z["2024-08"] == 0.0          # base dos meses 2 a 7: só 100 kWh
+    # Menos de 3 meses anteriores: sem base para avaliar
+    assert z[["2024-01", "2024-02", "2024-03"]].isna().all()
+
+
+@pytest.mark.parametrize("base, mes, z_esperado, alerta", [
+    (100.0, 104.0, 0.4, None),                 # desvio 0: piso de 10% da média (10 kWh)
+    (100.0, 140.0, 4.0, "Acima do normal"),
+    (100.0, 60.0, -4.0, "Abaixo do normal"),
+    (2.0, 5.0, 3.0, None),                     # média baixa: piso de 1 kWh
+    (2.0, 6.0, 4.0, "Acima do normal"),
+    (2.0, 0.0, -2.0, "Consumo zerado"),
+])
+def test_piso_do_desvio_e_alertas(base, mes, z_esperado, alerta):
+    largura = pd.DataFrame([[base] * 4 + [mes]], index=["Quitinete 1"], columns=MESES[:5])
+    indicadores = calcular_indicadores(largura)
+    assert indicadores["z"].iloc[0, -1] == pytest.approx(z_esperado)
+    assert indicadores["anomalia"].iloc[0, -1] == alerta or (alerta is None and pd.isna(indicadores["anomalia"].iloc[0, -1]))
+
+
+def test_variacao_sobre_mes_anterior_zerado_fica_vazia():
+    largura = pd.DataFrame([[0.0, 50.0]], index=["Quitinete 1"], columns=MESES[:2])
+    indicadores = calcular_indicadores(largura)
+    assert indicadores["delta_kwh"].iloc[0, 1] == 50.0
+    assert np.isnan(indicadores["delta_pct"].iloc[0, 1])
+
+
+@pytest.mark.parametrize("textos, esperado", [
+    (("backup_2024-05.xlsx",), "2024-05"),
+    (("Rateio 2024_5 final",), "2024-05"),
+    (("rateio_05-2024.xlsx",), "2024-05"),
+    (("31/05/2024 18:30",), "2024-05"),
+    (("backup.xlsx", "Maio 03/2023"), "2023-03"),     # nome sem mês: tenta a Identificação
+    ((None, 202405, "2024-13 e 11/2024"), "2024-11"),  # não texto é ignorado; mês 13 não vale
+    (("backup final.xlsx", "Maio"), None),
+])
+def test_mes_do_texto(textos, esperado):
+    assert mes_do_texto(*textos) == esperado
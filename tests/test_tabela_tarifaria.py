@@ -0,0 +1,98 @@
+from decimal import ROUND_HALF_UP, Decimal
+
+import numpy as np
+import pytest
+
+from rateio import Faixas, TabelaTarifaria, Tarifas, calcular_componentes, compilar
+from rateio.tabela_tarifaria import ESCALA_CUSTO, em_wh
+
+
+def custo_por_faixas(consumo, faixas: Faixas) -> Decimal:
+    """Custo exato (Decimal) somando faixa a faixa, sem a tabela compilada."""
+    consumo = Decimal(str(consumo))
+    limites = [Decimal(0)] + [Decimal(str(x)) for x in faixas.limites] + [None]
+    total = Decimal(0)
+    for inicio, fim, preco in zip(limites, limites[1:], faixas.precos):
+        trecho = (consumo if fim is None else min(consumo, fim)) - inicio
+        total += max(trecho, Decimal(0)) * Decimal(str(preco))
+    return total
+
+
+def centavos(valor: Decimal) -> float:
+    return float(valor.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP))
+
+
+def test_faixas_validam_limites_e_precos():
+    with pytest.raises(ValueError):
+        Faixas((100.0,), (0.5,))
+    with pytest.raises(ValueError):
+        Faixas((200.0, 100.0), (0.1, 0.2, 0.3))
+    with pytest.raises(ValueError):
+        Faixas((0.0,), (0.1, 0.2))
+
+
+def test_tabela_com_varias_faixas_e_limites_diferentes():
+    tabela = TabelaTarifaria(
+        te=Faixas((30.0, 100.0, 220.0), (0.10, 0.20, 0.30, 0.40)),
+        tusd=Faixas((150.0,), (0.25, 0.35)),
+        bandeiras={"Amarela": Faixas((), (0.02,)), "Vermelha 1": Faixas((50.0,), (0.04, 0.05))},
+        cosip=10.0,
+    )
+    compilada = tabela.compilar("Vermelha 1")
+    consumos = np.array([0.0, 12.5, 30.0, 49.9, 50.0, 100.0, 150.0, 219.9, 220.0, 1000.0])
+    esperado = [
+        custo_por_faixas(c, tabela.te) + custo_por_faixas(c, tabela.tusd) + custo_por_faixas(c, tabela.bandeiras["Vermelha 1"])
+        for c in consumos
+    ]
+    assert compilada.total.custo_exato(em_wh(consumos)).tolist() == [int(v * ESCALA_CUSTO) for v in esperado]
+    assert compilada.total.custo(consumos).tolist() == [centavos(v) for v in esperado]
+    assert compilada.cosip == 10.0
+    with pytest.raises(ValueError):
+        tabela.compilar("Vermelha 2")
+
+
+def test_tarifas_e_tabela_compilada_dao_o_mesmo_resultado():
+    tarifas = Tarifas()
+    consumos = np.array([0.0, 80.0, 150.0, 151.0, 420.7])
+    por_tarifas = calcular_componentes(consumos, tarifas)
+    por_tabela = calcular_componentes(consumos, tarifas.tabela_tarifaria().compilar(tarifas.bandeira))
+    for a, b in zip(por_tarifas, por_tabela):
+        np.testing.assert_array_equal(a, b)
+    assert compilar(tarifas) is compilar(tarifas)  # compilada uma vez só
+
+
+@pytest.mark.parametrize("bandeira", ["Verde", "Vermelha 1", "Vermelha 2"])
+@pytest.mark.parametrize("por_faixa", [True, False])
+def test_totais_de_predio_exatos_com_meio_centavo_para_cima(bandeira, por_faixa):
+    """Consumos de prédio (até 100 MWh): o valor é o exato arredondado, inclusive nos empates de meio centavo."""
+    tarifas = Tarifas(bandeira=bandeira, usar_bandeira_por_faixa=por_faixa)
+    tabela = tarifas.tabela_tarifaria()
+    faixas_bandeira = tabela.bandeiras[bandeira]
+    rng = np.random.default_rng(11)
+    consumos = np.concatenate([np.arange(0, 100_001, 100), np.round(rng.uniform(0, 100_000, 2000), 1)])
+    esperado = [
+        centavos(custo_por_faixas(c, tabela.te) + custo_por_faixas(c, tabela.tusd) + custo_por_faixas(c, faixas_bandeira))
+        for c in consumos.tolist()
+    ]
+    compilada = compilar(tarifas)
+    assert compilada.total.custo(consumos).tolist() == esperado
+    assert [compilada.total.custo_escalar(c) for c in consumos[:500].tolist()] == esperado[:500]
+
+
+def test_empates_de_meio_centavo_de_exemplo():
+    # 3481,975 e 30302,485 exatos: sobem para o centavo de cima
+    assert compilar(Tarifas(usar_bandeira_por_faixa=False)).total.custo_escalar(3700.0) == 3481.98
+    assert compilar(Tarifas()).total.custo_escalar(31700.0) == 30302.49
+
+
+def test_custo_escalar_usa_listas_compiladas():
+    total = compilar(Tarifas()).total
+    for coluna, lista in zip((total.inicios, total.precos, total.acumulado), total.segmentos):
+        assert type(lista) is list and all(type(valor) is int for valor in lista)
+        assert lista == coluna.tolist()
+
+
+def test_componentes_somam_o_total():
+    componentes = calcular_componentes(np.array([95.0, 300.0]), Tarifas())
+    np.testing.assert_allclose(componentes.te + componentes.tusd + componentes.bandeira, componentes.base, atol=0.011)
+    np.testing.assert_allclose(componentes.total, componentes.base + Tarifas().cosip)
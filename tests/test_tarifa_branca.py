@@ -0,0 +1,85 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from rateio.tarifa_branca import (
+    FORA_PONTA, INTERMEDIARIO, PONTA, TarifaBranca, _pascoa, calcular_rateio_branca, custo_por_posto,
+    energia_por_posto, feriados_nacionais, postos_horarios,
+)
+
+
+def test_pascoa_e_feriados_moveis():
+    assert _pascoa(2024) == date(2024, 3, 31)
+    assert _pascoa(2025) == date(2025, 4, 20)
+    feriados = feriados_nacionais(2024)
+    assert date(2024, 2, 13) in feriados   # Carnaval
+    assert date(2024, 3, 29) in feriados   # Sexta-feira da Paixão
+    assert date(2024, 5, 30) in feriados   # Corpus Christi
+    assert date(2024, 11, 20) in feriados
+    assert date(2024, 3, 28) not in feriados
+
+
+def test_postos_em_dia_util_fim_de_semana_e_feriado():
+    tarifa = TarifaBranca()  # ponta 18h30-21h30, intermediário 1 h antes e depois
+    horarios = pd.to_datetime([
+        "2024-06-03 17:15", "2024-06-03 17:30", "2024-06-03 18:30", "2024-06-03 21:15",
+        "2024-06-03 21:30", "2024-06-03 22:30",
+        "2024-06-08 19:00",   # sábado
+        "2024-05-30 19:00",   # Corpus Christi
+    ])
+    assert postos_horarios(horarios, tarifa).tolist() == [
+        FORA_PONTA, INTERMEDIARIO, PONTA, PONTA, INTERMEDIARIO, FORA_PONTA, FORA_PONTA, FORA_PONTA,
+    ]
+
+
+def test_janelas_que_passam_da_meia_noite():
+    tarifa = TarifaBranca(inicio_ponta="22:30")  # ponta 22h30-01h30, intermediário até 02h30
+    horarios = pd.to_datetime([
+        "2024-06-10 21:15", "2024-06-10 21:30", "2024-06-10 23:00",   # segunda-feira
+        "2024-06-11 01:15", "2024-06-11 02:00", "2024-06-11 02:30",
+        "2024-06-08 00:30",   # madrugada de sábado: janela que começou na sexta
+        "2024-06-10 00:30",   # madrugada de segunda: janela que começou no domingo
+    ])
+    assert postos_horarios(horarios, tarifa).tolist() == [
+        FORA_PONTA, INTERMEDIARIO, PONTA, PONTA, INTERMEDIARIO, FORA_PONTA, PONTA, FORA_PONTA,
+    ]
+    dia = pd.date_range("2024-06-11", periods=96, freq="15min")  # terça-feira
+    assert np.bincount(postos_horarios(dia, tarifa), minlength=3).tolist() == [76, 8, 12]
+
+
+def test_janelas_maiores_que_o_dia():
+    with pytest.raises(ValueError):
+        postos_horarios(pd.to_datetime(["2024-06-10 12:00"]), TarifaBranca(horas_ponta=20, horas_intermediario=3))
+
+
+def test_feriado_extra_e_fora_ponta():
+    tarifa = TarifaBranca(feriados_extras=("2024-06-04",))
+    assert postos_horarios(pd.to_datetime(["2024-06-04 19:00"]), tarifa).tolist() == [FORA_PONTA]
+
+
+def test_energia_e_custo_por_posto():
+    horarios = pd.date_range("2024-06-03", periods=96, freq="15min")  # segunda-feira
+    consumos = np.ones((2, 96)) * [[0.1], [0.2]]
+    energia = energia_por_posto(consumos, horarios)
+    np.testing.assert_allclose(energia.sum(axis=1), consumos.sum(axis=1))
+    np.testing.assert_allclose(energia[0], [0.1 * 76, 0.1 * 8, 0.1 * 12])  # 19 h, 2 h e 3 h
+    np.testing.assert_allclose(custo_por_posto(energia[0]), round(float(energia[0] @ TarifaBranca().precos), 2))
+    with pytest.raises(ValueError):
+        energia_por_posto(consumos[:, :10], horarios)
+
+
+def test_custo_por_posto_arredonda_meio_centavo_para_cima():
+    tarifa = TarifaBranca(te_fora_ponta=0.1, tusd_fora_ponta=0.0, bandeira="Verde", cosip=61.0)
+    # 0,25 kWh × R$ 0,10 = R$ 0,025 e 0,65 kWh = R$ 0,065: np.round levaria ao par (0,02 e 0,06)
+    energia = np.array([[0.25, 0.0, 0.0], [0.65, 0.0, 0.0]])
+    np.testing.assert_array_equal(custo_por_posto(energia, tarifa), [0.03, 0.07])
+    resultado = calcular_rateio_branca(["A", "B"], energia, tarifa, "Faixas individuais")
+    assert (resultado.valor_base, resultado.valor_total) == (0.09, 61.09)
+
+
+def test_rateio_branca_fecha_o_total():
+    energia = np.array([[50.0, 5.0, 10.0], [80.0, 2.0, 3.0]])
+    resultado = calcular_rateio_branca(["A", "B"], energia, TarifaBranca(), "Proporcional ao total da fatura", energia.sum(0) + 10)
+    assert round(resultado.df["Valor (R$)"].sum(), 2) == resultado.valor_total